@@ -11,14 +11,31 @@ SCRIPT_VERSION="0.3.3"
 # Fixed installation path (no need for placeholder replacement)
 DOCS_PATH="$HOME/.claude-code-docs"
 MANIFEST="$DOCS_PATH/docs/docs_manifest.json"
+SECTIONS="$DOCS_PATH/docs/docs_sections.json"
+CHANGELOG_INDEX="$DOCS_PATH/docs/changelog_versions.json"
+WHATS_NEW="$DOCS_PATH/docs/whats_new.json"
+LINKS="$DOCS_PATH/docs/docs_links.json"
+RELATED_LIMIT=10  # topics per "related" line
+QUERY="$DOCS_PATH/scripts/docs_query.py"
+QUERY_FALLBACK=3  # docs_query.py's status for "answer this in the shell instead"
+
+# Stale-while-revalidate: docs are served from the local copy immediately and
+# a detached background refresh runs at most once per TTL (seconds)
+REFRESH_TTL="${CLAUDE_DOCS_REFRESH_TTL:-900}"
+STATE_DIR="$DOCS_PATH/.cache"
+REFRESH_STAMP="$STATE_DIR/last_refresh"
+REFRESH_STATUS="$STATE_DIR/refresh_status"
+REFRESH_LOCK="$STATE_DIR/refresh.lock"
+REFRESH_LOCK_TIMEOUT=300  # seconds before an abandoned lock is broken
 
 # No colors since they don't work in terminal anyway
 
 # Enhanced sanitize function to prevent command injection
 sanitize_input() {
     # Remove ALL shell metacharacters and control characters
-    # Only allow alphanumeric, spaces, hyphens, underscores, periods, commas, apostrophes, and question marks
-    echo "$1" | sed 's/[^a-zA-Z0-9 _.,'\''?-]//g' | sed 's/  */ /g' | sed 's/^ *//;s/ *$//'
+    # Only allow alphanumeric, spaces, hyphens, underscores, periods, commas, apostrophes, question marks
+    # and '#' (used for topic#section)
+    echo "$1" | sed 's/[^a-zA-Z0-9 _.,'\''?#-]//g' | sed 's/  */ /g' | sed 's/^ *//;s/ *$//'
 }
 
 # Function to print documentation header
@@ -29,17 +46,188 @@ print_doc_header() {
 }
 
 
+# Function to answer a /docs call in a single python3 process (docs_query.py
+# takes the same arguments and prints the same output as the functions below)
+# Returns $QUERY_FALLBACK when python3 or the script is unavailable, or when
+# the request needs the shell (it prints nothing then)
+run_query() {
+    command -v python3 >/dev/null 2>&1 && [[ -f "$QUERY" ]] || return $QUERY_FALLBACK
+    # -S skips site-packages: only the standard library is needed, and startup halves
+    python3 -S "$QUERY" "$@" 2>/dev/null
+}
+
+# Function to run a ranked full-text search against the prebuilt index
+# Returns non-zero when python3 or the index is unavailable, or nothing matched
+search_index() {
+    command -v python3 >/dev/null 2>&1 || return 1
+    [[ -f "$DOCS_PATH/docs/docs_index.json" ]] || return 1
+    python3 "$DOCS_PATH/scripts/docs_index.py" --docs-dir "$DOCS_PATH/docs" search -- "$1" 2>/dev/null
+}
+
+# Function to print all topic names, sorted
+list_topics() {
+    ls "$DOCS_PATH/docs" | grep '\.md$' | sed 's/\.md$//' | sort
+}
+
+# Function to format a number of seconds as a short relative age
+format_age() {
+    local secs="$1"
+    if [[ $secs -lt 60 ]]; then
+        echo "just now"
+    elif [[ $secs -lt 3600 ]]; then
+        echo "$((secs / 60))m ago"
+    elif [[ $secs -lt 86400 ]]; then
+        echo "$((secs / 3600))h ago"
+    else
+        echo "$((secs / 86400))d ago"
+    fi
+}
+
+# Function to record the outcome of a sync for the next /docs call
+# Format: <epoch> <updated|current|offline|local-changes> <branch>
+record_refresh_status() {
+    mkdir -p "$STATE_DIR" 2>/dev/null || return 0
+    local now=$(date +%s)
+    echo "$now" > "$REFRESH_STAMP"
+    echo "$now $1 ${2:-main}" > "$REFRESH_STATUS"
+}
+
+# Function to start a detached background refresh if the TTL has expired
+# Never blocks: the caller keeps serving the local docs
+maybe_background_refresh() {
+    [[ -d "$DOCS_PATH/.git" ]] || return 0
+    mkdir -p "$STATE_DIR" 2>/dev/null || return 0
+    
+    local now=$(date +%s)
+    local last=0
+    [[ -f "$REFRESH_STAMP" ]] && last=$(cat "$REFRESH_STAMP" 2>/dev/null || echo 0)
+    [[ "$last" =~ ^[0-9]+$ ]] || last=0
+    [[ $((now - last)) -ge $REFRESH_TTL ]] || return 0
+    
+    # Break a lock left behind by a refresh that died
+    if [[ -d "$REFRESH_LOCK" ]]; then
+        local locked_at=$(cat "$REFRESH_LOCK/started" 2>/dev/null || echo 0)
+        [[ "$locked_at" =~ ^[0-9]+$ ]] || locked_at=0
+        if [[ $((now - locked_at)) -ge $REFRESH_LOCK_TIMEOUT ]]; then
+            rm -rf "$REFRESH_LOCK"
+        fi
+    fi
+    
+    # mkdir is atomic, so only one caller wins the lock
+    mkdir "$REFRESH_LOCK" 2>/dev/null || return 0
+    echo "$now" > "$REFRESH_LOCK/started"
+    echo "$now" > "$REFRESH_STAMP"
+    
+    ( nohup bash "$DOCS_PATH/claude-docs-helper.sh" background-refresh </dev/null >/dev/null 2>&1 & )
+    return 0
+}
+
+# Function run (detached) by maybe_background_refresh
+background_refresh() {
+    local sync_status=0
+    auto_update || sync_status=$?
+    
+    local branch=$(cd "$DOCS_PATH" 2>/dev/null && git rev-parse --abbrev-ref HEAD 2>/dev/null || echo "main")
+    if [[ $sync_status -ne 0 ]]; then
+        record_refresh_status "offline" "$branch"
+    else
+        record_refresh_status "$UPDATE_RESULT" "$branch"
+    fi
+    rm -rf "$REFRESH_LOCK"
+}
+
+# Function to report the result of the most recent (background) refresh
+report_freshness() {
+    if [[ ! -f "$REFRESH_STATUS" ]]; then
+        echo "⏳ Checking GitHub for updates in the background (v$SCRIPT_VERSION)"
+        return 0
+    fi
+    
+    local when status branch
+    read -r when status branch < "$REFRESH_STATUS" || true
+    [[ "$when" =~ ^[0-9]+$ ]] || when=0
+    local age=$(format_age $(( $(date +%s) - when )))
+    
+    case "$status" in
+        updated)
+            echo "🔄 Updated to latest documentation $age (v$SCRIPT_VERSION, $branch)"
+            ;;
+        offline)
+            echo "⚠️  Could not check GitHub for updates ($age) - using cached docs (v$SCRIPT_VERSION, $branch)"
+            ;;
+        local-changes)
+            echo "⚠️  Updates paused: local changes in $DOCS_PATH would be discarded (run /docs -t for details)"
+            ;;
+        *)
+            echo "✅ Docs checked against GitHub $age (v$SCRIPT_VERSION, $branch)"
+            ;;
+    esac
+}
+
+# Function to tell whether the install is a shallow clone (the installer's default)
+is_shallow_install() {
+    [[ "$(git -C "$DOCS_PATH" rev-parse --is-shallow-repository 2>/dev/null)" == "true" ]]
+}
+
+# Function to tell whether install.sh or the helper differ between two commits
+installer_changed() {
+    local path
+    for path in install.sh scripts/claude-docs-helper.sh.template claude-docs-helper.sh; do
+        if [[ "$(git rev-parse -q --verify "$1:$path" 2>/dev/null)" != "$(git rev-parse -q --verify "$2:$path" 2>/dev/null)" ]]; then
+            return 0
+        fi
+    done
+    return 1
+}
+
+# Function to install the helper from the template (the single source of
+# truth; the tracked claude-docs-helper.sh is a copy of it). The new file is
+# renamed into place so this running script is not rewritten under bash.
+install_helper() {
+    local template="$DOCS_PATH/scripts/claude-docs-helper.sh.template"
+    local helper="$DOCS_PATH/claude-docs-helper.sh"
+    [[ -f "$template" ]] || return 0
+    cmp -s "$template" "$helper" && return 0
+    cp "$template" "$helper.tmp" && chmod +x "$helper.tmp" && mv -f "$helper.tmp" "$helper"
+}
+
+# Function to list tracked files with local modifications (the helper only
+# when it differs from the template the installer copies over it)
+local_changes() {
+    local path
+    git -C "$DOCS_PATH" diff --name-only HEAD 2>/dev/null | while read -r path; do
+        if [[ "$path" == "claude-docs-helper.sh" ]] && \
+            cmp -s "$DOCS_PATH/$path" "$DOCS_PATH/scripts/claude-docs-helper.sh.template"; then
+            continue
+        fi
+        echo "$path"
+    done
+}
+
 # Function to auto-update docs if needed
+# Shallow installs fetch only the newest commit and move to it; full clones
+# (e.g. development checkouts) are pulled as before and never made shallow.
+# Sets UPDATE_RESULT to "updated" or "current" on success, or to
+# "local-changes" (with the files in LOCAL_CHANGES) when a shallow install
+# was not updated because that would discard local modifications
+UPDATE_RESULT="current"
+LOCAL_CHANGES=""
 auto_update() {
     cd "$DOCS_PATH" 2>/dev/null || return 1
     
     # Get current branch
     local BRANCH=$(git rev-parse --abbrev-ref HEAD 2>/dev/null || echo "main")
+    local FETCH_ARGS=(--quiet)
+    local SHALLOW=false
+    if is_shallow_install; then
+        SHALLOW=true
+        FETCH_ARGS=(--quiet --depth 1)
+    fi
     
     # Quick fetch to check for updates (fast)
-    if ! git fetch --quiet origin "$BRANCH" 2>/dev/null; then
+    if ! git fetch "${FETCH_ARGS[@]}" origin "+refs/heads/$BRANCH:refs/remotes/origin/$BRANCH" 2>/dev/null; then
         # Current branch doesn't exist on origin, try main
-        if ! git fetch --quiet origin main 2>/dev/null; then
+        if ! git fetch "${FETCH_ARGS[@]}" origin "+refs/heads/main:refs/remotes/origin/main" 2>/dev/null; then
             # Fetch failed - can't sync
             return 2
         fi
@@ -49,20 +237,37 @@ auto_update() {
     
     local LOCAL=$(git rev-parse HEAD 2>/dev/null)
     local REMOTE=$(git rev-parse origin/"$BRANCH" 2>/dev/null)
+    [[ -n "$REMOTE" ]] && [[ "$LOCAL" != "$REMOTE" ]] || return 0
     
-    # Check if we're behind remote (important: not ahead)
-    local BEHIND=$(git rev-list HEAD..origin/"$BRANCH" --count 2>/dev/null || echo "0")
-    
-    if [[ "$LOCAL" != "$REMOTE" ]] && [[ "$BEHIND" -gt 0 ]]; then
+    if [[ "$SHALLOW" == "true" ]]; then
+        # No local history to merge with: move straight to the new commit,
+        # unless that would throw away local modifications
+        LOCAL_CHANGES=$(local_changes)
+        if [[ -n "$LOCAL_CHANGES" ]]; then
+            UPDATE_RESULT="local-changes"
+            return 0
+        fi
+        echo "🔄 Updating documentation..." >&2
+        git reset --quiet --hard "origin/$BRANCH" 2>/dev/null || return 0
+        # The reset restores the tracked copy of the helper; keep the installed one the template
+        install_helper || true
+        git gc --auto --quiet >/dev/null 2>&1 || true
+    else
+        # Check if we're behind remote (important: not ahead)
+        local BEHIND=$(git rev-list HEAD..origin/"$BRANCH" --count 2>/dev/null || echo "0")
+        [[ "$BEHIND" -gt 0 ]] || return 0
+        
         # We're behind - safe to pull
         echo "🔄 Updating documentation..." >&2
         git pull --quiet origin "$BRANCH" 2>&1 | grep -v "Merge made by" || true
+    fi
+    
+    local NEW_HEAD=$(git rev-parse HEAD 2>/dev/null)
+    if [[ "$NEW_HEAD" != "$LOCAL" ]]; then
+        UPDATE_RESULT="updated"
         
-        # Check if installer needs updating
-        local INSTALLER_VERSION=$SCRIPT_VERSION
-        local VERSION_INT=$(echo "$INSTALLER_VERSION" | sed 's/^0\.//')
-        
-        if [[ $VERSION_INT -ge 3 ]]; then
+        # Re-run the installer only if it or the helper template changed
+        if installer_changed "$LOCAL" "$NEW_HEAD"; then
             echo "🔧 Updating Claude Code Docs installer..." >&2
             ./install.sh >/dev/null 2>&1
         fi
@@ -84,10 +289,11 @@ show_freshness() {
     fi
     
     # Try to sync with GitHub
-    auto_update
-    local sync_status=$?
+    local sync_status=0
+    auto_update || sync_status=$?
     
     if [[ $sync_status -eq 2 ]]; then
+        record_refresh_status "offline" "$(git -C "$DOCS_PATH" rev-parse --abbrev-ref HEAD 2>/dev/null || echo main)"
         echo "⚠️  Could not sync with GitHub (using local cache)"
         echo "Check your internet connection or GitHub access"
     else
@@ -99,9 +305,23 @@ show_freshness() {
         if ! git rev-parse --verify origin/"$BRANCH" >/dev/null 2>&1; then
             COMPARE_BRANCH="main"
         fi
-        local AHEAD=$(git rev-list origin/"$COMPARE_BRANCH"..HEAD --count 2>/dev/null || echo "0")
-        local BEHIND=$(git rev-list HEAD..origin/"$COMPARE_BRANCH" --count 2>/dev/null || echo "0")
+        local AHEAD=0 BEHIND=0
+        if is_shallow_install; then
+            # Only the newest commit is present; any difference means behind
+            if [[ "$(git rev-parse HEAD 2>/dev/null)" != "$(git rev-parse origin/"$COMPARE_BRANCH" 2>/dev/null)" ]]; then
+                BEHIND=1
+            fi
+        else
+            AHEAD=$(git rev-list origin/"$COMPARE_BRANCH"..HEAD --count 2>/dev/null || echo "0")
+            BEHIND=$(git rev-list HEAD..origin/"$COMPARE_BRANCH" --count 2>/dev/null || echo "0")
+        fi
+        record_refresh_status "$UPDATE_RESULT" "$BRANCH"
         
+        if [[ "$UPDATE_RESULT" == "local-changes" ]]; then
+            echo "⚠️  Not updating: these local changes in $DOCS_PATH would be discarded:"
+            echo "$LOCAL_CHANGES" | sed 's/^/     /'
+            echo "   Revert them, or re-run the installer to reset to the latest version."
+        fi
         if [[ "$AHEAD" -gt 0 ]]; then
             echo "⚠️  Local version is ahead of GitHub by $AHEAD commit(s)"
         elif [[ "$BEHIND" -gt 0 ]]; then
@@ -118,72 +338,180 @@ show_freshness() {
     echo "📦 Version: ${SCRIPT_VERSION}"
 }
 
+# Function to print a document's table of contents from the section index
+print_toc() {
+    local topic="$1"
+    jq -r --arg f "$topic.md" '
+        .files[$f].sections[]?
+        | ([range(.[0] - 1)] | map("  ") | join("")) + "• " + .[2] + "  (#" + .[1] + ")"
+    ' "$SECTIONS" 2>/dev/null || true
+}
+
+# Function to print one section of a document by seeking to its byte range
+# Returns non-zero if the section index has no matching heading
+print_section() {
+    local topic="$1"
+    local doc_path="$2"
+    # Accept "PreToolUse", "pretooluse" or "hook input" for the anchor
+    local wanted=$(echo "$3" | tr '[:upper:] ' '[:lower:]-')
+    
+    [[ -f "$SECTIONS" ]] || return 1
+    local range=$(jq -r --arg f "$topic.md" --arg s "$wanted" '
+        (.files[$f].sections // []) as $secs
+        | ([$secs[] | select(.[1] == $s)] + [$secs[] | select(.[1] | contains($s))])[0]
+        | select(. != null) | "\(.[3]) \(.[4]) \(.[1])"
+    ' "$SECTIONS" 2>/dev/null || true)
+    [[ -n "$range" ]] || return 1
+    
+    local start end anchor
+    read -r start end anchor <<< "$range"
+    # tail -c seeks on regular files, so only the section's bytes are read
+    tail -c +$((start + 1)) "$doc_path" | head -c $((end - start)) || true
+    SECTION_ANCHOR="$anchor"
+    return 0
+}
+
+# Function to print related topics and backlinks as stored in the link graph
+# Usage: print_links <topic> [<section anchor>]
+print_links() {
+    local topic="$1"
+    local anchor="${2:-}"
+    
+    [[ -f "$LINKS" ]] || return 0
+    jq -r --arg f "$topic.md" --arg a "$anchor" --argjson limit "$RELATED_LIMIT" '
+        def joined: (.[:$limit] | join(", ")) + (if length > $limit then ", …" else "" end);
+        (if $a != "" then .files[$f].sections[$a] else .files[$f].related end // []) as $related
+        | [(.backlinks[$f] // [])[] | .[:-3]] as $backlinks
+        | (if ($related | length) > 0 then "🔗 Related topics: \($related | joined)" else empty end),
+          (if ($backlinks | length) > 0 then "↩️  Referenced by: \($backlinks | joined)" else empty end)
+    ' "$LINKS" 2>/dev/null || true
+}
+
+# Function to list the topics linked with the given topics (one per line),
+# most connected first
+linked_topics() {
+    [[ -f "$LINKS" ]] || return 0
+    jq -r --arg topics "$1" --argjson limit "$RELATED_LIMIT" '
+        ($topics | split("\n") | map(select(length > 0))) as $ts
+        | [$ts[] as $t
+           | ([(.files["\($t).md"].links // [])[] | .[0]] + (.backlinks["\($t).md"] // []) | unique)[]
+           | .[:-3] | select(. as $n | $ts | index([$n]) | not)]
+        | group_by(.) | sort_by(-length, .[0]) | .[:$limit][] | .[0]
+    ' "$LINKS" 2>/dev/null || true
+}
+
+# Function to print part of the changelog from the version index
+# Usage: read_changelog last [N] | since <version> | <version>
+# Returns non-zero if the index is missing or nothing matched
+read_changelog() {
+    local mode="$1"
+    local arg="${2:-}"
+    local changelog="$DOCS_PATH/docs/changelog.md"
+    
+    [[ -f "$CHANGELOG_INDEX" ]] && [[ -f "$changelog" ]] || return 1
+    
+    local range=""
+    case "$mode" in
+        last|latest|recent)
+            [[ "$arg" =~ ^[0-9]+$ ]] || arg=5
+            echo "Last $arg Claude Code versions:"
+            range=$(jq -r --argjson n "$arg" '.versions[:$n] | select(length > 0) | "\(.[0][1]) \(.[-1][2])"' "$CHANGELOG_INDEX" 2>/dev/null || true)
+            ;;
+        since|after)
+            local position=$(jq -r --arg v "${arg#v}" '.versions | map(.[0]) | index($v) // "none"' "$CHANGELOG_INDEX" 2>/dev/null || echo "none")
+            if [[ "$position" == "none" ]]; then
+                echo "Version $arg not found in the changelog."
+                return 1
+            elif [[ "$position" -eq 0 ]]; then
+                echo "$arg is the latest version - no newer changes."
+                return 0
+            fi
+            echo "Changes since $arg:"
+            range=$(jq -r --argjson i "$position" '.versions[:$i] | "\(.[0][1]) \(.[-1][2])"' "$CHANGELOG_INDEX" 2>/dev/null || true)
+            ;;
+        *)
+            range=$(jq -r --arg v "${mode#v}" 'first(.versions[] | select(.[0] == $v)) | "\(.[1]) \(.[2])"' "$CHANGELOG_INDEX" 2>/dev/null || true)
+            ;;
+    esac
+    [[ -n "$range" ]] || return 1
+    
+    local start end
+    read -r start end <<< "$range"
+    echo ""
+    # tail -c seeks, so only the requested versions are read
+    tail -c +$((start + 1)) "$changelog" | head -c $((end - start)) || true
+    return 0
+}
+
 # Function to read documentation
 read_doc() {
     local topic=$(sanitize_input "$1")
     
+    # Split "topic#section"; an empty section (or "toc") shows the table of contents
+    local section=""
+    local want_section=false
+    if [[ "$topic" == *"#"* ]]; then
+        want_section=true
+        section="${topic#*#}"
+        topic="${topic%%#*}"
+    fi
+    
     # Strip .md extension if user included it (they're being helpful!)
     topic="${topic%.md}"
     
+    # "changelog last 5", "changelog since 1.0.80" or "changelog 1.0.84"
+    if [[ "$topic" =~ ^changelog[[:space:]]+(.+)$ ]]; then
+        local mode arg
+        read -r mode arg <<< "${BASH_REMATCH[1]}"
+        print_doc_header
+        report_freshness
+        maybe_background_refresh
+        echo ""
+        if ! read_changelog "$mode" "$arg"; then
+            echo "Usage: /docs changelog last <N> | /docs changelog since <version> | /docs changelog <version>"
+        fi
+        echo ""
+        echo "📖 Official source: https://github.com/anthropics/claude-code/blob/main/CHANGELOG.md"
+        return 0
+    fi
+    
     local doc_path="$DOCS_PATH/docs/${topic}.md"
     
     if [[ -f "$doc_path" ]]; then
         print_doc_header
         
-        # Quick check if we're up to date (0.37s)
-        cd "$DOCS_PATH" 2>/dev/null || exit 1
-        local BRANCH=$(git rev-parse --abbrev-ref HEAD 2>/dev/null || echo "main")
-        local VERSION=$SCRIPT_VERSION
+        # Serve the local copy right away; any sync happens in the background
+        report_freshness
+        maybe_background_refresh
+        echo ""
         
-        # Do the fetch to check status
-        local COMPARE_BRANCH="$BRANCH"
-        if ! git fetch --quiet origin "$BRANCH" 2>/dev/null; then
-            # Try main if current branch doesn't exist on origin
-            if git fetch --quiet origin main 2>/dev/null; then
-                COMPARE_BRANCH="main"
+        local page_anchor=""
+        local section_anchor=""
+        if [[ "$want_section" == "true" ]]; then
+            SECTION_ANCHOR=""
+            if [[ -n "$section" ]] && [[ "$section" != "toc" ]] && print_section "$topic" "$doc_path" "$section"; then
+                page_anchor="#$SECTION_ANCHOR"
+                section_anchor="$SECTION_ANCHOR"
             else
-                echo "⚠️  Could not check GitHub for updates - using cached docs (v$VERSION, $BRANCH)"
+                if [[ -n "$section" ]] && [[ "$section" != "toc" ]]; then
+                    echo "Section '$section' not found in $topic. Available sections:"
+                else
+                    echo "Sections in $topic:"
+                fi
                 echo ""
-                cat "$doc_path"
+                print_toc "$topic"
                 echo ""
-                echo "📖 Official page: https://docs.anthropic.com/en/docs/claude-code/$topic"
-                return
+                echo "Try: /docs $topic#<section> to read one section, or /docs $topic for the whole page"
             fi
-        fi
-        
-        local LOCAL=$(git rev-parse HEAD 2>/dev/null)
-        local REMOTE=$(git rev-parse origin/"$COMPARE_BRANCH" 2>/dev/null)
-        local BEHIND=$(git rev-list HEAD..origin/"$COMPARE_BRANCH" --count 2>/dev/null || echo "0")
-        
-        if [[ "$LOCAL" != "$REMOTE" ]] && [[ "$BEHIND" -gt 0 ]]; then
-            # We're behind - safe to update
-            echo "🔄 Updating to latest documentation..."
-            git pull --quiet origin "$COMPARE_BRANCH" 2>&1 | grep -v "Merge made by" || true
-            
-            # Check if installer needs updating
-            local INSTALLER_VERSION=$SCRIPT_VERSION
-            local VERSION_INT=$(echo "$INSTALLER_VERSION" | sed 's/^0\.//')
-            
-            if [[ $VERSION_INT -ge 3 ]]; then
-                ./install.sh >/dev/null 2>&1
-            fi
-            echo "✅ Updated to latest (v$VERSION, $BRANCH)"
         else
-            local AHEAD=$(git rev-list origin/"$COMPARE_BRANCH"..HEAD --count 2>/dev/null || echo "0")
-            if [[ "$AHEAD" -gt 0 ]]; then
-                echo "⚠️  Using local development version (v$VERSION, $BRANCH, +$AHEAD commits)"
-            else
-                echo "✅ You have the latest docs (v$VERSION, $BRANCH)"
-            fi
+            cat "$doc_path"
         fi
         echo ""
-        
-        cat "$doc_path"
-        echo ""
         if [[ "$topic" == "changelog" ]]; then
             echo "📖 Official source: https://github.com/anthropics/claude-code/blob/main/CHANGELOG.md"
         else
-            echo "📖 Official page: https://docs.anthropic.com/en/docs/claude-code/$topic"
+            print_links "$topic" "$section_anchor"
+            echo "📖 Official page: https://docs.anthropic.com/en/docs/claude-code/$topic$page_anchor"
         fi
     else
         # Always show search interface - never error messages
@@ -197,36 +525,82 @@ read_doc() {
         if [[ -n "$keywords" ]]; then
             # Search for matching topics - escape the pattern
             local escaped_keywords=$(echo "$keywords" | sed 's/[[\.*^$()+?{|]/\\&/g')
-            local matches=$(ls "$DOCS_PATH/docs" | grep '\.md$' | sed 's/\.md$//' | grep -i -E "$(echo "$escaped_keywords" | tr ' ' '|')" | sort)
+            local matches=$(list_topics | grep -i -E "$(echo "${escaped_keywords% }" | tr ' ' '|')" || true)
+            # Ranked matches inside the documents themselves
+            local content_matches=$(search_index "$keywords" || true)
             
-            if [[ -n "$matches" ]]; then
-                echo "Found these related topics:"
-                echo "$matches" | sed 's/^/  • /' 
-                echo ""
+            if [[ -n "$matches" ]] || [[ -n "$content_matches" ]]; then
+                if [[ -n "$matches" ]]; then
+                    echo "Found these related topics:"
+                    echo "$matches" | sed 's/^/  • /' 
+                    echo ""
+                    # Pages linked with those, from the link graph
+                    local linked=$(linked_topics "$matches")
+                    if [[ -n "$linked" ]]; then
+                        echo "Linked with these topics:"
+                        echo "$linked" | sed 's/^/  • /'
+                        echo ""
+                    fi
+                fi
+                if [[ -n "$content_matches" ]]; then
+                    echo "Found in documentation content:"
+                    echo "$content_matches"
+                    echo ""
+                fi
                 echo "Try: /docs <topic> to read a specific document"
             else
                 echo "No exact matches found. Here are all available topics:"
-                ls "$DOCS_PATH/docs" | grep '\.md$' | sed 's/\.md$//' | sort | column -c 80
+                list_topics | column -c 80
             fi
         else
             echo "Available topics:"
-            ls "$DOCS_PATH/docs" | grep '\.md$' | sed 's/\.md$//' | sort | column -c 80
+            list_topics | column -c 80
         fi
         echo ""
-        echo "💡 Tip: Use grep to search across all docs: cd ~/.claude-code-docs && grep -r 'search term' docs/"
+        echo "💡 Tip: Search inside all docs with: /docs search <terms>"
     fi
 }
 
+# Function to search across documentation content
+search_docs() {
+    local query=$(sanitize_input "$1")
+    
+    print_doc_header
+    
+    if [[ -z "$query" ]]; then
+        echo "Usage: /docs search <terms>"
+        return 0
+    fi
+    
+    echo "🔍 Searching documentation for: $query"
+    echo ""
+    
+    local results
+    if results=$(search_index "$query"); then
+        echo "$results"
+    else
+        # No index (or no python3) - fall back to a plain grep over the files
+        local matches=$(grep -ril -F -- "$query" "$DOCS_PATH/docs" --include='*.md' 2>/dev/null | sed 's|.*/||' | sed 's/\.md$//' | sort || true)
+        if [[ -n "$matches" ]]; then
+            echo "$matches" | sed 's/^/  • /'
+        else
+            echo "No matches found."
+        fi
+    fi
+    echo ""
+    echo "Try: /docs <topic> or /docs <topic>#<section> to read a specific document"
+}
+
 # Function to list available documentation
 list_docs() {
     print_doc_header
     
-    # Auto-update to ensure fresh list
-    auto_update
+    # Refresh in the background; the list below comes from the local copy
+    maybe_background_refresh
     
     echo "Available documentation topics:"
     echo ""
-    ls "$DOCS_PATH/docs" | grep '\.md$' | sed 's/\.md$//' | sort | column -c 80
+    list_topics | column -c 80
     echo ""
     echo "Usage: /docs <topic> or /docs -t to check freshness"
 }
@@ -246,6 +620,54 @@ whats_new() {
     
     print_doc_header
     
+    # The fetcher writes a digest of recent runs; without it (or jq) fall back to git history
+    if [[ ! -f "$WHATS_NEW" ]] || ! command -v jq >/dev/null 2>&1; then
+        whats_new_from_git
+        set -e
+        return 0
+    fi
+    
+    # Serve the local digest immediately; updates are pulled in the background
+    report_freshness
+    maybe_background_refresh
+    echo ""
+    echo "📚 Recent documentation updates:"
+    echo ""
+    
+    jq -r --argjson now "$(date +%s)" '
+        def age: ($now - (.date | fromdateiso8601)) as $s
+            | if $s < 3600 then "\($s / 60 | floor)m ago"
+              elif $s < 86400 then "\($s / 3600 | floor)h ago"
+              else "\($s / 86400 | floor)d ago" end;
+        def topic: rtrimstr(".md");
+        if (.runs | length) == 0 then "No recent documentation updates found.", ""
+        else .runs[:5][] |
+            "• \(age):",
+            (.added[] | "  ➕ \(.file | topic) (new): \(.url)"),
+            (.removed[] | "  ➖ \(topic) (removed)"),
+            (.updated[] |
+                "  📄 \(.file | topic)"
+                + (if .added_lines != null then " (+\(.added_lines) -\(.removed_lines) lines)" else "" end)
+                + (if .url then ": \(.url)" else "" end),
+                (.headings_added[]? | "      + section: \(.)"),
+                (.headings_removed[]? | "      - section: \(.)"),
+                (.lines[]? | "      \(.)")),
+            ""
+        end
+    ' "$WHATS_NEW" 2>/dev/null || echo "No recent documentation updates found."
+    
+    echo "📎 Full changelog: https://github.com/wgs4/claude-code-docs/commits/main/docs"
+    echo "📚 COMMUNITY MIRROR - NOT AFFILIATED WITH ANTHROPIC"
+    
+    # Re-enable strict error handling
+    set -e
+    
+    # Ensure we always exit successfully
+    return 0
+}
+
+# Function to list recent doc commits from git history (installs without the digest)
+whats_new_from_git() {
     # Auto-update first (synchronous - we need latest git history)
     auto_update || true  # Don't fail if auto-update fails
     
@@ -286,12 +708,6 @@ whats_new() {
     
     echo "📎 Full changelog: https://github.com/wgs4/claude-code-docs/commits/main/docs"
     echo "📚 COMMUNITY MIRROR - NOT AFFILIATED WITH ANTHROPIC"
-    
-    # Re-enable strict error handling
-    set -e
-    
-    # Ensure we always exit successfully
-    return 0
 }
 
 # Function for uninstall
@@ -316,6 +732,18 @@ uninstall() {
     echo ""
 }
 
+# Lookups are answered by docs_query.py when possible; the shell
+# implementation below handles the rest and installs without python3
+case "${1:-}" in
+    hook-check|background-refresh|uninstall|freshness)
+        ;;
+    *)
+        query_status=0
+        run_query "$@" || query_status=$?
+        [[ $query_status -eq $QUERY_FALLBACK ]] || exit $query_status
+        ;;
+esac
+
 # Store original arguments for flag checking
 FULL_ARGS="$*"
 
@@ -362,9 +790,22 @@ case "${1:-}" in
     hook-check)
         hook_check
         ;;
+    freshness)
+        # Sync check only; used by docs_query.py for -t
+        show_freshness
+        ;;
+    background-refresh)
+        # Exit straight away: install.sh may have replaced this file while it ran
+        background_refresh
+        exit 0
+        ;;
     uninstall)
         uninstall
         ;;
+    search)
+        shift
+        search_docs "$*"
+        ;;
     whats-new|whats|what)
         # Handle various forms of "what's new"
         shift
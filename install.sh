@@ -135,7 +135,7 @@ migrate_installation() {
     
     # Fresh install at new location
     echo "Installing fresh at ~/.claude-code-docs..."
-    git clone -b "$INSTALL_BRANCH" https://github.com/ericbuess/claude-code-docs.git "$INSTALL_DIR"
+    clone_install_dir
     cd "$INSTALL_DIR"
     
     # Remove old directory if safe
@@ -153,6 +153,21 @@ migrate_installation() {
     echo "✅ Migration complete!"
 }
 
+# Function to clone only the newest commit of the install branch
+# (the mirror gains a commit every few hours; its history is never needed locally)
+clone_install_dir() {
+    git clone --depth 1 --single-branch -b "$INSTALL_BRANCH" https://github.com/ericbuess/claude-code-docs.git "$INSTALL_DIR"
+    configure_shallow_repo "$INSTALL_DIR"
+}
+
+# Function to let git drop superseded commits straight away, so a shallow
+# install stays the same size however long the mirror has been running
+configure_shallow_repo() {
+    git -C "$1" config gc.reflogExpire now
+    git -C "$1" config gc.reflogExpireUnreachable now
+    git -C "$1" config gc.pruneExpire now
+}
+
 # Function to safely update git repository
 safe_git_update() {
     local repo_dir="$1"
@@ -173,28 +188,25 @@ safe_git_update() {
         echo "  Updating $target_branch branch..."
     fi
     
-    # Set git config for pull strategy if not set
-    if ! git config pull.rebase >/dev/null 2>&1; then
-        git config pull.rebase false
-    fi
-    
     echo "Updating to latest version..."
     
     # Note: Old v0.3.1 upgrade logic removed - new branch switching logic handles all cases
     
-    # Try regular pull first (use target branch)
-    if git pull --quiet origin "$target_branch" 2>/dev/null; then
-        return 0
+    # A shallow install fetches only the newest commit of the target branch;
+    # a full clone (e.g. a developer's checkout) keeps its history
+    local fetch_args=(--quiet)
+    local shallow=false
+    if [[ "$(git rev-parse --is-shallow-repository 2>/dev/null)" == "true" ]]; then
+        shallow=true
+        fetch_args=(--quiet --depth 1)
     fi
-    
-    # If pull failed, try more aggressive approach
-    echo "  Standard update failed, trying harder..."
-    
-    # Fetch latest
-    if ! git fetch origin "$target_branch" 2>/dev/null; then
+    if ! git fetch "${fetch_args[@]}" origin "+refs/heads/$target_branch:refs/remotes/origin/$target_branch" 2>/dev/null; then
         echo "  ⚠️  Could not fetch from GitHub (offline?)"
         return 1
     fi
+    if [[ "$shallow" == "true" ]]; then
+        configure_shallow_repo "$repo_dir"
+    fi
     
     # If we're switching branches, skip the change detection - just force clean
     if [[ "$current_branch" != "$target_branch" ]]; then
@@ -291,6 +303,11 @@ safe_git_update() {
     # Clean any untracked files that might interfere
     git clean -fd >/dev/null 2>&1 || true
     
+    # Drop commits and objects the shallow fetch superseded
+    if [[ "$shallow" == "true" ]]; then
+        git gc --quiet --prune=now >/dev/null 2>&1 || true
+    fi
+    
     echo "  ✓ Updated successfully to clean state"
     
     return 0
@@ -374,7 +391,7 @@ else
         echo "No existing installation found"
         echo "Installing fresh to ~/.claude-code-docs..."
         
-        git clone -b "$INSTALL_BRANCH" https://github.com/ericbuess/claude-code-docs.git "$INSTALL_DIR"
+        clone_install_dir
         cd "$INSTALL_DIR"
     fi
 fi
@@ -418,9 +435,14 @@ Execute the Claude Code Docs helper script at ~/.claude-code-docs/claude-docs-he
 Usage:
 - /docs - List all available documentation topics
 - /docs <topic> - Read specific documentation with link to official docs
+- /docs <topic>#<section> - Read just one section (e.g. /docs hooks#PreToolUse)
+- /docs <topic># - Show a document's table of contents
 - /docs -t - Check sync status without reading a doc
 - /docs -t <topic> - Check freshness then read documentation
 - /docs whats new - Show recent documentation changes (or "what's new")
+- /docs search <terms> - Ranked full-text search across all documentation
+- /docs changelog last <N> - Show the N most recent Claude Code releases
+- /docs changelog since <version> - Show every release newer than <version>
 
 Examples of expected output:
 
@@ -435,17 +457,17 @@ When reading a doc:
 When showing what's new:
 📚 Recent documentation updates:
 
-• 5 hours ago:
-  📎 https://github.com/ericbuess/claude-code-docs/commit/eacd8e1
-  📄 data-usage: https://docs.anthropic.com/en/docs/claude-code/data-usage
-     ➕ Added: Privacy safeguards
-  📄 security: https://docs.anthropic.com/en/docs/claude-code/security
-     ✨ Data flow and dependencies section moved here
+• 5h ago:
+  📄 data-usage (+24 -3 lines): https://docs.anthropic.com/en/docs/claude-code/data-usage
+      + section: Privacy safeguards
+  📄 security (+12 -40 lines): https://docs.anthropic.com/en/docs/claude-code/security
+      - section: Data flow and dependencies
 
 📎 Full changelog: https://github.com/ericbuess/claude-code-docs/commits/main/docs
 📚 COMMUNITY MIRROR - NOT AFFILIATED WITH ANTHROPIC
 
-Every request checks for the latest documentation from GitHub (takes ~0.4s).
+Docs are served instantly from the local copy; updates are checked in the background
+(at most every 15 minutes). Use /docs -t to check GitHub synchronously.
 The helper script handles all functionality including auto-updates.
 
 Execute: ~/.claude-code-docs/claude-docs-helper.sh "$ARGUMENTS"
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for docs.anthropic.com used by the fetcher benchmarks.
+
+Serves a synthetic sitemap with a configurable number of Claude Code pages,
+markdown bodies of a configurable size, and the changelog. Latency, server
+errors and 429 responses can be injected, and ETag / If-None-Match is
+supported so warm runs see 304s. Pages can be marked as changed between
+runs, which bumps their content and sitemap <lastmod>.
+
+Usage:
+    python scripts/benchmark/mock_docs_server.py --pages 200 --latency-ms 40
+"""
+
+import argparse
+import gzip
+import hashlib
+import http.server
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+PAGE_PREFIX = "/en/docs/claude-code/"
+BASE_LASTMOD = "2025-01-01T00:00:00+00:00"
+
+
+class MockConfig:
+    """Server behaviour; all fields can be changed while the server runs."""
+
+    def __init__(self, pages: int = 100, page_size: int = 8192, latency_ms: float = 0.0,
+                 error_rate: float = 0.0, throttle_rate: float = 0.0, retry_after: int = 1,
+                 seed: int = 0, compress: bool = True):
+        self.pages = pages
+        self.page_size = page_size
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.seed = seed
+        self.compress = compress
+
+
+class MockDocsState:
+    """Page versions and request counters shared by the handler threads."""
+
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self.versions: Dict[int, int] = {}
+        self.lastmods: Dict[int, str] = {}
+        self.random = random.Random(config.seed)
+        self.lock = threading.Lock()
+        self.reset_counters()
+
+    def reset_counters(self) -> None:
+        with self.lock:
+            self.counters = {"requests": 0, "bytes": 0, "200": 0, "304": 0, "404": 0, "429": 0, "500": 0}
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return dict(self.counters)
+
+    def count(self, status: int, size: int) -> None:
+        with self.lock:
+            self.counters["requests"] += 1
+            self.counters["bytes"] += size
+            key = str(status)
+            self.counters[key] = self.counters.get(key, 0) + 1
+
+    def roll(self, rate: float) -> bool:
+        with self.lock:
+            return rate > 0 and self.random.random() < rate
+
+    def change_pages(self, fraction: float) -> int:
+        """Modify a deterministic subset of pages. Returns how many changed."""
+        count = max(1, round(self.config.pages * fraction)) if fraction > 0 else 0
+        now = datetime.now(timezone.utc).isoformat(timespec='milliseconds')
+        with self.lock:
+            for page in self.random.sample(range(self.config.pages), count):
+                self.versions[page] = self.versions.get(page, 0) + 1
+                self.lastmods[page] = now
+        return count
+
+    def page_body(self, page: int) -> bytes:
+        version = self.versions.get(page, 0)
+        header = (
+            f"# Benchmark page {page}\n\n"
+            f"> Synthetic Claude Code documentation page {page}, revision {version}.\n\n"
+            "## Usage\n\n- Install the package\n- Run the example\n\n"
+            f"See [settings]({PAGE_PREFIX}page-0#usage) for configuration.\n\n"
+            "```bash\nclaude --help\n```\n\n"
+        )
+        filler = "Configuration example text for the benchmark page. "
+        body = header + filler * max(0, (self.config.page_size - len(header)) // len(filler)) + "\n"
+        return body.encode('utf-8')
+
+    def changelog(self) -> bytes:
+        entries = "".join(f"## 1.0.{n}\n\n- Fix issue {n}\n- Add feature {n}\n\n" for n in range(80, 0, -1))
+        return ("# Changelog\n\n" + entries).encode('utf-8')
+
+    def sitemap(self, base_url: str) -> bytes:
+        urls = []
+        for page in range(self.config.pages):
+            lastmod = self.lastmods.get(page, BASE_LASTMOD)
+            urls.append(f"<url><loc>{base_url}{PAGE_PREFIX}page-{page}</loc><lastmod>{lastmod}</lastmod></url>")
+        # A few pages the fetcher must filter out
+        urls.append(f"<url><loc>{base_url}/en/docs/other/overview</loc></url>")
+        urls.append(f"<url><loc>{base_url}/de/docs/claude-code/overview</loc></url>")
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">' + "".join(urls) + "</urlset>"
+        ).encode('utf-8')
+
+
+class MockDocsHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state: MockDocsState = None  # set by make_server()
+
+    def log_message(self, format, *args):
+        pass
+
+    def respond(self, status: int, body: bytes = b"", headers: Optional[dict] = None) -> None:
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+        self.state.count(status, len(body))
+
+    def do_GET(self):
+        config = self.state.config
+        if config.latency_ms:
+            time.sleep(config.latency_ms / 1000)
+
+        path = self.path.split("?", 1)[0]
+        host = self.headers.get("Host", f"127.0.0.1:{self.server.server_port}")
+        if path == "/sitemap.xml":
+            return self.respond(200, self.state.sitemap(f"http://{host}"), {"Content-Type": "application/xml"})
+
+        if path == "/CHANGELOG.md":
+            body = self.state.changelog()
+        elif path.startswith(PAGE_PREFIX + "page-") and path.endswith(".md"):
+            try:
+                page = int(path[len(PAGE_PREFIX + "page-"):-3])
+            except ValueError:
+                return self.respond(404)
+            if not 0 <= page < config.pages:
+                return self.respond(404)
+            if self.state.roll(config.throttle_rate):
+                return self.respond(429, b"Too Many Requests", {"Retry-After": str(config.retry_after)})
+            if self.state.roll(config.error_rate):
+                return self.respond(500, b"Internal Server Error")
+            body = self.state.page_body(page)
+        else:
+            return self.respond(404)
+
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            return self.respond(304, b"", {"ETag": etag})
+        headers = {"Content-Type": "text/markdown; charset=utf-8", "ETag": etag}
+        if config.compress and "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body, compresslevel=6)
+            headers["Content-Encoding"] = "gzip"
+            headers["Vary"] = "Accept-Encoding"
+        self.respond(200, body, headers)
+
+    do_HEAD = do_GET
+
+
+def make_server(config: MockConfig, port: int = 0) -> http.server.ThreadingHTTPServer:
+    """Create (but do not start) a server bound to 127.0.0.1; port 0 picks a free port."""
+    handler = type("BoundMockDocsHandler", (MockDocsHandler,), {"state": MockDocsState(config)})
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_in_thread(config: MockConfig, port: int = 0) -> http.server.ThreadingHTTPServer:
+    """Start a server on a daemon thread and return it (server.RequestHandlerClass.state holds the state)."""
+    server = make_server(config, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a synthetic Claude Code docs site for benchmarks")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pages", type=int, default=100, help="Number of documentation pages")
+    parser.add_argument("--page-size", type=int, default=8192, help="Approximate markdown body size in bytes")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay added to every response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of page requests answered with 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of page requests answered with 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429 responses")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-compress", action="store_true", help="Never gzip response bodies")
+    args = parser.parse_args()
+
+    config = MockConfig(args.pages, args.page_size, args.latency_ms, args.error_rate,
+                        args.throttle_rate, args.retry_after, args.seed, not args.no_compress)
+    server = make_server(config, args.port)
+    print(f"Serving {args.pages} pages at http://127.0.0.1:{server.server_port}/sitemap.xml")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for scripts/docs_query.py, the /docs lookup path.
+
+A throwaway install (documents, indexes and a what's new
+digest) is built in a temporary directory, then every scenario is run as a
+fresh process, the way the helper runs it. Budgets apply to the median time
+on top of a bare `python3 -S -c pass`, so they hold on slow and fast machines
+alike: --budget-ms for lookups, --search-budget-ms for the scenarios that
+load the search index. The script exits with status 1 when one is exceeded.
+With --compare-helper the helper's shell-only path (the same install without
+docs_query.py) is timed too, for reference.
+
+Usage:
+    python scripts/benchmark/query_startup.py --runs 30 --compare-helper
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+SCRIPTS = Path(__file__).resolve().parent.parent
+REPO = SCRIPTS.parent
+BUDGET_MS = 30.0          # lookup cost above interpreter startup
+SEARCH_BUDGET_MS = 100.0  # ... for scenarios that load the search index
+
+# name: (arguments, loads the search index)
+SCENARIOS = {
+    "list": ([], False),
+    "topic": (["hooks"], False),
+    "section": (["hooks#pretooluse"], False),
+    "toc": (["hooks#"], False),
+    "changelog": (["changelog last 3"], False),
+    "what's new": (["what's new"], False),
+    "search": (["tell me about permission rules"], True),
+    "not found": (["nonexistent topic"], True),
+}
+
+
+def build_install(home: Path, docs_dir: Path, with_query: bool) -> Path:
+    """Copy the helper, scripts and documents into home/.claude-code-docs and build the indexes."""
+    install = home / ".claude-code-docs"
+    shutil.copytree(SCRIPTS, install / "scripts", ignore=shutil.ignore_patterns("__pycache__", "benchmark"))
+    if not with_query:
+        (install / "scripts" / "docs_query.py").unlink()
+    shutil.copy(SCRIPTS / "claude-docs-helper.sh.template", install / "claude-docs-helper.sh")
+    docs = install / "docs"
+    docs.mkdir()
+    for path in docs_dir.iterdir():
+        if path.suffix == ".md" or path.name == "docs_manifest.json":
+            shutil.copy(path, docs / path.name)
+
+    for tool in ("docs_index.py", "docs_links.py"):
+        subprocess.run([sys.executable, str(install / "scripts" / tool), "--docs-dir", str(docs), "build"],
+                       check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    # A digest as written after a run that added one page and changed another
+    sys.path.insert(0, str(SCRIPTS))
+    from docs_history import update_whats_new
+    files = json.loads((docs / "docs_manifest.json").read_text())["files"]
+    names = sorted(files)
+    previous = {name: entry for name, entry in files.items() if name != names[0]}
+    previous[names[-1]] = dict(files[names[-1]], hash="")
+    update_whats_new(docs, previous, files)
+    return install
+
+
+def time_command(command: List[str], env: Dict[str, str], runs: int) -> dict:
+    """Median and worst wall time of a command over several runs, plus its exit status."""
+    samples = []
+    status = 0
+    for _ in range(runs):
+        started = time.perf_counter()
+        status = subprocess.run(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).returncode
+        samples.append((time.perf_counter() - started) * 1000)
+    return {"median_ms": round(statistics.median(samples), 1), "max_ms": round(max(samples), 1), "exit": status}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the startup time of docs_query.py")
+    parser.add_argument("--docs-dir", type=Path, default=REPO / "docs", help="Documents to install (default: docs/)")
+    parser.add_argument("--runs", type=int, default=20, help="Runs per scenario")
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS,
+                        help=f"Median ms above interpreter startup allowed for a lookup (default: {BUDGET_MS:g})")
+    parser.add_argument("--search-budget-ms", type=float, default=SEARCH_BUDGET_MS,
+                        help=f"... for a lookup that searches the index (default: {SEARCH_BUDGET_MS:g})")
+    parser.add_argument("--compare-helper", action="store_true", help="Also time the helper's shell-only path")
+    parser.add_argument("--json", type=Path, help="Also write the results to this file")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="docs-query-bench-"))
+    try:
+        query_install = build_install(workdir / "query", args.docs_dir, with_query=True)
+        shell_install = build_install(workdir / "shell", args.docs_dir, with_query=False) if args.compare_helper else None
+
+        baseline = time_command(["python3", "-S", "-c", "pass"], dict(os.environ), args.runs)["median_ms"]
+        results = []
+        for name, (argv, searches) in SCENARIOS.items():
+            # The installs have no .git, so no background refresh is started
+            env = dict(os.environ, HOME=str(workdir / "query"))
+            result = {"scenario": name, "budget_ms": args.search_budget_ms if searches else args.budget_ms,
+                      "query": time_command(
+                ["python3", "-S", str(query_install / "scripts" / "docs_query.py"), *argv], env, args.runs)}
+            if shell_install:
+                env = dict(os.environ, HOME=str(workdir / "shell"))
+                result["shell"] = time_command(["bash", str(shell_install / "claude-docs-helper.sh"), *argv], env, args.runs)
+            results.append(result)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"Interpreter startup (python3 -S): {baseline:.1f} ms")
+    header = f"{'scenario':>12}  {'median ms':>9}  {'max ms':>7}  {'overhead':>8}  {'budget':>6}  exit"
+    if args.compare_helper:
+        header += f"  {'shell median ms':>15}  exit"
+    print(header)
+    over_budget = []
+    for result in results:
+        query = result["query"]
+        overhead = query["median_ms"] - baseline
+        line = (f"{result['scenario']:>12}  {query['median_ms']:>9.1f}  {query['max_ms']:>7.1f}  "
+                f"{overhead:>8.1f}  {result['budget_ms']:>6g}  {query['exit']:>4}")
+        if "shell" in result:
+            line += f"  {result['shell']['median_ms']:>15.1f}  {result['shell']['exit']:>4}"
+        print(line)
+        if overhead > result["budget_ms"] or query["exit"] != 0:
+            over_budget.append(result["scenario"])
+
+    if args.json:
+        args.json.write_text(json.dumps({"baseline_ms": baseline, "results": results}, indent=2) + "\n")
+    if over_budget:
+        print(f"Over budget (or failed): {', '.join(over_budget)}")
+        sys.exit(1)
+    print("All scenarios within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of scripts/fetch_claude_docs.py against the local mock server.
+
+For each concurrency level the fetcher is run three times in a fresh output
+directory:
+    cold     - empty docs directory, every page is downloaded
+    warm     - nothing changed on the server since the cold run
+    partial  - a fraction of the pages changed since the warm run
+
+Each run is a separate process so wall time, CPU time and peak RSS are those
+of a real invocation. Request and byte counts (as sent on the wire) come from the mock server.
+
+Usage:
+    python scripts/benchmark/run_benchmark.py --pages 200 --latency-ms 40 --concurrency 1,4,8
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from mock_docs_server import MockConfig, start_in_thread
+
+FETCHER = Path(__file__).resolve().parent.parent / "fetch_claude_docs.py"
+SCENARIOS = ("cold", "warm", "partial")
+
+
+def run_fetcher(args: List[str], log_path: Path) -> dict:
+    """Run the fetcher once and return wall time, CPU time, peak RSS and exit status."""
+    started = time.perf_counter()
+    with open(log_path, 'ab') as log:
+        process = subprocess.Popen([sys.executable, str(FETCHER), *args], stdout=log, stderr=subprocess.STDOUT)
+        _, status, usage = os.wait4(process.pid, 0)
+    wall = time.perf_counter() - started
+    process.returncode = os.waitstatus_to_exitcode(status)
+
+    # ru_maxrss is reported in KiB on Linux and in bytes on macOS
+    peak_rss_kib = usage.ru_maxrss / 1024 if sys.platform == "darwin" else usage.ru_maxrss
+    return {
+        "wall_s": round(wall, 3),
+        "user_cpu_s": round(usage.ru_utime, 3),
+        "system_cpu_s": round(usage.ru_stime, 3),
+        "peak_rss_mib": round(peak_rss_kib / 1024, 1),
+        "exit_code": process.returncode,
+    }
+
+
+def benchmark_concurrency(server, concurrency: int, args: argparse.Namespace, workdir: Path) -> List[dict]:
+    """Run the cold / warm / partial sequence for one concurrency level."""
+    state = server.RequestHandlerClass.state
+    base = f"http://127.0.0.1:{server.server_port}"
+    docs_dir = workdir / f"docs-c{concurrency}"
+    fetch_args = [
+        "--docs-dir", str(docs_dir),
+        "--sitemap-url", f"{base}/sitemap.xml",
+        "--changelog-url", f"{base}/CHANGELOG.md",
+        "--concurrency", str(concurrency),
+        "--rate-limit", str(args.rate_limit),
+    ]
+    if args.ignore_lastmod:
+        fetch_args.append("--ignore-lastmod")
+
+    results = []
+    for scenario in SCENARIOS:
+        changed = state.change_pages(args.change_fraction) if scenario == "partial" else 0
+        state.reset_counters()
+        metrics_file = workdir / f"metrics-c{concurrency}-{scenario}.jsonl"
+        result = run_fetcher(fetch_args + ["--metrics-file", str(metrics_file)], workdir / "fetcher.log")
+        served = state.snapshot()
+        results.append({
+            "scenario": scenario,
+            "concurrency": concurrency,
+            "pages_changed": changed,
+            **result,
+            "requests": served["requests"],
+            "bytes": served["bytes"],
+            "not_modified": served["304"],
+            "throttled": served["429"],
+            "errors": served["500"],
+        })
+    return results
+
+
+def print_table(results: List[dict]) -> None:
+    columns = [
+        ("scenario", "scenario", "{}"), ("conc", "concurrency", "{}"), ("wall s", "wall_s", "{:.2f}"),
+        ("user s", "user_cpu_s", "{:.2f}"), ("sys s", "system_cpu_s", "{:.2f}"),
+        ("rss MiB", "peak_rss_mib", "{:.1f}"), ("requests", "requests", "{}"), ("KiB", "bytes", "{}"),
+        ("304", "not_modified", "{}"), ("429", "throttled", "{}"), ("500", "errors", "{}"), ("exit", "exit_code", "{}"),
+    ]
+    rows = []
+    for result in results:
+        values = dict(result, bytes=result["bytes"] // 1024)
+        rows.append([fmt.format(values[key]) for _, key, fmt in columns])
+    widths = [max(len(title), *(len(row[i]) for row in rows)) for i, (title, _, _) in enumerate(columns)]
+    print("  ".join(title.rjust(width) for (title, _, _), width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(value.rjust(width) for value, width in zip(row, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the documentation fetcher against a local mock server")
+    parser.add_argument("--pages", type=int, default=100, help="Number of documentation pages")
+    parser.add_argument("--page-size", type=int, default=8192, help="Approximate markdown body size in bytes")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Delay added to every response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of page requests answered with 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of page requests answered with 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429 responses")
+    parser.add_argument("--change-fraction", type=float, default=0.1, help="Fraction of pages changed before the partial run")
+    parser.add_argument("--concurrency", default="1,4", help="Comma-separated concurrency levels to compare")
+    parser.add_argument("--rate-limit", type=float, default=0, help="Fetcher --rate-limit (default: 0, disabled)")
+    parser.add_argument("--ignore-lastmod", action="store_true",
+                        help="Pass --ignore-lastmod so warm runs exercise conditional requests instead of the sitemap shortcut")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-compress", action="store_true", help="Serve uncompressed bodies")
+    parser.add_argument("--json", type=Path, help="Also write the results to this file")
+    parser.add_argument("--keep", action="store_true", help="Keep the working directory (docs, logs, metrics)")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+    config = MockConfig(args.pages, args.page_size, args.latency_ms, args.error_rate,
+                        args.throttle_rate, args.retry_after, args.seed, not args.no_compress)
+    server = start_in_thread(config)
+    workdir = Path(tempfile.mkdtemp(prefix="claude-docs-bench-"))
+    print(f"Mock server on port {server.server_port}: {args.pages} pages of ~{args.page_size} bytes, "
+          f"{args.latency_ms:g} ms latency")
+
+    try:
+        results = []
+        for concurrency in levels:
+            results.extend(benchmark_concurrency(server, concurrency, args, workdir))
+    finally:
+        server.shutdown()
+
+    print_table(results)
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2) + "\n")
+    if args.keep:
+        print(f"Working directory kept at {workdir}")
+    else:
+        shutil.rmtree(workdir, ignore_errors=True)
+    if any(result["exit_code"] for result in results):
+        print(f"Some fetcher runs failed; rerun with --keep and see {workdir / 'fetcher.log'}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""
+Version history for the local Claude Code documentation mirror.
+
+The fetcher calls update_history() after each run. Two things are kept:
+
+- docs/.history/objects/, a content-addressed store of gzipped document
+  versions keyed by the SHA-256 already recorded in the manifest. Only the
+  most recent versions of each document keep their blob.
+- docs/docs_history.json, a version log per document (newest last). Each
+  entry carries the line-level delta from the previous version, so recent
+  changes can be shown without git history or the old blobs.
+
+Both are local state of the machine running the fetcher (the CI workflow
+caches them between runs), not part of the published tree: committing them
+would store every changed page a second time next to git's own history.
+
+update_whats_new() then adds the run to docs/whats_new.json, a small digest
+of recent runs (added, removed and updated pages with changed headings and a
+few changed lines) that the helper's "what's new" reads with a single jq call.
+It is the only history file that is committed.
+
+Query it with:
+    python3 scripts/docs_history.py log hooks
+    python3 scripts/docs_history.py changes hooks --since 7d
+
+Where the local log does not reach (installs, which never build it, or a CI
+cache that was evicted and started over), both commands read the document's
+commits with git instead. Installs are shallow clones, so that only goes back
+as far as the clone does.
+"""
+
+import argparse
+import difflib
+import gzip
+import json
+import logging
+import re
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from docs_io import atomic_write
+
+logger = logging.getLogger(__name__)
+
+HISTORY_FILE = "docs_history.json"
+HISTORY_VERSION = 1
+OBJECTS_DIR = Path(".history") / "objects"
+
+# Documents with their own version index are not tracked here
+HISTORY_EXCLUDE = frozenset({"changelog.md"})
+
+HISTORY_MAX_VERSIONS = 30  # log entries kept per document
+HISTORY_BLOB_VERSIONS = 5  # most recent versions per document whose full text is kept
+
+WHATS_NEW_FILE = "whats_new.json"
+WHATS_NEW_VERSION = 1
+WHATS_NEW_MAX_RUNS = 20    # runs kept in the digest
+WHATS_NEW_MAX_LINES = 3    # changed lines quoted per page
+WHATS_NEW_LINE_CHARS = 120
+
+HEADING_LINE_RE = re.compile(r"^#{1,6}\s+(.+?)\s*#*\s*$")
+
+SINCE_RE = re.compile(r"^(\d+)([hdw])$")
+SINCE_UNITS = {"h": "hours", "d": "days", "w": "weeks"}
+
+
+def object_path(docs_dir: Path, content_hash: str) -> Path:
+    return docs_dir / OBJECTS_DIR / content_hash[:2] / f"{content_hash[2:]}.gz"
+
+
+def store_blob(docs_dir: Path, content_hash: str, content: bytes) -> None:
+    """Add a document version to the object store (no-op if already present)."""
+    path = object_path(docs_dir, content_hash)
+    if path.exists():
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # mtime=0 keeps the compressed bytes deterministic
+    atomic_write(path, gzip.compress(content, compresslevel=9, mtime=0))
+
+
+def load_blob(docs_dir: Path, content_hash: str) -> Optional[bytes]:
+    """Return a stored document version, or None if it was pruned or never stored."""
+    try:
+        return gzip.decompress(object_path(docs_dir, content_hash).read_bytes())
+    except (OSError, EOFError):
+        return None
+
+
+def compute_delta(old: bytes, new: bytes) -> List[list]:
+    """
+    Line-level delta between two versions as [old_start, old_end, new_start,
+    new_end, removed_lines, added_lines] hunks (0-based, end exclusive).
+    """
+    old_lines = old.decode('utf-8', errors='replace').splitlines()
+    new_lines = new.decode('utf-8', errors='replace').splitlines()
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    return [
+        [i1, i2, j1, j2, old_lines[i1:i2], new_lines[j1:j2]]
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != 'equal'
+    ]
+
+
+def load_history(docs_dir: Path) -> dict:
+    """Load the version log, or an empty one if it is missing or from another version."""
+    history_path = docs_dir / HISTORY_FILE
+    if history_path.exists():
+        try:
+            history = json.loads(history_path.read_text(encoding='utf-8'))
+            if history.get("version") == HISTORY_VERSION:
+                return history
+        except Exception as e:
+            logger.warning(f"Failed to load history: {e}")
+    return {"version": HISTORY_VERSION, "files": {}}
+
+
+def update_history(docs_dir: Path, files: Dict[str, dict]) -> dict:
+    """
+    Append a version to the log of every document whose manifest hash differs
+    from its latest recorded version, store the new blobs, then prune.
+    """
+    history = load_history(docs_dir)
+    logs: Dict[str, List[dict]] = history["files"]
+    changed = 0
+
+    for filename, entry in sorted(files.items()):
+        if not filename.endswith('.md') or filename in HISTORY_EXCLUDE:
+            continue
+        content_hash = entry.get("hash")
+        log = logs.setdefault(filename, [])
+        if not content_hash or (log and log[-1]["hash"] == content_hash):
+            continue
+        file_path = docs_dir / filename
+        if not file_path.exists():
+            continue
+
+        content = file_path.read_bytes()
+        version = {
+            "hash": content_hash,
+            "date": entry.get("last_updated") or datetime.now().isoformat(),
+            "lines": content.count(b"\n"),
+        }
+        previous = load_blob(docs_dir, log[-1]["hash"]) if log and log[-1]["hash"] else None
+        if previous is not None:
+            delta = compute_delta(previous, content)
+            version["added"] = sum(len(hunk[5]) for hunk in delta)
+            version["removed"] = sum(len(hunk[4]) for hunk in delta)
+            version["delta"] = delta
+        store_blob(docs_dir, content_hash, content)
+        log.append(version)
+        changed += 1
+
+    # Documents that left the manifest get a closing entry
+    for filename, log in logs.items():
+        if filename not in files and log and log[-1]["hash"] is not None:
+            log.append({"hash": None, "date": datetime.now().isoformat(), "deleted": True})
+            changed += 1
+
+    if not changed:
+        logger.info("Document history unchanged")
+        return history
+
+    for filename in list(logs):
+        del logs[filename][:-HISTORY_MAX_VERSIONS]
+        if not logs[filename]:
+            del logs[filename]
+    prune_objects(docs_dir, logs)
+
+    # One line per document keeps the file easy to inspect and diff
+    lines = [f"    {json.dumps(name)}: {json.dumps(logs[name], separators=(',', ':'))}" for name in sorted(logs)]
+    atomic_write(
+        docs_dir / HISTORY_FILE,
+        '{\n  "files": {\n' + ",\n".join(lines) + f'\n  }},\n  "version": {HISTORY_VERSION}\n}}\n'
+    )
+    logger.info(f"Document history updated: {changed} new versions")
+    return history
+
+
+def prune_objects(docs_dir: Path, logs: Dict[str, List[dict]]) -> None:
+    """Delete blobs that are not among the most recent versions of any document."""
+    keep = {
+        version["hash"]
+        for log in logs.values()
+        for version in log[-HISTORY_BLOB_VERSIONS:]
+        if version.get("hash")
+    }
+    objects_dir = docs_dir / OBJECTS_DIR
+    if not objects_dir.exists():
+        return
+    for path in objects_dir.glob("*/*.gz"):
+        if path.parent.name + path.name[:-3] not in keep:
+            path.unlink()
+    for directory in objects_dir.iterdir():
+        if directory.is_dir() and not any(directory.iterdir()):
+            directory.rmdir()
+
+
+def summarize_delta(delta: List[list]) -> dict:
+    """Headings added or removed by a delta, plus a few changed lines."""
+    headings_added, headings_removed, lines = [], [], []
+    for _, _, _, _, removed, added in delta:
+        for prefix, changed, headings in (("-", removed, headings_removed), ("+", added, headings_added)):
+            for line in changed:
+                heading = HEADING_LINE_RE.match(line)
+                if heading:
+                    headings.append(heading.group(1))
+                elif line.strip() and len(lines) < WHATS_NEW_MAX_LINES:
+                    text = " ".join(line.split())
+                    if len(text) > WHATS_NEW_LINE_CHARS:
+                        text = text[:WHATS_NEW_LINE_CHARS - 1] + "…"
+                    lines.append(prefix + text)
+    # A heading that was only reworded shows up on both sides
+    return {
+        "headings_added": [h for h in headings_added if h not in headings_removed],
+        "headings_removed": [h for h in headings_removed if h not in headings_added],
+        "lines": lines,
+    }
+
+
+def update_whats_new(docs_dir: Path, previous_files: Dict[str, dict], files: Dict[str, dict],
+                     history: Optional[dict] = None) -> Optional[dict]:
+    """
+    Prepend this run's changes (between two manifests' file entries) to
+    docs/whats_new.json. Nothing is written when no document changed.
+    """
+    added = sorted(name for name in files if name not in previous_files)
+    removed = sorted(name for name in previous_files if name not in files)
+    updated_names = sorted(
+        name for name in files
+        if name in previous_files and files[name].get("hash") != previous_files[name].get("hash")
+    )
+    if not (added or removed or updated_names):
+        return None
+
+    history = history or load_history(docs_dir)
+    updated = []
+    for name in updated_names:
+        change = {"file": name}
+        if files[name].get("original_url"):
+            change["url"] = files[name]["original_url"]
+        # The delta recorded by update_history() for exactly this hash
+        versions = history["files"].get(name, [])
+        version = versions[-1] if versions else {}
+        if version.get("hash") == files[name].get("hash") and "delta" in version:
+            change["added_lines"] = version["added"]
+            change["removed_lines"] = version["removed"]
+            change.update(summarize_delta(version["delta"]))
+        updated.append(change)
+
+    run = {
+        "date": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "added": [{"file": name, "url": files[name].get("original_url", "")} for name in added],
+        "removed": removed,
+        "updated": updated,
+    }
+
+    digest_path = docs_dir / WHATS_NEW_FILE
+    runs = []
+    if digest_path.exists():
+        try:
+            previous = json.loads(digest_path.read_text(encoding='utf-8'))
+            if previous.get("version") == WHATS_NEW_VERSION:
+                runs = previous.get("runs", [])
+        except Exception as e:
+            logger.warning(f"Failed to load what's new digest: {e}")
+    runs = [run] + runs[:WHATS_NEW_MAX_RUNS - 1]
+
+    # Newest first, one line per run
+    lines = [f"    {json.dumps(entry, ensure_ascii=False, separators=(',', ':'))}" for entry in runs]
+    atomic_write(
+        digest_path,
+        '{\n  "runs": [\n' + ",\n".join(lines) + f'\n  ],\n  "version": {WHATS_NEW_VERSION}\n}}\n'
+    )
+    logger.info(f"What's new digest updated: {len(added)} added, {len(removed)} removed, {len(updated)} updated")
+    return {"version": WHATS_NEW_VERSION, "runs": runs}
+
+
+def parse_since(value: str) -> datetime:
+    """Parse '7d', '12h', '2w' or an ISO date into a naive local datetime."""
+    match = SINCE_RE.match(value.strip())
+    if match:
+        return datetime.now() - timedelta(**{SINCE_UNITS[match.group(2)]: int(match.group(1))})
+    parsed = datetime.fromisoformat(value.strip())
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+def versions_since(history: dict, filename: str, since: Optional[datetime] = None) -> List[dict]:
+    """Versions of a document recorded after since (all versions if None)."""
+    versions = history["files"].get(filename, [])
+    if since is None:
+        return list(versions)
+    return [version for version in versions if datetime.fromisoformat(version["date"]) > since]
+
+
+def format_delta(delta: List[list]) -> List[str]:
+    """Render a stored delta as unified-diff style hunks."""
+    lines = []
+    for i1, i2, j1, j2, removed, added in delta:
+        lines.append(f"@@ -{i1 + 1},{i2 - i1} +{j1 + 1},{j2 - j1} @@")
+        lines.extend(f"-{line}" for line in removed)
+        lines.extend(f"+{line}" for line in added)
+    return lines
+
+
+def run_git(docs_dir: Path, *args: str) -> Optional[str]:
+    """Output of a git command run in docs_dir, or None when git or the clone is unavailable."""
+    try:
+        result = subprocess.run(["git", "-C", str(docs_dir), *args], capture_output=True, text=True,
+                                encoding='utf-8', errors='replace')
+    except OSError:
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+
+def git_versions(docs_dir: Path, filename: str, since: Optional[datetime] = None) -> Optional[List[dict]]:
+    """
+    Versions of a document from the commits that changed it, oldest first, in
+    the shape of the local log: "added" and "removed" line counts, and the
+    diff hunks as "patch" lines instead of a stored delta. None when docs_dir
+    is not in a git clone.
+    """
+    args = ["log", "--no-renames", "--numstat", "-p", "--format=%x00%H %cI"]
+    if since is not None:
+        args.append(f"--since={since.isoformat()}")
+    output = run_git(docs_dir, *args, "--", filename)
+    if output is None:
+        return None
+    versions = []
+    for record in output.split("\0")[1:]:
+        lines = record.splitlines()
+        commit, date = lines[0].split(" ", 1)
+        version = {
+            "hash": commit,
+            "date": datetime.fromisoformat(date).astimezone().replace(tzinfo=None).isoformat(),
+            "added": 0,
+            "removed": 0,
+            "patch": [],
+        }
+        in_hunks = False
+        for line in lines[1:]:
+            if in_hunks or line.startswith("@@"):
+                in_hunks = True
+                version["patch"].append(line)
+            elif line.count("\t") == 2 and not line.startswith(("diff ", "-", "+")):
+                added, removed, _ = line.split("\t")
+                if added.isdigit() and removed.isdigit():
+                    version["added"], version["removed"] = int(added), int(removed)
+        versions.append(version)
+    return versions[::-1]
+
+
+def git_tracked(docs_dir: Path, filename: str) -> bool:
+    return run_git(docs_dir, "ls-files", "--error-unmatch", "--", filename) is not None
+
+
+def shallow_clone_note(docs_dir: Path, since: Optional[datetime] = None) -> Optional[str]:
+    """What to run for more history when docs_dir is in a shallow clone, else None."""
+    if (run_git(docs_dir, "rev-parse", "--is-shallow-repository") or "").strip() != "true":
+        return None
+    deepen = f"--shallow-since={since:%Y-%m-%d}" if since is not None else "--unshallow"
+    return (f"Only the commits in this shallow clone are shown; "
+            f"`git -C {docs_dir} fetch {deepen}` fetches more")
+
+
+def topic_filename(topic: str) -> str:
+    return topic if topic.endswith('.md') else f"{topic}.md"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Query or rebuild the documentation version history")
+    parser.add_argument("--docs-dir", type=Path, default=Path(__file__).parent.parent / 'docs')
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("build", help="Record versions for documents whose hash changed")
+    log_parser = subparsers.add_parser("log", help="List recorded versions of a document")
+    log_parser.add_argument("topic")
+    changes_parser = subparsers.add_parser("changes", help="Show line changes of a document")
+    changes_parser.add_argument("topic")
+    changes_parser.add_argument("--since", default="7d", help="'7d', '12h', '2w' or an ISO date (default: 7d)")
+    show_parser = subparsers.add_parser("show", help="Print a stored version by hash")
+    show_parser.add_argument("hash")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+        manifest = json.loads((args.docs_dir / "docs_manifest.json").read_text())
+        update_history(args.docs_dir, manifest.get("files", {}))
+        return 0
+
+    if args.command == "show":
+        content = load_blob(args.docs_dir, args.hash)
+        if content is None:
+            print(f"Version {args.hash[:12]} is not in the object store", file=sys.stderr)
+            return 1
+        sys.stdout.buffer.write(content)
+        return 0
+
+    since = None
+    if args.command == "changes":
+        try:
+            since = parse_since(args.since)
+        except ValueError:
+            print(f"Invalid --since value: {args.since}", file=sys.stderr)
+            return 2
+
+    # The local log when it covers the period asked about, otherwise git
+    history = load_history(args.docs_dir)
+    filename = topic_filename(args.topic)
+    recorded = history["files"].get(filename, [])
+    if recorded and (since is None or datetime.fromisoformat(recorded[0]["date"]) <= since):
+        versions = versions_since(history, filename, since)
+    else:
+        versions = git_versions(args.docs_dir, filename, since)
+        if versions is None:
+            versions = versions_since(history, filename, since)
+        else:
+            note = shallow_clone_note(args.docs_dir, since)
+            if note:
+                print(note, file=sys.stderr)
+    if not versions and (args.command == "log" or not recorded and not git_tracked(args.docs_dir, filename)):
+        print(f"No history recorded for {filename}", file=sys.stderr)
+        return 1
+
+    if args.command == "log":
+        for i, version in reversed(list(enumerate(versions))):
+            date = version["date"][:16].replace("T", " ")
+            if version.get("deleted"):
+                print(f"{date}  removed")
+            elif "added" in version:
+                print(f"{date}  {version['hash'][:12]}  +{version['added']} -{version['removed']}")
+            else:
+                note = "first recorded" if i == 0 else "previous version unavailable"
+                print(f"{date}  {version['hash'][:12]}  {version['lines']} lines, {note}")
+        return 0
+
+    changes = [version for version in versions
+               if version.get("delta") or version.get("patch") or version.get("deleted")]
+    if not changes:
+        print(f"No changes to {filename} since {since:%Y-%m-%d %H:%M}")
+        return 0
+    for version in changes:
+        date = version["date"][:16].replace("T", " ")
+        if version.get("deleted"):
+            print(f"=== {date}: {filename} removed")
+            continue
+        print(f"=== {date} ({version['hash'][:12]}): +{version['added']} -{version['removed']}")
+        print("\n".join(format_delta(version["delta"]) if "delta" in version else version["patch"]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+Search and section indexes for the local Claude Code documentation mirror.
+
+The fetcher calls these after each run. Only documents whose hash changed
+since the last build are re-read.
+
+- update_section_index() writes docs/docs_sections.json, a table of every
+  heading with its anchor and byte range. The helper uses it (via jq) to print
+  one section or a table of contents by seeking into the file.
+- update_search_index() writes docs/docs_index.json, an inverted index with
+  precomputed BM25 weights and byte offsets for snippets.
+- update_changelog_index() writes docs/changelog_versions.json, the byte range
+  of every release in changelog.md (newest first), so the helper can print the
+  last N versions or everything since a version without reading the whole file.
+
+docs_query.py searches the index in-process (see search()); without it the
+helper script queries the index with:
+    python3 scripts/docs_index.py search <terms...>
+"""
+
+import json
+import logging
+import math
+import re
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from docs_io import atomic_write
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "docs_index.json"
+INDEX_VERSION = 2
+SECTIONS_FILE = "docs_sections.json"
+SECTIONS_VERSION = 1
+CHANGELOG_FILE = "changelog.md"
+CHANGELOG_INDEX_FILE = "changelog_versions.json"
+CHANGELOG_INDEX_VERSION = 1
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Tokens are ASCII-lowercased bytes, so offsets stay valid for seeking into the file
+TOKEN_RE = re.compile(rb"[a-z0-9]+")
+HEADING_RE = re.compile(rb"^(#{1,6})[ \t]+(.+?)[ \t#]*$", re.M)
+FENCE_RE = re.compile(rb"^[ \t]*(```|~~~)", re.M)
+# "## 1.0.84", "## [1.0.84] - 2025-08-19", "## v1.0.84"
+VERSION_HEADING_RE = re.compile(rb"^## +\[?v?(\d+(?:\.\d+)+[^\]\s]*)", re.M)
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can do for from how if in into is it of on or "
+    "that the this to was what when where which will with you your".split()
+)
+
+SNIPPET_BEFORE = 60  # bytes of context shown before a match
+SNIPPET_AFTER = 160  # bytes of context shown after a match
+SEARCH_LIMIT = 8  # results shown by the helper
+
+
+def tokenize(text: bytes) -> List[Tuple[str, int]]:
+    """Split ASCII-lowercased text into (term, byte offset) pairs."""
+    return [
+        (match.group().decode('ascii'), match.start())
+        for match in TOKEN_RE.finditer(text)
+        if len(match.group()) > 1 and match.group().decode('ascii') not in STOPWORDS
+    ]
+
+
+def slugify(title: str) -> str:
+    """Convert a heading title to the anchor used on docs.anthropic.com."""
+    slug = re.sub(r"[`*_\[\]()<>]", "", title.strip().lower())
+    slug = re.sub(r"[^\w\s-]", "", slug)
+    return re.sub(r"\s+", "-", slug).strip("-")
+
+
+def code_block_ranges(content: bytes) -> List[Tuple[int, int]]:
+    """Byte ranges covered by fenced code blocks (an unclosed fence runs to EOF)."""
+    fences = [match.start() for match in FENCE_RE.finditer(content)]
+    if len(fences) % 2:
+        fences.append(len(content))
+    return list(zip(fences[::2], fences[1::2]))
+
+
+def extract_sections(content: bytes) -> List[list]:
+    """
+    Return [level, anchor, title, start, end] for every markdown heading outside
+    code blocks. start/end are byte offsets; a section runs until the next
+    heading of the same or a higher level.
+    """
+    code_blocks = code_block_ranges(content)
+
+    sections = []
+    seen_anchors: Counter = Counter()
+    for match in HEADING_RE.finditer(content):
+        offset = match.start()
+        if any(start <= offset < end for start, end in code_blocks):
+            continue
+        title = match.group(2).decode('utf-8', errors='replace').strip()
+        anchor = slugify(title)
+        # Repeated headings get -1, -2, ... like the rendered site
+        if seen_anchors[anchor]:
+            anchor = f"{anchor}-{seen_anchors[anchor]}"
+        seen_anchors[slugify(title)] += 1
+        sections.append([len(match.group(1)), anchor, title, offset, len(content)])
+
+    for i, section in enumerate(sections):
+        for following in sections[i + 1:]:
+            if following[0] <= section[0]:
+                section[4] = following[3]
+                break
+    return sections
+
+
+def load_section_index(docs_dir: Path) -> Optional[dict]:
+    """Load the section table, or None if it is missing or from another version."""
+    sections_path = docs_dir / SECTIONS_FILE
+    if not sections_path.exists():
+        return None
+    try:
+        sections = json.loads(sections_path.read_text(encoding='utf-8'))
+    except Exception as e:
+        logger.warning(f"Failed to load section index: {e}")
+        return None
+    if sections.get("version") != SECTIONS_VERSION:
+        return None
+    return sections
+
+
+def update_section_index(docs_dir: Path, files: Dict[str, dict]) -> dict:
+    """
+    Bring docs/docs_sections.json in line with the manifest's file entries.
+    Documents whose hash is unchanged keep their previous section table.
+    """
+    previous = load_section_index(docs_dir)
+    cached = previous["files"] if previous else {}
+
+    tables = {}
+    for filename, entry in sorted(files.items()):
+        if not filename.endswith('.md'):
+            continue
+        content_hash = entry.get("hash", "")
+        if cached.get(filename, {}).get("hash") == content_hash:
+            tables[filename] = cached[filename]
+            continue
+        file_path = docs_dir / filename
+        if not file_path.exists():
+            continue
+        content = file_path.read_bytes()
+        tables[filename] = {"hash": content_hash, "size": len(content), "sections": extract_sections(content)}
+
+    index = {"version": SECTIONS_VERSION, "files": tables}
+    if previous == index:
+        logger.info("Section index unchanged")
+        return index
+
+    # One line per document keeps diffs of this tracked file readable
+    lines = [f"    {json.dumps(name)}: {json.dumps(tables[name], separators=(',', ':'))}" for name in tables]
+    atomic_write(
+        docs_dir / SECTIONS_FILE,
+        '{\n  "files": {\n' + ",\n".join(lines) + f'\n  }},\n  "version": {SECTIONS_VERSION}\n}}\n'
+    )
+    logger.info(f"Section index updated: {sum(len(t['sections']) for t in tables.values())} sections in {len(tables)} documents")
+    return index
+
+
+def extract_versions(content: bytes) -> List[list]:
+    """Return [version, start, end] for each release heading, in file order (newest first)."""
+    matches = list(VERSION_HEADING_RE.finditer(content))
+    versions = []
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(content)
+        versions.append([match.group(1).decode('ascii', errors='replace'), match.start(), end])
+    return versions
+
+
+def update_changelog_index(docs_dir: Path, files: Dict[str, dict]) -> Optional[dict]:
+    """Rebuild docs/changelog_versions.json when the changelog's hash changed."""
+    entry = files.get(CHANGELOG_FILE)
+    changelog_path = docs_dir / CHANGELOG_FILE
+    index_path = docs_dir / CHANGELOG_INDEX_FILE
+    if not entry or not changelog_path.exists():
+        return None
+
+    if index_path.exists():
+        try:
+            previous = json.loads(index_path.read_text(encoding='utf-8'))
+            if previous.get("version") == CHANGELOG_INDEX_VERSION and previous.get("hash") == entry.get("hash"):
+                logger.info("Changelog version index unchanged")
+                return previous
+        except Exception as e:
+            logger.warning(f"Failed to load changelog version index: {e}")
+
+    content = changelog_path.read_bytes()
+    index = {
+        "version": CHANGELOG_INDEX_VERSION,
+        "hash": entry.get("hash", ""),
+        "size": len(content),
+        "versions": extract_versions(content),
+    }
+    lines = [f"    {json.dumps(version, separators=(',', ':'))}" for version in index["versions"]]
+    atomic_write(
+        index_path,
+        f'{{\n  "hash": {json.dumps(index["hash"])},\n  "size": {index["size"]},\n'
+        f'  "version": {CHANGELOG_INDEX_VERSION},\n  "versions": [\n' + ",\n".join(lines) + '\n  ]\n}\n'
+    )
+    logger.info(f"Changelog version index updated: {len(index['versions'])} versions")
+    return index
+
+
+def analyze_document(content: bytes) -> dict:
+    """Tokenize one document into term frequencies and first offsets."""
+    lowered = content.lower()  # bytes.lower() only touches ASCII, so offsets are preserved
+    term_freqs: Counter = Counter()
+    first_offsets: Dict[str, int] = {}
+
+    for term, offset in tokenize(lowered):
+        term_freqs[term] += 1
+        first_offsets.setdefault(term, offset)
+
+    return {
+        "length": sum(term_freqs.values()),
+        "terms": {term: [count, first_offsets[term]] for term, count in term_freqs.items()},
+    }
+
+
+def load_search_index(docs_dir: Path) -> Optional[dict]:
+    """Load the search index, or None if it is missing or from another version."""
+    index_path = docs_dir / INDEX_FILE
+    if not index_path.exists():
+        return None
+    try:
+        index = json.loads(index_path.read_text(encoding='utf-8'))
+    except Exception as e:
+        logger.warning(f"Failed to load search index: {e}")
+        return None
+    if index.get("version") != INDEX_VERSION:
+        return None
+    return index
+
+
+def _documents_from_index(index: dict) -> Dict[str, dict]:
+    """Rebuild per-document term tables from a stored index so unchanged docs need no re-read."""
+    documents = {
+        name: {
+            "hash": doc["hash"],
+            "length": doc["length"],
+            "terms": {},
+        }
+        for name, doc in zip(index["doc_names"], index["docs"])
+    }
+    names = index["doc_names"]
+    for term, postings in index["terms"].items():
+        for doc_id, count, _weight, offset in postings:
+            documents[names[doc_id]]["terms"][term] = [count, offset]
+    return documents
+
+
+def build_index(documents: Dict[str, dict]) -> dict:
+    """Compute BM25 weights over analyzed documents and lay out the inverted index."""
+    doc_names = sorted(documents)
+    doc_ids = {name: i for i, name in enumerate(doc_names)}
+    total_docs = len(doc_names)
+    avgdl = (sum(doc["length"] for doc in documents.values()) / total_docs) if total_docs else 0.0
+
+    postings: Dict[str, List[list]] = {}
+    for name in doc_names:
+        doc = documents[name]
+        for term, (count, offset) in doc["terms"].items():
+            postings.setdefault(term, []).append([doc_ids[name], count, offset])
+
+    terms = {}
+    for term in sorted(postings):
+        entries = postings[term]
+        idf = math.log(1 + (total_docs - len(entries) + 0.5) / (len(entries) + 0.5))
+        weighted = []
+        for doc_id, count, offset in entries:
+            length_norm = 1 - BM25_B + BM25_B * documents[doc_names[doc_id]]["length"] / (avgdl or 1)
+            weight = idf * count * (BM25_K1 + 1) / (count + BM25_K1 * length_norm)
+            weighted.append([doc_id, count, round(weight, 4), offset])
+        # Best matches first so queries can stop early
+        weighted.sort(key=lambda posting: (-posting[2], posting[0]))
+        terms[term] = weighted
+
+    return {
+        "version": INDEX_VERSION,
+        "avgdl": round(avgdl, 2),
+        "doc_names": doc_names,
+        "docs": [
+            {
+                "hash": documents[name]["hash"],
+                "length": documents[name]["length"],
+            }
+            for name in doc_names
+        ],
+        "terms": terms,
+    }
+
+
+def update_search_index(docs_dir: Path, files: Dict[str, dict]) -> dict:
+    """
+    Bring docs/docs_index.json in line with the manifest's file entries.
+    Documents whose hash is unchanged are reused from the previous index.
+    """
+    previous = load_search_index(docs_dir)
+    cached = _documents_from_index(previous) if previous else {}
+
+    documents = {}
+    reindexed = 0
+    for filename, entry in sorted(files.items()):
+        if not filename.endswith('.md'):
+            continue
+        content_hash = entry.get("hash", "")
+        if filename in cached and cached[filename]["hash"] == content_hash:
+            documents[filename] = cached[filename]
+            continue
+        file_path = docs_dir / filename
+        if not file_path.exists():
+            continue
+        documents[filename] = {"hash": content_hash, **analyze_document(file_path.read_bytes())}
+        reindexed += 1
+
+    index = build_index(documents)
+    if previous == index:
+        logger.info("Search index unchanged")
+        return index
+
+    atomic_write(docs_dir / INDEX_FILE, json.dumps(index, sort_keys=True, separators=(',', ':')))
+    logger.info(f"Search index updated: {reindexed} of {len(documents)} documents re-indexed, {len(index['terms'])} terms")
+    return index
+
+
+def search(index: dict, query: str, limit: int = 10, sections: Optional[dict] = None) -> List[dict]:
+    """
+    Rank documents for a query. Unknown terms fall back to prefix matches.
+    With a section index, each hit is labelled with the section containing it.
+    """
+    query_terms = [term for term, _ in tokenize(query.lower().encode('ascii', errors='ignore'))]
+    scores: Dict[int, float] = {}
+    best_offset: Dict[int, Tuple[float, int]] = {}
+
+    for query_term in dict.fromkeys(query_terms):
+        matched = [query_term] if query_term in index["terms"] else [
+            term for term in index["terms"] if term.startswith(query_term)
+        ]
+        for term in matched:
+            for doc_id, _count, weight, offset in index["terms"][term]:
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight
+                if weight > best_offset.get(doc_id, (-1.0, 0))[0]:
+                    best_offset[doc_id] = (weight, offset)
+
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+    results = []
+    for doc_id, score in ranked:
+        offset = best_offset[doc_id][1]
+        filename = index["doc_names"][doc_id]
+        # Nearest heading at or before the match gives the section anchor
+        anchor = ""
+        for _level, heading_anchor, _title, start, _end in (sections or {}).get("files", {}).get(filename, {}).get("sections", []):
+            if start > offset:
+                break
+            anchor = heading_anchor
+        results.append({
+            "file": filename,
+            "score": round(score, 2),
+            "anchor": anchor,
+            "offset": offset,
+        })
+    return results
+
+
+def read_snippet(docs_dir: Path, filename: str, offset: int) -> str:
+    """Read a short excerpt around a byte offset without loading the whole file."""
+    start = max(0, offset - SNIPPET_BEFORE)
+    with open(docs_dir / filename, 'rb') as f:
+        f.seek(start)
+        chunk = f.read(offset - start + SNIPPET_AFTER)
+    text = " ".join(chunk.decode('utf-8', errors='ignore').split())
+    return ("…" if start else "") + text + "…"
+
+
+def format_result(result: dict, snippet: str) -> str:
+    """A search hit as printed by the helper: topic#section, then the snippet."""
+    topic = result["file"][:-3]
+    if result["anchor"]:
+        topic += f"#{result['anchor']}"
+    return f"  • {topic}\n      {snippet}"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse  # only the CLI needs it; docs_query imports this module for search
+
+    parser = argparse.ArgumentParser(description="Build or query the docs search index")
+    parser.add_argument("--docs-dir", type=Path, default=Path(__file__).parent.parent / 'docs')
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("build", help="Rebuild the indexes from docs_manifest.json")
+    search_parser = subparsers.add_parser("search", help="Ranked full-text search")
+    search_parser.add_argument("query", nargs="+")
+    search_parser.add_argument("--limit", type=int, default=SEARCH_LIMIT)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+        manifest = json.loads((args.docs_dir / "docs_manifest.json").read_text())
+        update_section_index(args.docs_dir, manifest.get("files", {}))
+        update_search_index(args.docs_dir, manifest.get("files", {}))
+        update_changelog_index(args.docs_dir, manifest.get("files", {}))
+        return 0
+
+    index = load_search_index(args.docs_dir)
+    if index is None:
+        print("Search index not found", file=sys.stderr)
+        return 2
+
+    results = search(index, " ".join(args.query), args.limit, load_section_index(args.docs_dir))
+    if not results:
+        return 1
+    for result in results:
+        print(format_result(result, read_snippet(args.docs_dir, result['file'], result['offset'])))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
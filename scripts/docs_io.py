@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Crash-safe file writes for the documentation mirror.
+
+Readers (the helper script, git pull users) must never see a truncated
+document or a manifest that points at content that is not on disk yet.
+Every write therefore goes to a temporary file on the same filesystem,
+is fsynced, and is then atomically renamed over the target.
+"""
+
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Iterable, List, Union
+
+logger = logging.getLogger(__name__)
+
+STAGING_DIR = ".staging"
+
+
+def fsync_dir(directory: Path) -> None:
+    """Flush a directory entry so completed renames survive a crash."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return  # Not supported on this platform
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _write_synced(path: Path, data: bytes) -> None:
+    with open(path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def atomic_write(path: Path, data: Union[str, bytes]) -> None:
+    """Replace path with data atomically (temp file + fsync + rename)."""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    try:
+        _write_synced(tmp_path, data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    fsync_dir(path.parent)
+
+
+class StagedWriter:
+    """
+    Batches the writes of one fetch run in <target>/.staging and moves them
+    into place only on commit(). Files listed in `last` (the manifest) are
+    renamed after everything else, and removals happen after that, so at no
+    point does the manifest reference a missing or partially written file.
+    A run that dies before commit() leaves the published tree untouched;
+    the next run either discards the leftover staging directory or, when
+    resuming, keeps the files it still vouches for.
+    """
+
+    def __init__(self, target_dir: Path):
+        self.target_dir = target_dir
+        self.staging_dir = target_dir / STAGING_DIR
+        self.staged: Dict[str, Path] = {}
+        self.removals: List[str] = []
+
+    def begin(self, keep: Iterable[str] = ()) -> None:
+        """
+        Start a new batch. Files left by an interrupted run are discarded,
+        except those named in `keep`, which are staged again as they are.
+        """
+        self.staged.clear()
+        self.removals.clear()
+        keep = set(keep)
+        if self.staging_dir.exists():
+            discarded = 0
+            for path in self.staging_dir.iterdir():
+                if path.name in keep and path.is_file():
+                    self.staged[path.name] = path
+                elif path.is_dir():
+                    shutil.rmtree(path)
+                    discarded += 1
+                else:
+                    path.unlink()
+                    discarded += 1
+            if discarded:
+                logger.warning(f"Discarding {discarded} staged file(s) from an interrupted run")
+            if self.staged:
+                logger.info(f"Resuming with {len(self.staged)} staged file(s) from an interrupted run")
+        self.staging_dir.mkdir(parents=True, exist_ok=True)
+
+    def write(self, filename: str, data: Union[str, bytes]) -> None:
+        """Stage the new contents of target_dir/filename."""
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        staged_path = self.staging_dir / filename
+        _write_synced(staged_path, data)
+        self.staged[filename] = staged_path
+
+    def stage_file(self, filename: str, path: Path) -> None:
+        """Stage an already written and synced file inside staging_dir (e.g. a spooled download) by renaming it."""
+        staged_path = self.staging_dir / filename
+        os.replace(path, staged_path)
+        self.staged[filename] = staged_path
+
+    def remove(self, filename: str) -> None:
+        """Delete target_dir/filename when the batch is committed."""
+        self.removals.append(filename)
+
+    def commit(self, last: tuple = ()) -> int:
+        """Move staged files into place and apply removals. Returns the number of files written."""
+        ordered = [name for name in self.staged if name not in last]
+        ordered += [name for name in last if name in self.staged]
+        for filename in ordered:
+            os.replace(self.staged[filename], self.target_dir / filename)
+        fsync_dir(self.target_dir)
+
+        for filename in self.removals:
+            file_path = self.target_dir / filename
+            if file_path.exists():
+                file_path.unlink()
+
+        written = len(ordered)
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
+        self.staged.clear()
+        self.removals.clear()
+        return written
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Cross-reference link graph for the local Claude Code documentation mirror.
+
+The fetcher calls update_link_graph() after each run, next to the section
+and search indexes. It writes docs/docs_links.json:
+
+- files: for every document, the internal links found in it (outside code
+  blocks) as [target file, anchor, start, end, URL]. Links to
+  docs.anthropic.com pages, absolute or relative, are resolved to the
+  mirror's own file names through the manifest (pages of other mirrored
+  trees, such as another locale, under their own paths), and anchors to the heading
+  anchors of the section index; start/end is the byte range of the URL in
+  the document. Each also carries its related topics, the distinct link
+  targets as /docs arguments: "related" for the whole page and, under
+  "sections", per section anchor (only the section's links, keeping their
+  anchors).
+- backlinks: for every document, the other documents that link to it.
+- broken: [source file, byte offset, URL, reason] for links to pages that
+  are not mirrored or to headings the target page does not have.
+
+Only documents whose hash changed since the last build are re-read; the
+links of the others are resolved again from the stored URLs. The
+helper and docs_query.py print "related topics" and "referenced by" as
+stored, and the
+mirrored pages themselves are kept byte-for-byte as published (their hashes
+drive change detection), so local links are produced on demand:
+
+    python3 scripts/docs_links.py local hooks    # hooks.md with links to settings.md#...
+    python3 scripts/docs_links.py broken         # link rot, exit status 1 if any
+"""
+
+import json
+import logging
+import posixpath
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+from docs_index import code_block_ranges
+from docs_io import atomic_write
+
+logger = logging.getLogger(__name__)
+
+LINKS_FILE = "docs_links.json"
+LINKS_VERSION = 2
+MANIFEST_FILE = "docs_manifest.json"
+
+# URL paths under which Claude Code pages are mirrored (as in the fetcher's FILENAME_PREFIXES)
+DOCS_PREFIXES = ("/en/docs/claude-code/", "/docs/claude-code/")
+# [text](url) and href="url"; group 1 is the URL
+LINK_RE = re.compile(rb"\]\(\s*<?([^)\s>]+)|\bhref=\"([^\"]+)\"")
+
+
+def anchor_key(anchor: str) -> str:
+    """Compare anchors by letters and digits only ("a-%26-b", "a--b" and "A-B" match)."""
+    return "".join(char for char in unquote(anchor).lower() if char.isalnum())
+
+
+def page_paths(files: Dict[str, dict]) -> Dict[str, str]:
+    """Map the URL path of every mirrored page (e.g. /en/docs/claude-code/hooks) to its file name."""
+    paths = {}
+    for filename, entry in files.items():
+        url = urlsplit(entry.get("original_url", ""))
+        # Pages have a .md URL; files such as the changelog come from elsewhere
+        if url.path.startswith(DOCS_PREFIXES) or "original_md_url" in entry:
+            paths[url.path.rstrip("/")] = filename
+    return paths
+
+
+def mirrored_prefixes(paths: Dict[str, str]) -> Tuple[str, ...]:
+    """DOCS_PREFIXES plus the directories of the mirrored pages (e.g. /ja/docs/claude-code/)."""
+    directories = {posixpath.dirname(path) + "/" for path in paths}
+    return DOCS_PREFIXES + tuple(sorted(directories - set(DOCS_PREFIXES)))
+
+
+def resolve_link(url: str, page_path: str, paths: Dict[str, str],
+                 prefixes: Tuple[str, ...] = DOCS_PREFIXES) -> Optional[Tuple[Optional[str], str]]:
+    """
+    Resolve a link found on the page at page_path. Returns (file name, or
+    None if the page is not mirrored, and anchor), or None for links that
+    leave the mirrored docs (the URL paths under prefixes).
+    """
+    parts = urlsplit(url)
+    if parts.scheme and parts.scheme not in ("http", "https"):
+        return None  # mailto:, data:, ...
+    if parts.netloc and not parts.netloc.endswith("anthropic.com"):
+        return None
+    path = parts.path
+    if not path:
+        path = page_path  # "#anchor" on the same page
+    elif not path.startswith("/"):
+        path = posixpath.normpath(posixpath.join(posixpath.dirname(page_path), path))
+    if not path.startswith(prefixes):
+        return None
+    path = path.rstrip("/")
+    if path.endswith(".md"):
+        path = path[:-3]
+    return paths.get(path), unquote(parts.fragment)
+
+
+def extract_links(content: bytes) -> List[Tuple[str, int, int]]:
+    """Return (url, start, end) for every link outside fenced code blocks."""
+    code_blocks = code_block_ranges(content)
+    links = []
+    for match in LINK_RE.finditer(content):
+        group = 1 if match.group(1) is not None else 2
+        start, end = match.span(group)
+        if any(block_start <= start < block_end for block_start, block_end in code_blocks):
+            continue
+        links.append((match.group(group).decode('utf-8', errors='replace'), start, end))
+    return links
+
+
+def load_link_graph(docs_dir: Path) -> Optional[dict]:
+    """Load the link graph, or None if it is missing or from another version."""
+    graph_path = docs_dir / LINKS_FILE
+    if not graph_path.exists():
+        return None
+    try:
+        graph = json.loads(graph_path.read_text(encoding='utf-8'))
+    except Exception as e:
+        logger.warning(f"Failed to load link graph: {e}")
+        return None
+    if graph.get("version") != LINKS_VERSION:
+        return None
+    return graph
+
+
+def update_link_graph(docs_dir: Path, files: Dict[str, dict], sections: Optional[dict] = None) -> dict:
+    """
+    Bring docs/docs_links.json in line with the manifest's file entries.
+    sections is the section index (see docs_index.update_section_index),
+    used to resolve anchors; documents whose hash is unchanged are not
+    re-read.
+    """
+    previous = load_link_graph(docs_dir)
+    cached = previous["files"] if previous else {}
+    section_tables = (sections or {}).get("files", {})
+    anchors = {
+        filename: {anchor_key(section[1]): section[1] for section in table.get("sections", [])}
+        for filename, table in section_tables.items()
+    }
+    paths = page_paths(files)
+    prefixes = mirrored_prefixes(paths)
+    page_of = {filename: path for path, filename in paths.items()}
+
+    tables = {}
+    broken = []
+    reread = 0
+    for filename, entry in sorted(files.items()):
+        if not filename.endswith('.md'):
+            continue
+        content_hash = entry.get("hash", "")
+        cached_entry = cached.get(filename, {})
+        if cached_entry.get("hash") == content_hash:
+            found = [(link[4], link[2], link[3]) for link in cached_entry["links"]]
+            found += [(url, start, end) for start, end, url, _reason in cached_entry["broken"]]
+            found.sort(key=lambda link: link[1])
+        else:
+            file_path = docs_dir / filename
+            if not file_path.exists():
+                continue
+            found = extract_links(file_path.read_bytes())
+            reread += 1
+
+        # Links are resolved again on every build, so adding a page or a
+        # heading fixes the links to it without re-reading their documents
+        page_path = page_of.get(filename, DOCS_PREFIXES[0] + filename[:-3])
+        links = []
+        file_broken = []
+        for url, start, end in found:
+            resolved = resolve_link(url, page_path, paths, prefixes)
+            if resolved is None:
+                continue
+            target, anchor = resolved
+            if target is None:
+                file_broken.append([start, end, url, "no such page"])
+                continue
+            if anchor:
+                known = anchors.get(target)
+                if known is not None and anchor_key(anchor) not in known:
+                    file_broken.append([start, end, url, "no such section"])
+                    continue
+                anchor = (known or {}).get(anchor_key(anchor), anchor)
+            links.append([target, anchor, start, end, url])
+
+        tables[filename] = {"hash": content_hash, "links": links, "broken": file_broken,
+                            "related": related_topics(filename, links)}
+        section_related = {}
+        for _level, anchor, _title, start, end in section_tables.get(filename, {}).get("sections", []):
+            topics = related_topics(filename, links, start, end)
+            if topics:
+                section_related[anchor] = topics
+        if section_related:
+            tables[filename]["sections"] = section_related
+        broken += [[filename, start, url, reason] for start, _end, url, reason in file_broken]
+
+    backlinks: Dict[str, List[str]] = {}
+    for filename, table in tables.items():
+        for target in dict.fromkeys(link[0] for link in table["links"]):
+            if target != filename:
+                backlinks.setdefault(target, []).append(filename)
+
+    graph = {"version": LINKS_VERSION, "files": tables, "backlinks": backlinks, "broken": broken}
+    if previous == graph:
+        logger.info("Link graph unchanged")
+        return graph
+
+    # One line per document keeps diffs of this tracked file readable
+    lines = [f"    {json.dumps(name)}: {json.dumps(tables[name], separators=(',', ':'))}" for name in tables]
+    atomic_write(
+        docs_dir / LINKS_FILE,
+        f'{{\n  "backlinks": {json.dumps(backlinks, sort_keys=True, separators=(",", ":"))},\n'
+        f'  "broken": {json.dumps(broken, separators=(",", ":"))},\n'
+        '  "files": {\n' + ",\n".join(lines) + f'\n  }},\n  "version": {LINKS_VERSION}\n}}\n'
+    )
+    total = sum(len(table["links"]) for table in tables.values())
+    logger.info(f"Link graph updated: {reread} of {len(tables)} documents re-read, {total} internal links, "
+                f"{len(broken)} broken")
+    return graph
+
+
+def related_topics(filename: str, links: List[list], start: int = 0, end: Optional[int] = None) -> List[str]:
+    """
+    Distinct link targets of a document, in the order they first appear, as
+    /docs arguments. With a byte range (one section) the targets keep their
+    anchors; for a whole page only the other topics are listed.
+    """
+    related = []
+    for target, anchor, offset, _end, _url in links:
+        if offset < start or (end is not None and offset >= end):
+            continue
+        if end is not None and anchor:
+            topic = f"{target[:-3]}#{anchor}"
+        elif target == filename:
+            continue
+        else:
+            topic = target[:-3]
+        if topic not in related:
+            related.append(topic)
+    return related
+
+
+def referenced_by(graph: dict, filename: str) -> List[str]:
+    """Topics of the documents that link to a document."""
+    return [name[:-3] for name in graph.get("backlinks", {}).get(filename, [])]
+
+
+def localize(content: bytes, links: List[list]) -> bytes:
+    """A document with each internal link pointing at the mirrored file (settings.md#anchor)."""
+    parts = []
+    position = 0
+    for target, anchor, start, end, _url in links:
+        parts.append(content[position:start])
+        parts.append((target + (f"#{anchor}" if anchor else "")).encode('utf-8'))
+        position = end
+    parts.append(content[position:])
+    return b"".join(parts)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build or query the docs link graph")
+    parser.add_argument("--docs-dir", type=Path, default=Path(__file__).parent.parent / 'docs')
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("build", help="Rebuild the link graph from docs_manifest.json")
+    subparsers.add_parser("broken", help="List links to missing pages or sections")
+    related_parser = subparsers.add_parser("related", help="Topics a document links to and is linked from")
+    related_parser.add_argument("topic")
+    local_parser = subparsers.add_parser("local", help="Print a document with links to the mirrored files")
+    local_parser.add_argument("topic")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        from docs_index import update_section_index
+        logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+        files = json.loads((args.docs_dir / MANIFEST_FILE).read_text()).get("files", {})
+        update_link_graph(args.docs_dir, files, update_section_index(args.docs_dir, files))
+        return 0
+
+    graph = load_link_graph(args.docs_dir)
+    if graph is None:
+        print("Link graph not found", file=sys.stderr)
+        return 2
+
+    if args.command == "broken":
+        for source, offset, url, reason in graph["broken"]:
+            print(f"{source[:-3]}: {url} ({reason}, byte {offset})")
+        return 1 if graph["broken"] else 0
+
+    filename = args.topic if args.topic.endswith(".md") else f"{args.topic}.md"
+    if filename not in graph["files"]:
+        print(f"No such document: {args.topic}", file=sys.stderr)
+        return 2
+    if args.command == "related":
+        print("Related topics: " + ", ".join(graph["files"][filename]["related"]))
+        print("Referenced by: " + ", ".join(referenced_by(graph, filename)))
+        return 0
+
+    content = (args.docs_dir / filename).read_bytes()
+    sys.stdout.buffer.write(localize(content, graph["files"][filename]["links"]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
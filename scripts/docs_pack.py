@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Single-file snapshot of the local Claude Code documentation mirror.
+
+write_pack() bundles every document with the manifest and the section,
+search and changelog indexes into docs/docs_snapshot.pack:
+
+    CCDOCSPACK 1 <TOC length, 10 digits>\\n    (HEADER_SIZE bytes)
+    <table of contents: one line of JSON>\\n
+    <entries, each gzip-compressed on its own>
+
+The table of contents maps every entry name to [offset, length, size]:
+the entry's compressed bytes start `offset` bytes after the table of
+contents and `size` is its uncompressed length. Any entry can therefore be
+read with one seek (DocsPack mmaps the file, and tail -c | head -c | gunzip
+works too). The pack is byte-for-byte reproducible, so a rebuild that
+changed nothing leaves it untouched.
+
+The pack is optional: /docs reads the separate files, and nothing else
+builds it. It is derived data and is not committed (a binary that changes
+with every page update does not delta well and would grow the repository
+each time); the commands below build it when it is missing or older than
+the manifest.
+
+    python3 scripts/docs_pack.py list
+    python3 scripts/docs_pack.py cat hooks
+    python3 scripts/docs_pack.py search permission rules
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import mmap
+import sys
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from docs_index import (
+    CHANGELOG_INDEX_FILE, INDEX_FILE, INDEX_VERSION, SEARCH_LIMIT, SECTIONS_FILE, SNIPPET_AFTER, SNIPPET_BEFORE,
+    format_result, search,
+)
+from docs_io import atomic_write
+from docs_links import LINKS_FILE
+
+logger = logging.getLogger(__name__)
+
+PACK_FILE = "docs_snapshot.pack"
+PACK_MAGIC = b"CCDOCSPACK"
+PACK_VERSION = 1
+HEADER_SIZE = len(PACK_MAGIC) + 14  # magic, " 1 ", ten digits, newline
+MANIFEST_FILE = "docs_manifest.json"
+
+# Index files bundled next to the documents
+PACKED_INDEXES = (MANIFEST_FILE, SECTIONS_FILE, INDEX_FILE, CHANGELOG_INDEX_FILE, LINKS_FILE)
+
+
+def compress(data: bytes) -> bytes:
+    """gzip with a fixed mtime so identical input gives identical bytes."""
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def build_pack(docs_dir: Path, files: Dict[str, dict]) -> bytes:
+    """Lay out the pack for the manifest's documents and the index files present in docs_dir."""
+    names = sorted(name for name in files if name.endswith('.md') and (docs_dir / name).is_file())
+    names += [name for name in PACKED_INDEXES if (docs_dir / name).is_file()]
+
+    entries = {}
+    blobs = []
+    offset = 0
+    for name in names:
+        data = (docs_dir / name).read_bytes()
+        blob = compress(data)
+        entries[name] = [offset, len(blob), len(data)]
+        blobs.append(blob)
+        offset += len(blob)
+
+    toc = json.dumps({"version": PACK_VERSION, "encoding": "gzip", "entries": entries},
+                     sort_keys=True, separators=(',', ':')).encode('utf-8') + b"\n"
+    header = PACK_MAGIC + b" %d %010d\n" % (PACK_VERSION, len(toc))
+    return header + toc + b"".join(blobs)
+
+
+def write_pack(docs_dir: Path, files: Dict[str, dict]) -> bool:
+    """Rebuild docs/docs_snapshot.pack. Returns False when its content did not change."""
+    data = build_pack(docs_dir, files)
+    pack_path = docs_dir / PACK_FILE
+    try:
+        if pack_path.read_bytes() == data:
+            logger.info("Snapshot pack unchanged")
+            return False
+    except OSError:
+        pass
+    atomic_write(pack_path, data)
+    logger.info(f"Snapshot pack updated: {len(data) // 1024} KiB")
+    return True
+
+
+def pack_is_current(docs_dir: Path) -> bool:
+    """Whether the pack exists and was built after the manifest last changed."""
+    try:
+        return (docs_dir / PACK_FILE).stat().st_mtime >= (docs_dir / MANIFEST_FILE).stat().st_mtime
+    except OSError:
+        return False
+
+
+class DocsPack:
+    """Read-only view of a snapshot pack; entries are decompressed on demand."""
+
+    def __init__(self, path: Path):
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = self.data[:HEADER_SIZE]
+        fields = header.split()
+        if len(fields) != 3 or fields[0] != PACK_MAGIC or fields[1] != str(PACK_VERSION).encode():
+            raise ValueError(f"{path} is not a version {PACK_VERSION} docs pack")
+        toc_size = int(fields[2])
+        self.toc = json.loads(self.data[HEADER_SIZE:HEADER_SIZE + toc_size])
+        self.entries: Dict[str, list] = self.toc["entries"]
+        self.data_start = HEADER_SIZE + toc_size
+
+    def documents(self) -> List[str]:
+        return sorted(name for name in self.entries if name.endswith('.md'))
+
+    def read(self, name: str) -> Optional[bytes]:
+        if name not in self.entries:
+            return None
+        offset, length, _size = self.entries[name]
+        start = self.data_start + offset
+        # wbits 31: a single gzip member
+        return zlib.decompress(self.data[start:start + length], 31)
+
+    def read_json(self, name: str) -> Optional[dict]:
+        data = self.read(name)
+        return json.loads(data) if data is not None else None
+
+
+def snippet(content: bytes, offset: int) -> str:
+    """A short excerpt around a byte offset, formatted like docs_index's snippets."""
+    start = max(0, offset - SNIPPET_BEFORE)
+    text = " ".join(content[start:offset + SNIPPET_AFTER].decode('utf-8', errors='ignore').split())
+    return ("…" if start else "") + text + "…"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build or read the single-file docs snapshot")
+    parser.add_argument("--docs-dir", type=Path, default=Path(__file__).parent.parent / 'docs')
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("build", help="Rebuild the pack from docs_manifest.json")
+    subparsers.add_parser("list", help="List the documents in the pack")
+    cat_parser = subparsers.add_parser("cat", help="Print one document")
+    cat_parser.add_argument("topic")
+    search_parser = subparsers.add_parser("search", help="Ranked full-text search")
+    search_parser.add_argument("query", nargs="+")
+    search_parser.add_argument("--limit", type=int, default=SEARCH_LIMIT)
+    args = parser.parse_args(argv)
+
+    if args.command == "build" or not pack_is_current(args.docs_dir):
+        logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+        try:
+            manifest = json.loads((args.docs_dir / MANIFEST_FILE).read_text())
+            if not write_pack(args.docs_dir, manifest.get("files", {})):
+                (args.docs_dir / PACK_FILE).touch()  # unchanged, but current again
+        except (OSError, ValueError) as e:
+            print(f"Snapshot pack could not be built: {e}", file=sys.stderr)
+            return 2
+        if args.command == "build":
+            return 0
+
+    try:
+        pack = DocsPack(args.docs_dir / PACK_FILE)
+    except (OSError, ValueError) as e:
+        print(f"Snapshot pack not available: {e}", file=sys.stderr)
+        return 2
+
+    if args.command == "list":
+        for name in pack.documents():
+            print(name[:-3])
+        return 0
+
+    if args.command == "cat":
+        name = args.topic if args.topic.endswith('.md') else f"{args.topic}.md"
+        content = pack.read(name)
+        if content is None:
+            return 1
+        sys.stdout.buffer.write(content)
+        return 0
+
+    index = pack.read_json(INDEX_FILE)
+    if not index or index.get("version") != INDEX_VERSION:
+        print("Search index not found in the pack", file=sys.stderr)
+        return 2
+    results = search(index, " ".join(args.query), args.limit, pack.read_json(SECTIONS_FILE))
+    if not results:
+        return 1
+    for result in results:
+        print(format_result(result, snippet(pack.read(result['file']) or b'', result['offset'])))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,671 @@
+#!/usr/bin/env python3
+"""
+Single-process answers for the /docs command.
+
+The helper script runs this first for every lookup instead of its chains of
+sed, jq, grep, sort and column processes:
+
+    python3 -S scripts/docs_query.py [-t] [<topic>[#section] | search <terms> | what's new | changelog ...]
+
+It takes the helper's arguments and prints the same output, reading the
+manifest's documents and the precomputed section, search, link, changelog
+and what's new indexes in-process.
+Only the standard library is used and modules are imported where they are
+needed (re adds several milliseconds, so only searches use it, and the
+indexes are parsed with json's C scanner rather than the json package, which
+imports re), and a lookup costs little more than interpreter startup;
+benchmark/query_startup.py holds it to a budget.
+
+Whatever needs git stays in the helper: -t runs the helper's freshness check
+before answering, and FALLBACK_STATUS (with nothing printed) hands a request
+back, e.g. "what's new" without docs/whats_new.json or any unexpected error.
+Once something has been written (the -t freshness check), a request is never
+handed back, so nothing is printed twice.
+"""
+
+import os
+import sys
+
+SCRIPT_VERSION = "0.3.3"  # the helper's SCRIPT_VERSION
+FALLBACK_STATUS = 3
+
+DOCS_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DOCS_DIR = os.path.join(DOCS_PATH, "docs")
+HELPER = os.path.join(DOCS_PATH, "claude-docs-helper.sh")
+SECTIONS = os.path.join(DOCS_DIR, "docs_sections.json")
+CHANGELOG_INDEX = os.path.join(DOCS_DIR, "changelog_versions.json")
+WHATS_NEW = os.path.join(DOCS_DIR, "whats_new.json")
+LINKS = os.path.join(DOCS_DIR, "docs_links.json")
+
+STATE_DIR = os.path.join(DOCS_PATH, ".cache")
+REFRESH_STAMP = os.path.join(STATE_DIR, "last_refresh")
+REFRESH_STATUS = os.path.join(STATE_DIR, "refresh_status")
+REFRESH_LOCK = os.path.join(STATE_DIR, "refresh.lock")
+REFRESH_LOCK_TIMEOUT = 300
+DEFAULT_REFRESH_TTL = 900
+
+COLUMN_WIDTH = 80
+RELATED_LIMIT = 10  # the helper's RELATED_LIMIT
+TAB = 8
+SANITIZE_ALLOWED = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 _.,'?#-")
+KEYWORD_STOPWORDS = frozenset(
+    "tell me about explain what is are how do to show find search the for in".split()
+)
+
+# Output is collected and written once at the end, so a request handed back
+# to the helper (FALLBACK_STATUS) has printed nothing
+OUTPUT = []
+output_written = False
+
+
+class JSONContext:
+    """The json.JSONDecoder settings read by the C scanner."""
+    strict = True
+    object_hook = None
+    object_pairs_hook = None
+    parse_float = float
+    parse_int = int
+    parse_constant = {"NaN": float("nan"), "Infinity": float("inf"), "-Infinity": float("-inf")}.__getitem__
+
+
+def emit(text: str = "") -> None:
+    OUTPUT.append((text + "\n").encode("utf-8"))
+
+
+def emit_bytes(data: bytes) -> None:
+    OUTPUT.append(data)
+
+
+def parse_json(data: bytes):
+    """json.loads() for our UTF-8 index files, through the C scanner when there is one."""
+    try:
+        from _json import make_scanner
+    except ImportError:
+        import json
+        return json.loads(data)
+    text = data.decode("utf-8").strip()
+    try:
+        value, end = make_scanner(JSONContext())(text, 0)
+    except StopIteration:
+        raise ValueError("no JSON value found") from None
+    if end != len(text):
+        raise ValueError(f"extra data after the JSON value at {end}")
+    return value
+
+
+def load_json(path: str):
+    """Parsed JSON file, or None if it is missing or unreadable."""
+    try:
+        with open(path, "rb") as f:
+            return parse_json(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def sanitize_input(text: str) -> str:
+    """The helper's sanitize_input: keep [a-zA-Z0-9 _.,'?#-], squeeze and trim spaces (per line)."""
+    lines = []
+    for line in text.split("\n"):
+        line = "".join(char for char in line if char in SANITIZE_ALLOWED)
+        lines.append(" ".join(word for word in line.split(" ") if word))
+    return "\n".join(lines)
+
+
+def mentions_whats_new(text: str) -> bool:
+    """The helper's `=~ what.*new` test."""
+    start = text.find("what")
+    return start != -1 and "new" in text[start + 4:]
+
+
+def print_doc_header() -> None:
+    emit("📚 COMMUNITY MIRROR: https://github.com/wgs4/claude-code-docs")
+    emit("📖 OFFICIAL DOCS: https://docs.anthropic.com/en/docs/claude-code")
+    emit()
+
+
+def list_topics() -> list:
+    """Topic names, in file name order ("hooks-guide" before "hooks"), from one directory listing."""
+    try:
+        return [name[:-3] for name in sorted(os.listdir(DOCS_DIR))
+                if name.endswith(".md") and not name.startswith(".")]
+    except OSError:
+        return []
+
+
+def columnate(items: list, width: int = COLUMN_WIDTH) -> None:
+    """Print items in tab-aligned columns, filled top to bottom, like `column -c 80`."""
+    if not items:
+        return
+    maxlength = (max(len(item) for item in items) + TAB) & ~(TAB - 1)
+    if maxlength >= width:
+        for item in items:
+            emit(item)
+        return
+    numcols = width // maxlength
+    numrows = -(-len(items) // numcols)
+    for row in range(numrows):
+        line = ""
+        endcol = maxlength
+        base = row
+        while True:
+            line += items[base]
+            base += numrows
+            if base >= len(items):
+                break
+            chcnt = len(line.expandtabs(TAB))
+            while (chcnt + TAB) & ~(TAB - 1) <= endcol:
+                line += "\t"
+                chcnt = (chcnt + TAB) & ~(TAB - 1)
+            endcol += maxlength
+        emit(line)
+
+
+def format_age(secs: int) -> str:
+    if secs < 60:
+        return "just now"
+    if secs < 3600:
+        return f"{secs // 60}m ago"
+    if secs < 86400:
+        return f"{secs // 3600}h ago"
+    return f"{secs // 86400}d ago"
+
+
+def read_int(path: str) -> int:
+    try:
+        with open(path) as f:
+            value = f.read().strip()
+    except OSError:
+        return 0
+    return int(value) if value.isdigit() else 0
+
+
+def report_freshness() -> None:
+    """Result of the most recent (background) refresh, as recorded by the helper."""
+    import time
+    try:
+        with open(REFRESH_STATUS) as f:
+            fields = f.readline().split()
+    except OSError:
+        emit(f"⏳ Checking GitHub for updates in the background (v{SCRIPT_VERSION})")
+        return
+    when, status, branch = (fields + ["", "", ""])[:3]
+    when = int(when) if when.isdigit() else 0
+    age = format_age(int(time.time()) - when)
+    if status == "updated":
+        emit(f"🔄 Updated to latest documentation {age} (v{SCRIPT_VERSION}, {branch})")
+    elif status == "offline":
+        emit(f"⚠️  Could not check GitHub for updates ({age}) - using cached docs (v{SCRIPT_VERSION}, {branch})")
+    elif status == "local-changes":
+        emit(f"⚠️  Updates paused: local changes in {DOCS_PATH} would be discarded (run /docs -t for details)")
+    else:
+        emit(f"✅ Docs checked against GitHub {age} (v{SCRIPT_VERSION}, {branch})")
+
+
+def maybe_background_refresh() -> None:
+    """Start the helper's detached background refresh if its TTL has expired (never blocks)."""
+    import time
+    if not os.path.isdir(os.path.join(DOCS_PATH, ".git")):
+        return
+    try:
+        os.makedirs(STATE_DIR, exist_ok=True)
+    except OSError:
+        return
+    ttl = os.environ.get("CLAUDE_DOCS_REFRESH_TTL", "")
+    ttl = int(ttl) if ttl.isdigit() else DEFAULT_REFRESH_TTL
+    now = int(time.time())
+    if now - read_int(REFRESH_STAMP) < ttl:
+        return
+
+    # Break a lock left behind by a refresh that died
+    if os.path.isdir(REFRESH_LOCK) and now - read_int(os.path.join(REFRESH_LOCK, "started")) >= REFRESH_LOCK_TIMEOUT:
+        import shutil
+        shutil.rmtree(REFRESH_LOCK, ignore_errors=True)
+
+    # mkdir is atomic, so only one caller (shell or python) wins the lock
+    try:
+        os.mkdir(REFRESH_LOCK)
+    except OSError:
+        return
+    for path in (os.path.join(REFRESH_LOCK, "started"), REFRESH_STAMP):
+        with open(path, "w") as f:
+            f.write(f"{now}\n")
+
+    import subprocess
+    subprocess.Popen(["nohup", "bash", HELPER, "background-refresh"], stdin=subprocess.DEVNULL,
+                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+
+
+def read_range(path: str, start: int, end: int) -> bytes:
+    """Bytes [start, end) of a file, read with one seek."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        return f.read(end - start)
+
+
+def print_toc(topic: str) -> None:
+    sections = load_json(SECTIONS) or {}
+    for level, anchor, title, _start, _end in sections.get("files", {}).get(f"{topic}.md", {}).get("sections", []):
+        emit("  " * (level - 1) + f"• {title}  (#{anchor})")
+
+
+def print_section(topic: str, doc_path: str, wanted: str):
+    """Print one section by its byte range; returns its anchor, or None if there is no such heading."""
+    sections = load_json(SECTIONS)
+    if sections is None:
+        return None
+    # Accept "PreToolUse", "pretooluse" or "hook input" for the anchor
+    wanted = wanted.lower().replace(" ", "-")
+    entries = sections.get("files", {}).get(f"{topic}.md", {}).get("sections") or []
+    matches = [entry for entry in entries if entry[1] == wanted] + [entry for entry in entries if wanted in entry[1]]
+    if not matches:
+        return None
+    _level, anchor, _title, start, end = matches[0]
+    emit_bytes(read_range(doc_path, start, end))
+    return anchor
+
+
+def join_limited(items: list) -> str:
+    return ", ".join(items[:RELATED_LIMIT]) + (", …" if len(items) > RELATED_LIMIT else "")
+
+
+def print_links(topic: str, anchor: str = "") -> None:
+    """
+    Related topics and backlinks as stored in the link graph: those of the
+    section with the given anchor, or of the whole page.
+    """
+    graph = load_json(LINKS)
+    if graph is None:
+        return
+    filename = f"{topic}.md"
+    table = graph.get("files", {}).get(filename, {})
+    related = table.get("sections", {}).get(anchor, []) if anchor else table.get("related", [])
+    if related:
+        emit(f"🔗 Related topics: {join_limited(related)}")
+    backlinks = [name[:-3] for name in graph.get("backlinks", {}).get(filename, [])]
+    if backlinks:
+        emit(f"↩️  Referenced by: {join_limited(backlinks)}")
+
+
+def linked_topics(topics: list) -> list:
+    """Topics that the given topics link to or are linked from, most connected first."""
+    graph = load_json(LINKS)
+    if graph is None:
+        return []
+    counts = {}
+    for topic in topics:
+        filename = f"{topic}.md"
+        neighbours = {link[0] for link in graph.get("files", {}).get(filename, {}).get("links", [])}
+        neighbours.update(graph.get("backlinks", {}).get(filename, []))
+        for name in neighbours:
+            if name[:-3] not in topics:
+                counts[name[:-3]] = counts.get(name[:-3], 0) + 1
+    return sorted(counts, key=lambda name: (-counts[name], name))[:RELATED_LIMIT]
+
+
+def read_changelog(mode: str, arg: str) -> bool:
+    """Print part of the changelog from the version index; False if the index is missing or nothing matched."""
+    changelog = os.path.join(DOCS_DIR, "changelog.md")
+    index = load_json(CHANGELOG_INDEX)
+    if index is None or not os.path.isfile(changelog):
+        return False
+    versions = index.get("versions", [])
+
+    if mode in ("last", "latest", "recent"):
+        count = int(arg) if arg.isdigit() else 5
+        emit(f"Last {count} Claude Code versions:")
+        selected = versions[:count]
+    elif mode in ("since", "after"):
+        names = [version[0] for version in versions]
+        wanted = arg[1:] if arg.startswith("v") else arg
+        if wanted not in names:
+            emit(f"Version {arg} not found in the changelog.")
+            return False
+        position = names.index(wanted)
+        if position == 0:
+            emit(f"{arg} is the latest version - no newer changes.")
+            return True
+        emit(f"Changes since {arg}:")
+        selected = versions[:position]
+    else:
+        wanted = mode[1:] if mode.startswith("v") else mode
+        selected = [version for version in versions if version[0] == wanted][:1]
+    if not selected:
+        return False
+
+    emit()
+    emit_bytes(read_range(changelog, selected[0][1], selected[-1][2]))
+    return True
+
+
+def search_index(query: str):
+    """
+    Ranked full-text search lines from docs_index.json, or None when there
+    is no index.
+    """
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from pathlib import Path
+    from docs_index import SEARCH_LIMIT, format_result, load_search_index, load_section_index, read_snippet, search
+
+    docs_dir = Path(DOCS_DIR)
+    index = load_search_index(docs_dir)
+    if index is None:
+        return None
+    results = search(index, query, SEARCH_LIMIT, load_section_index(docs_dir))
+    return [format_result(result, read_snippet(docs_dir, result["file"], result["offset"])) for result in results]
+
+
+def grep_topics(query: str) -> list:
+    """Topics whose file contains query, ignoring case (the helper's grep -ril fallback)."""
+    needle = query.lower().encode("utf-8")
+    matches = []
+    for root, _dirs, files in os.walk(DOCS_DIR):
+        for name in files:
+            if name.endswith(".md"):
+                try:
+                    with open(os.path.join(root, name), "rb") as f:
+                        if needle in f.read().lower():
+                            matches.append(name[:-3])
+                except OSError:
+                    pass
+    return sorted(matches)
+
+
+def read_doc(topic: str) -> None:
+    # Split "topic#section"; an empty section (or "toc") shows the table of contents
+    want_section = "#" in topic
+    topic, _, section = topic.partition("#")
+
+    # Strip .md extension if user included it
+    if topic.endswith(".md"):
+        topic = topic[:-3]
+
+    # "changelog last 5", "changelog since 1.0.80" or "changelog 1.0.84"
+    words = topic.split(None, 2)
+    if len(words) > 1 and words[0] == "changelog" and topic[len("changelog")].isspace():
+        mode, arg = (words[1:] + [""])[:2]
+        print_doc_header()
+        report_freshness()
+        maybe_background_refresh()
+        emit()
+        if not read_changelog(mode, arg.strip()):
+            emit("Usage: /docs changelog last <N> | /docs changelog since <version> | /docs changelog <version>")
+        emit()
+        emit("📖 Official source: https://github.com/anthropics/claude-code/blob/main/CHANGELOG.md")
+        return
+
+    doc_path = os.path.join(DOCS_DIR, f"{topic}.md")
+    if os.path.isfile(doc_path):
+        print_doc_header()
+
+        # Serve the local copy right away; any sync happens in the background
+        report_freshness()
+        maybe_background_refresh()
+        emit()
+
+        section_anchor = ""
+        if want_section:
+            found = None
+            if section and section != "toc":
+                found = print_section(topic, doc_path, section)
+            if found is not None:
+                section_anchor = found
+            else:
+                if section and section != "toc":
+                    emit(f"Section '{section}' not found in {topic}. Available sections:")
+                else:
+                    emit(f"Sections in {topic}:")
+                emit()
+                print_toc(topic)
+                emit()
+                emit(f"Try: /docs {topic}#<section> to read one section, or /docs {topic} for the whole page")
+        else:
+            with open(doc_path, "rb") as f:
+                emit_bytes(f.read())
+        emit()
+        if topic == "changelog":
+            emit("📖 Official source: https://github.com/anthropics/claude-code/blob/main/CHANGELOG.md")
+        else:
+            print_links(topic, section_anchor)
+            page_anchor = f"#{section_anchor}" if section_anchor else ""
+            emit(f"📖 Official page: https://docs.anthropic.com/en/docs/claude-code/{topic}{page_anchor}")
+        return
+
+    # Always show search interface - never error messages
+    print_doc_header()
+    emit(f"🔍 Searching for: {topic}")
+    emit()
+
+    import re
+    keywords = [word for word in re.findall(r"[a-zA-Z0-9_-]+", topic) if word not in KEYWORD_STOPWORDS]
+    if keywords:
+        topics = list_topics()
+        pattern = re.compile("|".join(re.escape(word) for word in keywords), re.I)
+        matches = [name for name in topics if pattern.search(name)]
+        # Ranked matches inside the documents themselves
+        content_matches = search_index(" ".join(keywords)) or []
+
+        if matches or content_matches:
+            if matches:
+                emit("Found these related topics:")
+                for name in matches:
+                    emit(f"  • {name}")
+                emit()
+                # Pages linked with those, from the link graph
+                linked = linked_topics(matches)
+                if linked:
+                    emit("Linked with these topics:")
+                    for name in linked:
+                        emit(f"  • {name}")
+                    emit()
+            if content_matches:
+                emit("Found in documentation content:")
+                for line in content_matches:
+                    emit(line)
+                emit()
+            emit("Try: /docs <topic> to read a specific document")
+        else:
+            emit("No exact matches found. Here are all available topics:")
+            columnate(topics)
+    else:
+        emit("Available topics:")
+        columnate(list_topics())
+    emit()
+    emit("💡 Tip: Search inside all docs with: /docs search <terms>")
+
+
+def search_docs(query: str) -> None:
+    print_doc_header()
+
+    if not query:
+        emit("Usage: /docs search <terms>")
+        return
+
+    emit(f"🔍 Searching documentation for: {query}")
+    emit()
+
+    results = search_index(query)
+    if results:
+        for line in results:
+            emit(line)
+    else:
+        # No index (or no match in it) - fall back to a plain substring search over the files
+        matches = grep_topics(query)
+        if matches:
+            for name in matches:
+                emit(f"  • {name}")
+        else:
+            emit("No matches found.")
+    emit()
+    emit("Try: /docs <topic> or /docs <topic>#<section> to read a specific document")
+
+
+def list_docs() -> None:
+    print_doc_header()
+
+    # Refresh in the background; the list below comes from the local copy
+    maybe_background_refresh()
+
+    emit("Available documentation topics:")
+    emit()
+    columnate(list_topics())
+    emit()
+    emit("Usage: /docs <topic> or /docs -t to check freshness")
+
+
+def whats_new_lines(digest: dict, now: int) -> list:
+    """The helper's rendering of docs/whats_new.json (the five most recent runs)."""
+    from datetime import datetime, timezone
+
+    def age(date: str) -> str:
+        # jq's fromdateiso8601 only accepts "YYYY-MM-DDTHH:MM:SSZ"
+        if len(date) != 20 or date[4::3] != "--T::Z":
+            raise ValueError(f"unexpected date {date!r}")
+        fields = (date[0:4], date[5:7], date[8:10], date[11:13], date[14:16], date[17:19])
+        secs = now - int(datetime(*map(int, fields), tzinfo=timezone.utc).timestamp())
+        if secs < 3600:
+            return f"{secs // 60}m ago"
+        if secs < 86400:
+            return f"{secs // 3600}h ago"
+        return f"{secs // 86400}d ago"
+
+    def topic(name: str) -> str:
+        return name[:-3] if name.endswith(".md") else name
+
+    runs = digest["runs"]
+    if not runs:
+        return ["No recent documentation updates found.", ""]
+    lines = []
+    for run in runs[:5]:
+        lines.append(f"• {age(run['date'])}:")
+        for added in run["added"]:
+            lines.append(f"  ➕ {topic(added['file'])} (new): {added['url']}")
+        for removed in run["removed"]:
+            lines.append(f"  ➖ {topic(removed)} (removed)")
+        for updated in run["updated"]:
+            line = f"  📄 {topic(updated['file'])}"
+            if updated.get("added_lines") is not None:
+                line += f" (+{updated['added_lines']} -{updated['removed_lines']} lines)"
+            if updated.get("url"):
+                line += f": {updated['url']}"
+            lines.append(line)
+            lines.extend(f"      + section: {heading}" for heading in updated.get("headings_added") or [])
+            lines.extend(f"      - section: {heading}" for heading in updated.get("headings_removed") or [])
+            lines.extend(f"      {changed}" for changed in updated.get("lines") or [])
+        lines.append("")
+    return lines
+
+
+def whats_new() -> int:
+    # Without the digest the helper lists recent doc commits from git
+    digest = load_json(WHATS_NEW)
+    if digest is None:
+        return FALLBACK_STATUS
+
+    import time
+    print_doc_header()
+
+    # Serve the local digest immediately; updates are pulled in the background
+    report_freshness()
+    maybe_background_refresh()
+    emit()
+    emit("📚 Recent documentation updates:")
+    emit()
+    try:
+        lines = whats_new_lines(digest, int(time.time()))
+    except (KeyError, TypeError, ValueError):
+        lines = ["No recent documentation updates found."]
+    for line in lines:
+        emit(line)
+
+    emit("📎 Full changelog: https://github.com/wgs4/claude-code-docs/commits/main/docs")
+    emit("📚 COMMUNITY MIRROR - NOT AFFILIATED WITH ANTHROPIC")
+    return 0
+
+
+def run_helper(*args: str) -> int:
+    """Run the shell helper (for what needs git), with its output going straight to ours."""
+    import subprocess
+    flush()
+    return subprocess.call(["bash", HELPER, *args])
+
+
+def query(argv: list) -> int:
+    """Dispatch like the helper's main command handling."""
+    full_args = " ".join(argv)
+
+    # -t / --check: the helper syncs with GitHub, then the rest is answered here
+    for flag in ("-t", "--check"):
+        if full_args == flag or (full_args.startswith(flag) and full_args[len(flag)].isspace()):
+            status = run_helper("freshness")
+            if status != 0:
+                return status
+            remaining = full_args[len(flag):].lstrip()
+            if not remaining:
+                return 0
+            # The freshness report is out: from here on the helper answers
+            # only what is left, never the whole request again
+            import re
+            emit()
+            flush()
+            try:
+                if re.match(r"what.?s?\s?new.*$", remaining, re.S):
+                    if whats_new() == FALLBACK_STATUS:
+                        OUTPUT.clear()
+                        return run_helper(remaining)
+                else:
+                    read_doc(sanitize_input(remaining))
+            except Exception as e:
+                print(f"docs_query: {e!r}", file=sys.stderr)
+                OUTPUT.clear()
+                return run_helper(remaining)
+            return 0
+
+    command = argv[0] if argv else ""
+    if command in ("hook-check", "background-refresh", "uninstall", "freshness"):
+        return FALLBACK_STATUS
+    if command == "search":
+        search_docs(sanitize_input(" ".join(argv[1:])))
+    elif command in ("whats-new", "whats", "what"):
+        if "new" in " ".join(argv[1:]) or mentions_whats_new(full_args):
+            return whats_new()
+        # Just "what" without "new" - treat as doc lookup
+        read_doc(sanitize_input(argv[1] if len(argv) > 1 else ""))
+    elif command == "":
+        list_docs()
+    elif mentions_whats_new(full_args):
+        return whats_new()
+    else:
+        read_doc(sanitize_input(command))
+    return 0
+
+
+def flush() -> None:
+    global output_written
+    sys.stdout.flush()
+    output_written = True
+    sys.stdout.buffer.write(b"".join(OUTPUT))
+    sys.stdout.buffer.flush()
+    OUTPUT.clear()
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    try:
+        status = query(argv)
+    except Exception as e:
+        print(f"docs_query: {e!r}", file=sys.stderr)
+        if output_written:
+            # The helper would print it all again
+            return 1
+        # Nothing of ours has been printed yet: let the helper answer instead
+        return FALLBACK_STATUS
+    if status != FALLBACK_STATUS:
+        try:
+            flush()
+        except BrokenPipeError:
+            pass
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+On-disk work queue for the documentation fetcher.
+
+While a run is in progress the checkpoint records every discovered page,
+the manifest entry of each page that is done (its content is already in
+docs/.staging) and the failures seen so far. A run that dies before it
+publishes leaves the checkpoint in the "running" state, and the next run
+reuses the completed pages instead of downloading them again. Failures
+outlive the run that saw them so the next run fetches those pages first
+(or only those, with --only-failed), and so do the time each page was
+last checked, which the adaptive schedule polls against, and the HTTP
+validators (ETag, Last-Modified) its next request is made conditional on.
+None of this is published: the manifest only changes with the documents.
+"""
+
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from docs_io import atomic_write
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_FILE = "fetch_checkpoint.json"
+CHECKPOINT_VERSION = 1
+CHECKPOINT_INTERVAL = 2.0         # seconds between checkpoint writes while pages complete
+RESUME_MAX_AGE = timedelta(hours=6)  # older interrupted runs start over unless --resume is given
+
+
+class FetchCheckpoint:
+    """
+    Pages are keyed by their URL path; the changelog uses the key "changelog"
+    (the same names as fetch_metadata's failed_pages).
+    """
+
+    def __init__(self, path: Path, state: Optional[dict] = None):
+        self.path = path
+        state = state or {}
+        self.status: str = state.get("status", "complete")
+        self.started: Optional[str] = state.get("started")
+        self.pages: Dict[str, Optional[str]] = state.get("pages", {})
+        self.completed: Dict[str, dict] = state.get("completed", {})
+        self.failed: Dict[str, dict] = state.get("failed", {})
+        self.checked: Dict[str, str] = state.get("checked", {})
+        self.validators: Dict[str, dict] = state.get("validators", {})
+        self.full_sweep: bool = state.get("full_sweep", False)
+        self.last_full_sweep: Optional[str] = state.get("last_full_sweep")
+        self.last_saved = 0.0
+
+    @classmethod
+    def load(cls, docs_dir: Path) -> "FetchCheckpoint":
+        """Read the checkpoint next to the docs; a missing or unreadable one is empty."""
+        path = docs_dir / CHECKPOINT_FILE
+        try:
+            state = json.loads(path.read_text())
+            if state.get("version") != CHECKPOINT_VERSION:
+                raise ValueError(f"unsupported checkpoint version {state.get('version')}")
+            return cls(path, state)
+        except FileNotFoundError:
+            return cls(path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable fetch checkpoint: {e}")
+            return cls(path)
+
+    def interrupted(self) -> bool:
+        """True when the last run stopped before publishing its results."""
+        return self.status == "running" and self.started is not None
+
+    def age(self) -> timedelta:
+        try:
+            return datetime.now() - datetime.fromisoformat(self.started)
+        except (TypeError, ValueError):
+            return timedelta.max
+
+    def start(self, started: datetime, full_sweep: bool = False) -> None:
+        """Begin a new run: forget completed pages but keep the failure and check history."""
+        self.status = "running"
+        self.started = started.isoformat()
+        self.full_sweep = full_sweep
+        self.pages = {}
+        self.completed = {}
+        self.save(force=True)
+
+    def set_pages(self, pages: Dict[str, Optional[str]]) -> None:
+        """Record the pages (and sitemap lastmods) this run is working through."""
+        self.pages = dict(pages)
+        self.save(force=True)
+
+    def pending(self) -> List[str]:
+        return [page for page in self.pages if page not in self.completed]
+
+    def mark_checked(self, page: str) -> None:
+        """The page is known to be current as of now (fetched, 304, or an older sitemap lastmod)."""
+        self.checked[page] = datetime.now().isoformat()
+
+    def set_validators(self, page: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        """Remember the validators of the page's current copy (a response without any forgets them)."""
+        validators = {key: value for key, value in (("etag", etag), ("last_modified", last_modified)) if value}
+        if validators:
+            self.validators[page] = validators
+        else:
+            self.validators.pop(page, None)
+
+    def mark_completed(self, page: str, entry: dict) -> None:
+        self.completed[page] = entry
+        self.failed.pop(page, None)
+        self.mark_checked(page)
+        self.save()
+
+    def mark_failed(self, page: str, error: str, shrunk_hash: Optional[str] = None) -> None:
+        """
+        Record a failed page. shrunk_hash identifies a body rejected for being
+        much smaller than the previous version; how many runs in a row served
+        that same body is counted in shrunk_runs.
+        """
+        previous = self.failed.get(page, {})
+        self.failed[page] = {
+            "attempts": previous.get("attempts", 0) + 1,
+            "first_failed": previous.get("first_failed", datetime.now().isoformat()),
+            "last_failed": datetime.now().isoformat(),
+            "error": error[:500],
+        }
+        if shrunk_hash:
+            repeated = previous.get("shrunk_hash") == shrunk_hash
+            self.failed[page]["shrunk_hash"] = shrunk_hash
+            self.failed[page]["shrunk_runs"] = previous.get("shrunk_runs", 0) + 1 if repeated else 1
+        self.save()
+
+    def repeated_shrink(self, page: str, runs: int) -> Optional[str]:
+        """Hash of the smaller body rejected for page on at least the last `runs` runs, if any."""
+        info = self.failed.get(page, {})
+        return info.get("shrunk_hash") if info.get("shrunk_runs", 0) >= runs else None
+
+    def finish(self, failed_pages: Iterable[str]) -> None:
+        """The run is published: only the failure history of still-failing pages is kept."""
+        still_failing = set(failed_pages)
+        self.failed = {page: info for page, info in self.failed.items() if page in still_failing}
+        if self.pages:
+            # Forget pages that are no longer published
+            self.checked = {page: when for page, when in self.checked.items() if page in self.pages}
+            self.validators = {page: value for page, value in self.validators.items() if page in self.pages}
+        if self.full_sweep:
+            self.last_full_sweep = self.started
+        self.full_sweep = False
+        self.status = "complete"
+        self.pages = {}
+        self.completed = {}
+        self.save(force=True)
+
+    def save(self, force: bool = False) -> None:
+        """Write the checkpoint, at most every CHECKPOINT_INTERVAL seconds unless forced."""
+        now = time.monotonic()
+        if not force and now - self.last_saved < CHECKPOINT_INTERVAL:
+            return
+        self.last_saved = now
+        state = {
+            "version": CHECKPOINT_VERSION,
+            "status": self.status,
+            "started": self.started,
+            "pages": self.pages,
+            "completed": self.completed,
+            "failed": self.failed,
+            "checked": self.checked,
+            "validators": self.validators,
+            "full_sweep": self.full_sweep,
+            "last_full_sweep": self.last_full_sweep,
+        }
+        try:
+            atomic_write(self.path, json.dumps(state, indent=1) + "\n")
+        except OSError as e:
+            logger.warning(f"Failed to save fetch checkpoint: {e}")
@@ -4,11 +4,12 @@ Improved Claude Code documentation fetcher with better robustness.
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import time
 from pathlib import Path
-from typing import List, Tuple, Set, Optional
+from typing import Any, Callable, List, Tuple, Set, Dict, Iterator, Optional, NamedTuple, Sequence
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 import sys
 import xml.etree.ElementTree as ET
 from urllib.parse import urlparse
@@ -17,6 +18,20 @@ import hashlib
 import os
 import re
 import random
+import argparse
+import signal
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from docs_history import HISTORY_FILE, OBJECTS_DIR, load_history, update_history, update_whats_new
+from docs_index import update_changelog_index, update_search_index, update_section_index
+from docs_io import STAGING_DIR, StagedWriter, atomic_write
+from docs_links import update_link_graph
+from fetch_checkpoint import CHECKPOINT_FILE, RESUME_MAX_AGE, FetchCheckpoint
+from fetch_metrics import elapsed_ms, metrics
+from fetch_schedule import FRESHNESS_SLA_HOURS, FULL_SWEEP_DAYS, PollSchedule, as_datetime
+from fetch_scheduler import RequestScheduler, parse_retry_after
+from fetch_sources import FILENAME_PREFIXES, Source, SourceFile, load_sources, select_sources
+from fetch_watch import WATCH_INTERVAL, WatchStatus, next_delay, start_status_server
 
 # Configure logging
 logging.basicConfig(
@@ -26,31 +41,127 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Sitemap URLs to try (in order of preference)
-SITEMAP_URLS = [
-    "https://docs.anthropic.com/sitemap.xml",
-    "https://docs.anthropic.com/sitemap_index.xml",
-    "https://anthropic.com/sitemap.xml"
-]
 MANIFEST_FILE = "docs_manifest.json"
 
-# Base URL will be discovered from sitemap
-# No longer using global variable
+# Run telemetry (timings, counters) is kept out of the tracked manifest so that
+# a run in which nothing changed leaves the repository untouched
+METADATA_FILE = "fetch_metadata.json"
+
+# What a source keeps in its output directory between runs without committing
+# it (.gitignore): CI caches these for every source (--print-paths state)
+LOCAL_STATE = (STAGING_DIR, CHECKPOINT_FILE, METADATA_FILE, OBJECTS_DIR.parts[0], HISTORY_FILE)
+
+# Per-file fields that describe the transport or a run, not the content. They
+# are kept in the (cached, untracked) checkpoint; older manifests that still
+# carry them are not rewritten just to drop them.
+VOLATILE_FILE_FIELDS = ("etag", "last_modified", "stale")
+
+# Sitemap parsing
+SITEMAP_CHUNK_SIZE = 64 * 1024  # bytes fed to the incremental parser at a time
+PAGE_CHUNK_SIZE = 64 * 1024     # bytes of a page body read, hashed and spooled at a time
+MAX_SITEMAP_DEPTH = 2  # how many levels of sitemap indexes to follow
+
+# Brotli is decoded by urllib3 only when a brotli module is installed,
+# so it is only advertised in that case
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = 'br, gzip, deflate'
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = 'br, gzip, deflate'
+    except ImportError:
+        ACCEPT_ENCODING = 'gzip, deflate'
 
-# Headers to bypass caching and identify the script
+# Headers to identify the script and ask for compressed bodies. Caches must
+# revalidate (cheap with ETags) but may still serve the stored body on a 304.
 HEADERS = {
     'User-Agent': 'Claude-Code-Docs-Fetcher/3.0',
-    'Cache-Control': 'no-cache, no-store, must-revalidate',
-    'Pragma': 'no-cache',
-    'Expires': '0'
+    'Accept-Encoding': ACCEPT_ENCODING,
+    'Cache-Control': 'no-cache',
 }
 
+# Content validation
+VALIDATION_PREFIX_CHARS = 16384  # markdown structure is checked in this prefix only
+VALIDATION_LINES = 50            # ... and within its first lines
+MIN_CONTENT_LENGTH = 50
+MIN_SHRINK_CHECK_SIZE = 2048     # smaller pages may legitimately change a lot
+MAX_SHRINK_RATIO = 0.5           # reject bodies under half the previous size
+SHRINK_CONFIRM_RUNS = 3          # ... unless the same smaller body is served on this many runs in a row
+
+# A line counts as markdown if it contains any of these (headers, code, lists,
+# links, emphasis, quotes); one match per line
+MARKDOWN_LINE_RE = re.compile(r'^[^\n]*?(?:# |```|- |\* |1\. |\[|\*\*|_|> )', re.M)
+CODE_FENCE_RE = re.compile(rb'^ {0,3}(`{3,}|~{3,})([^\n]*)$', re.M)
+DOC_PATTERN_RE = re.compile(r'installation|usage|example|api|configuration|claude|code', re.I)
+
+# HTTP connection tuning
+CONNECT_TIMEOUT = 5   # seconds to establish a connection
+READ_TIMEOUT = 30     # seconds between bytes once connected
+REQUEST_TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+POOL_CONNECTIONS = 4  # hosts kept warm: docs site, sitemap fallbacks, GitHub raw
+
 # Retry configuration
 MAX_RETRIES = 3
 RETRY_DELAY = 2  # initial delay in seconds
 MAX_RETRY_DELAY = 30  # maximum delay in seconds
 RATE_LIMIT_DELAY = 0.5  # seconds between requests
 
+# Concurrency configuration
+DEFAULT_CONCURRENCY = 1  # serial fetching unless --concurrency is given
+FILE_WORKERS = 2  # workers for declared files (changelogs), next to the page workers
+DEFAULT_RATE_LIMIT = 1 / RATE_LIMIT_DELAY  # starting and maximum requests per second per host
+
+
+class FetchResult(NamedTuple):
+    """
+    Outcome of fetching one document. The body is either held in content
+    (changelog) or was streamed to spool_path with its content_hash (pages);
+    both are None when the server answered 304.
+    """
+    filename: str
+    content: Optional[str]
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    spool_path: Optional[Path] = None
+    content_hash: Optional[str] = None
+
+    @property
+    def not_modified(self) -> bool:
+        return self.content is None and self.spool_path is None
+
+
+class SpooledBody(NamedTuple):
+    """A response body written to disk while it was hashed and checked."""
+    path: Path
+    size: int
+    content_hash: str
+    prefix: str            # first VALIDATION_PREFIX_CHARS bytes, decoded
+    unclosed_fence: bool
+
+
+def conditional_headers(entry: dict, extra: Tuple[Tuple[str, str], ...] = ()) -> dict:
+    """Build request headers (with a source's extra headers) that revalidate a previously fetched file."""
+    headers = dict(HEADERS)
+    headers.update(extra)
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def get_validators(docs_dir: Path, checkpoint: FetchCheckpoint, manifest: dict, page: str, filename: str) -> dict:
+    """
+    Return the stored ETag/Last-Modified for a page: from the checkpoint, or
+    from its manifest entry when it was written before validators moved there.
+    Only files that still exist locally are revalidated; a 304 for a missing file would lose it.
+    """
+    if not (docs_dir / filename).exists():
+        return {}
+    entry = checkpoint.validators.get(page) or manifest.get("files", {}).get(filename, {})
+    return {key: entry[key] for key in ("etag", "last_modified") if entry.get(key)}
+
 
 def load_manifest(docs_dir: Path) -> dict:
     """Load the manifest of previously fetched files."""
@@ -67,11 +178,43 @@ def load_manifest(docs_dir: Path) -> dict:
     return {"files": {}, "last_updated": None}
 
 
-def save_manifest(docs_dir: Path, manifest: dict) -> None:
-    """Save the manifest of fetched files."""
-    manifest_path = docs_dir / MANIFEST_FILE
-    manifest["last_updated"] = datetime.now().isoformat()
-    
+def load_fetch_metadata(docs_dir: Path) -> dict:
+    """Load telemetry from the previous run, if this checkout has any."""
+    try:
+        return json.loads((docs_dir / METADATA_FILE).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def save_fetch_metadata(docs_dir: Path, metadata: dict) -> None:
+    """Write run telemetry next to the docs (untracked, uploaded by CI as an artifact)."""
+    try:
+        atomic_write(docs_dir / METADATA_FILE, json.dumps(metadata, indent=2) + "\n")
+    except OSError as e:
+        logger.warning(f"Failed to save fetch metadata: {e}")
+
+
+def manifest_signature(manifest: dict) -> dict:
+    """The parts of a manifest that matter to readers: file set, hashes and URLs."""
+    signature = {k: v for k, v in manifest.items() if k != "last_updated"}
+    signature["files"] = {
+        filename: {k: v for k, v in entry.items() if k not in VOLATILE_FILE_FIELDS}
+        for filename, entry in manifest.get("files", {}).items()
+    }
+    return signature
+
+
+def save_manifest(writer: StagedWriter, manifest: dict, previous: dict, output_dir: str = "docs",
+                  run_started: Optional[datetime] = None) -> bool:
+    """
+    Stage the manifest of fetched files; it is moved into place last on commit.
+    output_dir is the source's directory in the repository, for base_url.
+    last_updated is when the run started (run_started), not when it saved:
+    the next run's lastmod shortcut compares against it, and a page changed
+    on the server while this run was in progress must not be skipped.
+    Returns False (and stages nothing) when no hash, file or URL changed since
+    `previous`, so quiet runs do not produce a commit.
+    """
     # Get GitHub repository from environment or use default
     github_repo = os.environ.get('GITHUB_REPOSITORY', 'ericbuess/claude-code-docs')
     github_ref = os.environ.get('GITHUB_REF_NAME', 'main')
@@ -86,17 +229,26 @@ def save_manifest(docs_dir: Path, manifest: dict) -> None:
         logger.warning(f"Invalid ref format: {github_ref}, using default")
         github_ref = 'main'
     
-    manifest["base_url"] = f"https://raw.githubusercontent.com/{github_repo}/{github_ref}/docs/"
+    manifest["base_url"] = f"https://raw.githubusercontent.com/{github_repo}/{github_ref}/{output_dir}/"
     manifest["github_repository"] = github_repo
     manifest["github_ref"] = github_ref
     manifest["description"] = "Claude Code documentation manifest. Keys are filenames, append to base_url for full URL."
-    manifest_path.write_text(json.dumps(manifest, indent=2))
+    for entry in manifest.get("files", {}).values():
+        for field in VOLATILE_FILE_FIELDS:
+            entry.pop(field, None)
+    
+    if manifest_signature(manifest) == manifest_signature(previous):
+        return False
+    
+    manifest["last_updated"] = (run_started or datetime.now()).isoformat()
+    writer.write(MANIFEST_FILE, json.dumps(manifest, indent=2))
+    return True
 
 
-def url_to_safe_filename(url_path: str) -> str:
+def url_to_safe_filename(url_path: str, prefixes: Tuple[str, ...] = FILENAME_PREFIXES) -> str:
     """Convert a URL path to a safe filename that preserves hierarchy only when needed."""
-    # Remove any known prefix patterns
-    for prefix in ['/en/docs/claude-code/', '/docs/claude-code/', '/claude-code/']:
+    # Remove the source's prefix
+    for prefix in prefixes:
         if prefix in url_path:
             path = url_path.split(prefix)[-1]
             break
@@ -119,50 +271,163 @@ def url_to_safe_filename(url_path: str) -> str:
     return safe_name
 
 
-def discover_sitemap_and_base_url(session: requests.Session) -> Tuple[str, str]:
+def page_path_from_url(url: str, source: Source) -> Optional[str]:
+    """Return the normalized page path for a URL (or path) of the source's tree, or None to skip it."""
+    # Check if URL matches the source's patterns (e.g. English Claude Code docs)
+    if not any(pattern in url for pattern in source.include):
+        return None
+    
+    path = urlparse(url).path
+    
+    # Remove any file extension
+    if path.endswith('.html'):
+        path = path[:-5]
+    elif path.endswith('/'):
+        path = path[:-1]
+    
+    # Skip certain types of pages
+    if any(skip in path for skip in source.exclude):
+        return None
+    return path
+
+
+def iter_sitemap_entries(session: requests.Session, sitemap_url: str) -> Iterator[Tuple[str, str, Optional[str]]]:
+    """
+    Stream a sitemap and yield (kind, loc, lastmod) tuples, where kind is
+    'url' for pages and 'sitemap' for children of a sitemap index.
+    The document is parsed incrementally and each entry is discarded once read,
+    so memory stays flat regardless of sitemap size.
+    """
+    started = time.perf_counter()
+    try:
+        response = session.get(sitemap_url, headers=HEADERS, timeout=REQUEST_TIMEOUT, stream=True)
+    except requests.exceptions.RequestException as e:
+        metrics.record("sitemap", sitemap_url, ttfb_ms=elapsed_ms(started), error=str(e))
+        raise
+    # Body download and parsing are interleaved, so download_ms includes parsing
+    record = metrics.record("sitemap", sitemap_url, status=response.status_code,
+                            ttfb_ms=round(response.elapsed.total_seconds() * 1000, 1), bytes=0, wire_bytes=0)
+    body_started = time.perf_counter()
+    try:
+        response.raise_for_status()
+        
+        parser = ET.XMLPullParser(events=('start', 'end'))
+        root = None
+        tail = b''
+        for chunk in response.iter_content(chunk_size=SITEMAP_CHUNK_SIZE):
+            record["bytes"] += len(chunk)
+            # Refuse DTDs/entities outright to prevent XXE and entity expansion attacks
+            window = tail + chunk
+            if b'<!DOCTYPE' in window or b'<!ENTITY' in window:
+                raise ValueError(f"Refusing sitemap with DTD: {sitemap_url}")
+            tail = chunk[-16:]
+            
+            parser.feed(chunk)
+            for event, elem in parser.read_events():
+                if event == 'start':
+                    if root is None:
+                        root = elem
+                    continue
+                
+                # Tags may or may not carry the sitemap namespace
+                tag = elem.tag.rsplit('}', 1)[-1]
+                if tag not in ('url', 'sitemap'):
+                    continue
+                
+                loc = lastmod = None
+                for child in elem:
+                    child_tag = child.tag.rsplit('}', 1)[-1]
+                    if child_tag == 'loc' and child.text:
+                        loc = child.text.strip()
+                    elif child_tag == 'lastmod' and child.text:
+                        lastmod = child.text.strip()
+                
+                # Entries are direct children of the root; drop them once read
+                root.clear()
+                if loc:
+                    yield tag, loc, lastmod
+        parser.close()
+    except Exception as e:
+        record["error"] = str(e)
+        raise
+    finally:
+        record["download_ms"] = elapsed_ms(body_started)
+        record["wire_bytes"] = wire_bytes(response)
+        response.close()
+
+
+def discover_pages(session: requests.Session, concurrency: int, sitemap_urls: Sequence[str],
+                   page_filter: Callable[[str], Optional[str]],
+                   executor: Optional[ThreadPoolExecutor] = None) -> Tuple[str, str, Dict[str, Optional[str]]]:
     """
-    Discover the sitemap URL and extract the base URL from it.
+    Discover the sitemap, base URL and all documentation pages in one pass.
+    Sitemap indexes are followed (children fetched in parallel). The candidates in
+    sitemap_urls are tried in order; page_filter maps a listed URL to its
+    page path, or None for URLs that are not mirrored.
+    Every sitemap is read on executor (one of `concurrency` workers if none
+    is given), so callers discovering several sources at once can share one.
     
     Returns:
-        Tuple of (sitemap_url, base_url)
+        Tuple of (sitemap_url, base_url, {page_path: lastmod})
     """
-    for sitemap_url in SITEMAP_URLS:
+    if executor is None:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return discover_pages(session, concurrency, sitemap_urls, page_filter, executor)
+    
+    for sitemap_url in sitemap_urls:
         try:
             logger.info(f"Trying sitemap: {sitemap_url}")
-            response = session.get(sitemap_url, headers=HEADERS, timeout=30)
-            if response.status_code == 200:
-                # Extract base URL from the first URL in sitemap
-                # Parse XML safely to prevent XXE attacks
-                try:
-                    # Try with security parameters (Python 3.8+)
-                    parser = ET.XMLParser(forbid_dtd=True, forbid_entities=True, forbid_external=True)
-                    root = ET.fromstring(response.content, parser=parser)
-                except TypeError:
-                    # Fallback for older Python versions
-                    logger.warning("XMLParser security parameters not available, using default parser")
-                    root = ET.fromstring(response.content)
+            pages: Dict[str, Optional[str]] = {}
+            first_url = None
+            total_urls = 0
+            
+            pending = [sitemap_url]
+            for depth in range(MAX_SITEMAP_DEPTH + 1):
+                if not pending:
+                    break
+                children = []
+                
+                def read_sitemap(url: str) -> List[Tuple[str, str, Optional[str]]]:
+                    # Keep only what we need from each entry while streaming
+                    kept = []
+                    for kind, loc, lastmod in iter_sitemap_entries(session, url):
+                        if kind == 'sitemap' or page_filter(loc) or not kept:
+                            kept.append((kind, loc, lastmod))
+                    return kept
                 
-                # Try with namespace first
-                namespace = {'ns': 'http://www.sitemaps.org/schemas/sitemap/0.9'}
-                first_url = None
-                for url_elem in root.findall('.//ns:url', namespace):
-                    loc_elem = url_elem.find('ns:loc', namespace)
-                    if loc_elem is not None and loc_elem.text:
-                        first_url = loc_elem.text
-                        break
+                if len(pending) > 1:
+                    logger.info(f"Following {len(pending)} child sitemaps")
+                results = list(executor.map(read_sitemap, pending))
                 
-                # If no URLs found, try without namespace
-                if not first_url:
-                    for loc_elem in root.findall('.//loc'):
-                        if loc_elem.text:
-                            first_url = loc_elem.text
-                            break
+                for entries in results:
+                    for kind, loc, lastmod in entries:
+                        if kind == 'sitemap':
+                            children.append(loc)
+                            continue
+                        total_urls += 1
+                        if first_url is None:
+                            first_url = loc
+                        path = page_filter(loc)
+                        if path:
+                            # Keep the newest lastmod if a page is listed twice
+                            if path not in pages or (lastmod or '') > (pages[path] or ''):
+                                pages[path] = lastmod
                 
-                if first_url:
-                    parsed = urlparse(first_url)
-                    base_url = f"{parsed.scheme}://{parsed.netloc}"
-                    logger.info(f"Found sitemap at {sitemap_url}, base URL: {base_url}")
-                    return sitemap_url, base_url
+                if children and depth == MAX_SITEMAP_DEPTH:
+                    logger.warning(f"Ignoring {len(children)} sitemaps nested deeper than {MAX_SITEMAP_DEPTH} levels")
+                pending = children
+            
+            if not first_url:
+                continue
+            
+            # Extract base URL from the first URL in sitemap
+            parsed = urlparse(first_url)
+            base_url = f"{parsed.scheme}://{parsed.netloc}"
+            logger.info(f"Found sitemap at {sitemap_url}, base URL: {base_url}")
+            logger.info(f"Discovered {len(pages)} documentation pages")
+            
+            # Sort for a stable processing order
+            return sitemap_url, base_url, dict(sorted(pages.items()))
         except Exception as e:
             logger.warning(f"Failed to fetch {sitemap_url}: {e}")
             continue
@@ -170,286 +435,544 @@ def discover_sitemap_and_base_url(session: requests.Session) -> Tuple[str, str]:
     raise Exception("Could not find a valid sitemap")
 
 
-def discover_claude_code_pages(session: requests.Session, sitemap_url: str) -> List[str]:
+def discover_sources(session: requests.Session, sources: List[Source],
+                     concurrency: int) -> Dict[str, Tuple[str, str, Dict[str, Optional[str]]]]:
     """
-    Dynamically discover all Claude Code documentation pages from the sitemap.
-    Now with better pattern matching flexibility.
+    Discover the pages of every source. Sources listing the same sitemaps
+    share one streaming pass over them (ten locales of one site cost one
+    sitemap download); different sitemaps are read in parallel.
+    All sitemap requests share one executor of `concurrency` workers (the
+    per-sitemap threads only wait for it), so discovery never needs more
+    connections than the session's pool holds, however many sources there are.
+    Returns {source name: (sitemap_url, base_url, {page_path: lastmod})},
+    leaving out sources whose sitemaps could not be read.
     """
-    logger.info("Discovering documentation pages from sitemap...")
+    groups: Dict[Tuple[str, ...], List[Source]] = {}
+    for source in sources:
+        if source.include:
+            groups.setdefault(tuple(source.sitemap_urls), []).append(source)
     
-    try:
-        response = session.get(sitemap_url, headers=HEADERS, timeout=30)
-        response.raise_for_status()
-        
-        # Parse XML sitemap safely
-        try:
-            # Try with security parameters (Python 3.8+)
-            parser = ET.XMLParser(forbid_dtd=True, forbid_entities=True, forbid_external=True)
-            root = ET.fromstring(response.content, parser=parser)
-        except TypeError:
-            # Fallback for older Python versions
-            logger.warning("XMLParser security parameters not available, using default parser")
-            root = ET.fromstring(response.content)
-        
-        # Extract all URLs from sitemap
-        urls = []
-        
-        # Try with namespace first
-        namespace = {'ns': 'http://www.sitemaps.org/schemas/sitemap/0.9'}
-        for url_elem in root.findall('.//ns:url', namespace):
-            loc_elem = url_elem.find('ns:loc', namespace)
-            if loc_elem is not None and loc_elem.text:
-                urls.append(loc_elem.text)
-        
-        # If no URLs found, try without namespace
-        if not urls:
-            for loc_elem in root.findall('.//loc'):
-                if loc_elem.text:
-                    urls.append(loc_elem.text)
-        
-        logger.info(f"Found {len(urls)} total URLs in sitemap")
-        
-        # Filter for ENGLISH Claude Code documentation pages only
-        claude_code_pages = []
-        
-        # Only accept English documentation patterns
-        english_patterns = [
-            '/en/docs/claude-code/',
-        ]
-        
-        for url in urls:
-            # Check if URL matches English pattern specifically
-            if any(pattern in url for pattern in english_patterns):
-                parsed = urlparse(url)
-                path = parsed.path
-                
-                # Remove any file extension
-                if path.endswith('.html'):
-                    path = path[:-5]
-                elif path.endswith('/'):
-                    path = path[:-1]
-                
-                # Skip certain types of pages
-                skip_patterns = [
-                    '/tool-use/',  # Tool-specific pages
-                    '/examples/',  # Example pages
-                    '/legacy/',    # Legacy documentation
-                    '/api/',       # API reference pages
-                    '/reference/', # Reference pages that aren't core docs
-                ]
-                
-                if not any(skip in path for skip in skip_patterns):
-                    claude_code_pages.append(path)
-        
-        # Remove duplicates and sort
-        claude_code_pages = sorted(list(set(claude_code_pages)))
-        
-        logger.info(f"Discovered {len(claude_code_pages)} Claude Code documentation pages")
-        
-        return claude_code_pages
+    def discover(sitemap_urls: Tuple[str, ...]) -> Optional[Tuple[str, str, Dict[str, Optional[str]]]]:
+        members = groups[sitemap_urls]
         
-    except Exception as e:
-        logger.error(f"Failed to discover pages from sitemap: {e}")
-        logger.warning("Falling back to essential pages...")
+        def page_filter(url: str) -> Optional[str]:
+            for source in members:
+                path = page_path_from_url(url, source)
+                if path:
+                    return path
+            return None
         
-        # More comprehensive fallback list
-        return [
-            "/en/docs/claude-code/overview",
-            "/en/docs/claude-code/setup",
-            "/en/docs/claude-code/quickstart",
-            "/en/docs/claude-code/memory",
-            "/en/docs/claude-code/common-workflows",
-            "/en/docs/claude-code/ide-integrations",
-            "/en/docs/claude-code/mcp",
-            "/en/docs/claude-code/github-actions",
-            "/en/docs/claude-code/sdk",
-            "/en/docs/claude-code/troubleshooting",
-            "/en/docs/claude-code/security",
-            "/en/docs/claude-code/settings",
-            "/en/docs/claude-code/hooks",
-            "/en/docs/claude-code/costs",
-            "/en/docs/claude-code/monitoring-usage",
-        ]
-
-
-def validate_markdown_content(content: str, filename: str) -> None:
-    """
-    Validate that content is proper markdown.
+        try:
+            return discover_pages(session, concurrency, sitemap_urls, page_filter, sitemap_executor)
+        except Exception as e:
+            logger.error(f"Failed to discover sitemap for {', '.join(source.name for source in members)}: {e}")
+            return None
+    
+    discoveries = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as sitemap_executor, \
+            ThreadPoolExecutor(max_workers=max(1, min(len(groups), concurrency))) as executor:
+        for sitemap_urls, found in zip(groups, executor.map(discover, groups)):
+            if found is None:
+                continue
+            sitemap_url, base_url, pages = found
+            for source in groups[sitemap_urls]:
+                own_pages = {path: lastmod for path, lastmod in pages.items() if page_path_from_url(path, source)}
+                logger.info(f"{source.name}: {len(own_pages)} pages")
+                discoveries[source.name] = (sitemap_url, base_url, own_pages)
+    return discoveries
+
+
+def validate_markdown_prefix(prefix: str) -> None:
+    """
+    Checks that only need the start of a page, run as soon as it has arrived
+    so that an HTML error page is not downloaded in full.
     Raises ValueError if validation fails.
     """
     # Check for HTML content
-    if not content or content.startswith('<!DOCTYPE') or '<html' in content[:100]:
+    if not prefix or prefix.startswith('<!DOCTYPE') or prefix.find('<html', 0, 100) != -1:
         raise ValueError("Received HTML instead of markdown")
     
-    # Check minimum length
-    if len(content.strip()) < 50:
-        raise ValueError(f"Content too short ({len(content)} bytes)")
-    
-    # Check for common markdown elements
-    lines = content.split('\n')
-    markdown_indicators = [
-        '# ',      # Headers
-        '## ',
-        '### ',
-        '```',     # Code blocks
-        '- ',      # Lists
-        '* ',
-        '1. ',
-        '[',       # Links
-        '**',      # Bold
-        '_',       # Italic
-        '> ',      # Quotes
-    ]
-    
-    # Count markdown indicators
-    indicator_count = 0
-    for line in lines[:50]:  # Check first 50 lines
-        for indicator in markdown_indicators:
-            if line.strip().startswith(indicator) or indicator in line:
-                indicator_count += 1
-                break
+    # Count lines with markdown formatting among the first lines of the prefix
+    end = 0
+    for _ in range(VALIDATION_LINES):
+        end = prefix.find('\n', end) + 1
+        if end == 0:
+            end = len(prefix)
+            break
+    indicator_count = sum(1 for _ in MARKDOWN_LINE_RE.finditer(prefix, 0, end))
     
     # Require at least some markdown formatting
     if indicator_count < 3:
         raise ValueError(f"Content doesn't appear to be markdown (only {indicator_count} markdown indicators found)")
+
+
+def validate_markdown_content(body: SpooledBody, filename: str, previous_size: Optional[int] = None,
+                              confirmed_shrink: Optional[str] = None) -> None:
+    """
+    Validate that a downloaded page is proper markdown and safe to replace the
+    local copy with. Only the bounded prefix is inspected for markdown structure;
+    the code fence state was tracked while the body streamed in, so the cost
+    stays flat as pages grow.
+    Raises ValueError if validation fails.
+    """
+    validate_markdown_prefix(body.prefix)
     
-    # Check for common documentation patterns
-    doc_patterns = ['installation', 'usage', 'example', 'api', 'configuration', 'claude', 'code']
-    content_lower = content.lower()
-    pattern_found = any(pattern in content_lower for pattern in doc_patterns)
+    # Check minimum length (stripping is only needed, and cheap, for short bodies)
+    if body.size < MIN_CONTENT_LENGTH or (
+            body.size <= VALIDATION_PREFIX_CHARS and len(body.prefix.strip()) < MIN_CONTENT_LENGTH):
+        raise ValueError(f"Content too short ({body.size} bytes)")
     
-    if not pattern_found:
+    # A fence left open means the body was cut off mid-transfer
+    if body.unclosed_fence:
+        raise ValueError("Content ends inside a code block (truncated response?)")
+    
+    # Refuse to replace a substantial page with a much smaller one
+    check_shrink(body.size, filename, previous_size, body.content_hash, confirmed_shrink)
+    
+    # Check for common documentation patterns
+    if not DOC_PATTERN_RE.search(body.prefix):
         logger.warning(f"Content for {filename} doesn't contain expected documentation patterns")
 
 
-def fetch_markdown_content(path: str, session: requests.Session, base_url: str) -> Tuple[str, str]:
+class FenceTracker:
+    """Follows whether a ``` or ~~~ code block is open over a document fed in chunks."""
+
+    def __init__(self):
+        self.open_fence: Optional[bytes] = None
+        self.partial = b""
+
+    def feed(self, chunk: bytes) -> None:
+        data = self.partial + chunk
+        cut = data.rfind(b"\n") + 1
+        self._scan(data[:cut])
+        self.partial = data[cut:]
+
+    def close(self) -> bool:
+        """Finish the document; True if a code block is still open."""
+        self._scan(self.partial)
+        self.partial = b""
+        return self.open_fence is not None
+
+    def _scan(self, lines: bytes) -> None:
+        for match in CODE_FENCE_RE.finditer(lines):
+            fence, info = match.group(1), match.group(2)
+            if self.open_fence is None:
+                self.open_fence = fence
+            elif fence[0] == self.open_fence[0] and len(fence) >= len(self.open_fence) and not info.strip():
+                self.open_fence = None
+
+
+class ShrinkError(ValueError):
+    """A body drastically smaller than the previous version; content_hash identifies it across runs."""
+
+    def __init__(self, message: str, content_hash: Optional[str] = None):
+        super().__init__(message)
+        self.content_hash = content_hash
+
+
+def check_shrink(size: int, filename: str, previous_size: Optional[int],
+                 content_hash: Optional[str] = None, confirmed_shrink: Optional[str] = None) -> None:
     """
-    Fetch markdown content with better error handling and validation.
+    Raise ShrinkError if a new body of `size` bytes is drastically smaller than
+    the previous version (previous_size, the local file size in bytes). A page
+    that really did shrink is accepted once the same body (content_hash equal to
+    confirmed_shrink, the one rejected on the previous runs) keeps coming back.
     """
-    markdown_url = f"{base_url}{path}.md"
-    filename = url_to_safe_filename(path)
-    
-    logger.info(f"Fetching: {markdown_url} -> {filename}")
-    
+    if not previous_size or previous_size < MIN_SHRINK_CHECK_SIZE:
+        return
+    if size < previous_size * MAX_SHRINK_RATIO:
+        if content_hash is not None and content_hash == confirmed_shrink:
+            logger.warning(f"{filename} shrank from {previous_size} to {size} bytes on "
+                           f"{SHRINK_CONFIRM_RUNS} runs in a row; accepting the smaller version")
+            return
+        raise ShrinkError(
+            f"Content shrank from {previous_size} to {size} bytes; keeping the previous version",
+            content_hash
+        )
+
+
+def local_size(docs_dir: Path, filename: str) -> Optional[int]:
+    """Size of the current local copy of a document, if any."""
+    try:
+        return (docs_dir / filename).stat().st_size
+    except OSError:
+        return None
+
+
+def create_session(concurrency: int) -> requests.Session:
+    """
+    Create the one session used for the whole run (sitemaps, pages and changelog)
+    so connections stay warm across all of them. The pool holds one connection
+    per worker (page and file workers alike, as both can reach the same host)
+    and failed requests are retried by the fetch loops, not urllib3.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=concurrency + FILE_WORKERS,
+                          max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(HEADERS)
+    return session
+
+
+def wire_bytes(response: requests.Response) -> int:
+    """Bytes read from the connection (before content decoding), if known."""
+    try:
+        return response.raw.tell()
+    except Exception:
+        return 0
+
+
+def spool_body(response: requests.Response, path: Path, check_prefix: bool = True) -> SpooledBody:
+    """
+    Stream a response body to path in PAGE_CHUNK_SIZE pieces, hashing it and
+    tracking code fences on the way, so the page is never held in memory.
+    The markdown prefix checks (check_prefix) run as soon as
+    VALIDATION_PREFIX_CHARS bytes are in.
+    The file is fsynced so it can be staged by a rename; it is removed on error.
+    """
+    digest = hashlib.sha256()
+    fences = FenceTracker()
+    head = b""
+    prefix = None
+    size = 0
+    try:
+        with open(path, 'wb') as f:
+            for chunk in response.iter_content(PAGE_CHUNK_SIZE):
+                digest.update(chunk)
+                fences.feed(chunk)
+                f.write(chunk)
+                size += len(chunk)
+                if prefix is None:
+                    head += chunk
+                    if len(head) >= VALIDATION_PREFIX_CHARS:
+                        prefix = head[:VALIDATION_PREFIX_CHARS].decode('utf-8', errors='ignore')
+                        if check_prefix:
+                            validate_markdown_prefix(prefix)
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        response.close()
+        path.unlink(missing_ok=True)
+        raise
+    if prefix is None:
+        prefix = head.decode('utf-8', errors='ignore')
+    return SpooledBody(path, size, digest.hexdigest(), prefix, fences.close())
+
+
+def timed_get(session: requests.Session, url: str, headers: dict, record: dict,
+              read_body: Optional[Callable[[requests.Response], Any]] = None) -> Tuple[requests.Response, Any]:
+    """
+    GET url and store status, size and timings in a metrics record.
+    ttfb_ms is time until the response headers were parsed (DNS and connect
+    included; requests does not expose them separately), download_ms the
+    remaining time spent reading the body. bytes is the decoded body size,
+    wire_bytes what was transferred before decompression.
+    A 200 body is handed to read_body (which must consume it) when given and
+    its result returned alongside the response; otherwise it is read into memory.
+    """
+    started = time.perf_counter()
+    response = session.get(url, headers=headers, timeout=REQUEST_TIMEOUT, allow_redirects=True, stream=True)
+    ttfb_ms = min(round(response.elapsed.total_seconds() * 1000, 1), elapsed_ms(started))
+    record.update(status=response.status_code, ttfb_ms=ttfb_ms)
+    body = None
+    try:
+        if read_body is not None and response.status_code == 200:
+            body = read_body(response)
+            size = body.size
+        else:
+            size = len(response.content)
+    except ValueError as e:
+        record["error"] = str(e)
+        raise
+    finally:
+        record["download_ms"] = round(elapsed_ms(started) - ttfb_ms, 1)
+    record.update(bytes=size, wire_bytes=wire_bytes(response))
+    return response, body
+
+
+def get_with_retries(session: requests.Session, scheduler: RequestScheduler, url: str,
+                     headers: dict, kind: str, label: str,
+                     read_body: Optional[Callable[[requests.Response], Any]] = None,
+                     source: Optional[str] = None) -> Tuple[requests.Response, dict, Any]:
+    """
+    GET url through the shared scheduler, retrying 429s, 5xx responses and
+    network errors (including ones while reading the body) up to MAX_RETRIES
+    attempts in total.
+    A 429 pauses only url's host for its Retry-After; other failures back off
+    this request with jitter. Returns the final response (any other status,
+    including 304 and 4xx, is left to the caller), its metrics record and
+    what read_body returned for a 200 (see timed_get). Metrics records are
+    tagged with the name of the source the request is made for.
+    """
+    tags = {"source": source} if source else {}
     for attempt in range(MAX_RETRIES):
+        record = metrics.record(kind, url, attempt=attempt + 1, **tags)
+        last_attempt = attempt == MAX_RETRIES - 1
+        record["queue_ms"] = round(scheduler.acquire(url) * 1000, 1)
         try:
-            response = session.get(markdown_url, headers=HEADERS, timeout=30, allow_redirects=True)
-            
-            # Handle specific HTTP errors
-            if response.status_code == 429:  # Rate limited
-                wait_time = int(response.headers.get('Retry-After', 60))
-                logger.warning(f"Rate limited. Waiting {wait_time} seconds...")
-                time.sleep(wait_time)
-                continue
-            
-            response.raise_for_status()
-            
-            # Get content and validate
-            content = response.text
-            validate_markdown_content(content, filename)
-            
-            logger.info(f"Successfully fetched and validated {filename} ({len(content)} bytes)")
-            return filename, content
-            
+            response, body = timed_get(session, url, headers, record, read_body)
         except requests.exceptions.RequestException as e:
-            logger.warning(f"Attempt {attempt + 1}/{MAX_RETRIES} failed for {filename}: {e}")
-            if attempt < MAX_RETRIES - 1:
-                # Exponential backoff with jitter
-                delay = min(RETRY_DELAY * (2 ** attempt), MAX_RETRY_DELAY)
-                # Add jitter to prevent thundering herd
-                jittered_delay = delay * random.uniform(0.5, 1.0)
-                logger.info(f"Retrying in {jittered_delay:.1f} seconds...")
-                time.sleep(jittered_delay)
-            else:
-                raise Exception(f"Failed to fetch {filename} after {MAX_RETRIES} attempts: {e}")
+            scheduler.record(url, None)
+            record["error"] = str(e)
+            error = e
+        else:
+            if response.status_code == 429:  # Rate limited: the next acquire() waits out Retry-After
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                scheduler.record(url, 429, retry_after=retry_after)
+                error = f"HTTP 429, Retry-After {retry_after:g}s"
+                record.update(error=error, sleep_ms=round(retry_after * 1000, 1), sleep_reason="rate_limited")
+                logger.warning(f"Attempt {attempt + 1}/{MAX_RETRIES} rate limited for {label}; "
+                               f"pausing {urlparse(url).netloc} for {retry_after:g} seconds")
+                if last_attempt:
+                    break
+                continue
+            scheduler.record(url, response.status_code, latency=record["ttfb_ms"] / 1000)
+            if response.status_code < 500:
+                return response, record, body
+            error = f"HTTP {response.status_code}"
+            record["error"] = error
         
-        except ValueError as e:
-            logger.error(f"Content validation failed for {filename}: {e}")
-            raise
+        logger.warning(f"Attempt {attempt + 1}/{MAX_RETRIES} failed for {label}: {error}")
+        if not last_attempt:
+            # Exponential backoff with jitter to prevent thundering herd
+            delay = min(RETRY_DELAY * (2 ** attempt), MAX_RETRY_DELAY)
+            jittered_delay = delay * random.uniform(0.5, 1.0)
+            logger.info(f"Retrying in {jittered_delay:.1f} seconds...")
+            record.update(sleep_ms=round(jittered_delay * 1000, 1), sleep_reason="backoff")
+            time.sleep(jittered_delay)
+    
+    raise Exception(f"Failed to fetch {label} after {MAX_RETRIES} attempts: {error}")
+
 
+def not_modified_result(filename: str, response: requests.Response, validators: dict) -> FetchResult:
+    """FetchResult for a 304, keeping the previous validators the server did not repeat."""
+    return FetchResult(
+        filename, None,
+        response.headers.get('ETag', validators.get("etag")),
+        response.headers.get('Last-Modified', validators.get("last_modified"))
+    )
 
-def content_has_changed(content: str, old_hash: str) -> bool:
-    """Check if content has changed based on hash."""
-    new_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
-    return new_hash != old_hash
 
+def validate_text_content(body: SpooledBody, filename: str, previous_size: Optional[int] = None,
+                          confirmed_shrink: Optional[str] = None) -> None:
+    """Checks for sources whose bodies are not markdown: not empty, and not much smaller than before."""
+    if body.size < MIN_CONTENT_LENGTH:
+        raise ValueError(f"Content too short ({body.size} bytes)")
+    check_shrink(body.size, filename, previous_size, body.content_hash, confirmed_shrink)
 
-def fetch_changelog(session: requests.Session) -> Tuple[str, str]:
+
+def fetch_markdown_content(source: Source, path: str, session: requests.Session, base_url: str,
+                           scheduler: RequestScheduler, spool_dir: Path,
+                           validators: Optional[dict] = None,
+                           previous_size: Optional[int] = None,
+                           confirmed_shrink: Optional[str] = None) -> FetchResult:
     """
-    Fetch Claude Code changelog from GitHub repository.
-    Returns tuple of (filename, content).
+    Fetch a page of a source with better error handling and validation.
+    Safe to call from worker threads; every attempt is paced by the shared scheduler.
+    The body is streamed into spool_dir and hashed once on the way; the
+    result carries the spool file for store_fetch_result() to stage or drop.
+    When validators from a previous run are given the request is conditional,
+    and a 304 response is returned without downloading or validating the body.
+    previous_size and confirmed_shrink are passed to check_shrink().
     """
-    changelog_url = "https://raw.githubusercontent.com/anthropics/claude-code/main/CHANGELOG.md"
-    filename = "changelog.md"
+    markdown_url = f"{base_url}{path}.md"
+    filename = url_to_safe_filename(path, source.strip_prefixes)
+    spool_path = spool_dir / f".{filename}.part"
+    markdown = source.validator == "markdown"
     
-    logger.info(f"Fetching Claude Code changelog: {changelog_url}")
+    logger.info(f"Fetching: {markdown_url} -> {filename}")
+    validators = validators or {}
+    try:
+        response, record, body = get_with_retries(
+            session, scheduler, markdown_url, conditional_headers(validators, source.headers), "page", filename,
+            read_body=lambda response: spool_body(response, spool_path, check_prefix=markdown),
+            source=source.name
+        )
+    except ValueError as e:
+        logger.error(f"Content validation failed for {filename}: {e}")
+        raise
     
-    for attempt in range(MAX_RETRIES):
-        try:
-            response = session.get(changelog_url, headers=HEADERS, timeout=30, allow_redirects=True)
-            
-            if response.status_code == 429:  # Rate limited
-                wait_time = int(response.headers.get('Retry-After', 60))
-                logger.warning(f"Rate limited. Waiting {wait_time} seconds...")
-                time.sleep(wait_time)
-                continue
-            
-            response.raise_for_status()
-            
-            content = response.text
-            
-            # Add header to indicate this is from Claude Code repo, not docs site
-            header = """# Claude Code Changelog
-
-> **Source**: https://github.com/anthropics/claude-code/blob/main/CHANGELOG.md
-> 
-> This is the official Claude Code release changelog, automatically fetched from the Claude Code repository. For documentation, see other topics via `/docs`.
+    if response.status_code == 304:  # Not modified since last run
+        logger.info(f"Not modified: {filename}")
+        return not_modified_result(filename, response, validators)
+    
+    try:
+        response.raise_for_status()
+    except requests.exceptions.HTTPError as e:
+        record["error"] = str(e)
+        raise Exception(f"Failed to fetch {filename}: {e}")
+    
+    validation_started = time.perf_counter()
+    try:
+        if markdown:
+            validate_markdown_content(body, filename, previous_size, confirmed_shrink)
+        else:
+            validate_text_content(body, filename, previous_size, confirmed_shrink)
+    except ValueError as e:
+        record["error"] = str(e)
+        body.path.unlink(missing_ok=True)
+        logger.error(f"Content validation failed for {filename}: {e}")
+        raise
+    finally:
+        record["validation_ms"] = elapsed_ms(validation_started)
+    
+    logger.info(f"Successfully fetched and validated {filename} ({body.size} bytes)")
+    return FetchResult(filename, None, response.headers.get('ETag'), response.headers.get('Last-Modified'),
+                       body.path, body.content_hash)
 
----
 
-"""
-            content = header + content
-            
-            # Basic validation
-            if len(content.strip()) < 100:
-                raise ValueError(f"Changelog content too short ({len(content)} bytes)")
-            
-            logger.info(f"Successfully fetched changelog ({len(content)} bytes)")
-            return filename, content
-            
-        except requests.exceptions.RequestException as e:
-            logger.warning(f"Attempt {attempt + 1}/{MAX_RETRIES} failed for changelog: {e}")
-            if attempt < MAX_RETRIES - 1:
-                delay = min(RETRY_DELAY * (2 ** attempt), MAX_RETRY_DELAY)
-                jittered_delay = delay * random.uniform(0.5, 1.0)
-                logger.info(f"Retrying in {jittered_delay:.1f} seconds...")
-                time.sleep(jittered_delay)
-            else:
-                raise Exception(f"Failed to fetch changelog after {MAX_RETRIES} attempts: {e}")
-        
-        except ValueError as e:
-            logger.error(f"Changelog validation failed: {e}")
-            raise
+def fetch_file(source: Source, source_file: SourceFile, session: requests.Session, scheduler: RequestScheduler,
+               validators: Optional[dict] = None, previous_size: Optional[int] = None,
+               confirmed_shrink: Optional[str] = None) -> FetchResult:
+    """
+    Fetch a file a source declares at a fixed URL, such as the Claude Code
+    changelog from GitHub. The source file's header is prepended to the body.
+    Returns a FetchResult whose content is None when the file is unchanged (304).
+    """
+    filename = source_file.filename
+    label = source_file.key
+    
+    logger.info(f"Fetching {label}: {source_file.url}")
+    validators = validators or {}
+    response, record, _ = get_with_retries(
+        session, scheduler, source_file.url, conditional_headers(validators, source.headers), "file", label,
+        source=source.name
+    )
+    
+    if response.status_code == 304:  # Not modified since last run
+        logger.info(f"Not modified: {filename}")
+        return not_modified_result(filename, response, validators)
+    
+    try:
+        response.raise_for_status()
+    except requests.exceptions.HTTPError as e:
+        record["error"] = str(e)
+        raise Exception(f"Failed to fetch {label}: {e}")
+    
+    body = response.text
+    
+    # Basic validation, of the body alone: the header is ours. The local copy
+    # has the header, so its size without it is what the body is compared with
+    validation_started = time.perf_counter()
+    try:
+        if len(body.strip()) < 100:
+            raise ValueError(f"Content of {label} too short ({len(body)} bytes)")
+        if source_file.validator == "markdown":
+            validate_markdown_prefix(body[:VALIDATION_PREFIX_CHARS])
+        header_size = len(source_file.header.encode('utf-8'))
+        previous_body_size = previous_size - header_size if previous_size else previous_size
+        data = body.encode('utf-8')
+        check_shrink(len(data), filename, previous_body_size, hashlib.sha256(data).hexdigest(), confirmed_shrink)
+    except ValueError as e:
+        record["error"] = str(e)
+        logger.error(f"Validation of {label} failed: {e}")
+        raise
+    finally:
+        record["validation_ms"] = elapsed_ms(validation_started)
+    
+    # The header says where the file comes from (e.g. the Claude Code repo, not the docs site)
+    content = source_file.header + body
+    logger.info(f"Successfully fetched {label} ({len(content)} bytes)")
+    return FetchResult(filename, content, response.headers.get('ETag'), response.headers.get('Last-Modified'))
 
 
-def save_markdown_file(docs_dir: Path, filename: str, content: str) -> str:
-    """Save markdown content and return its hash."""
-    file_path = docs_dir / filename
-    
+def save_markdown_file(writer: StagedWriter, filename: str, content: bytes) -> None:
+    """Stage markdown content for this run's commit."""
     try:
-        file_path.write_text(content, encoding='utf-8')
-        content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
-        logger.info(f"Saved: {filename}")
-        return content_hash
+        writer.write(filename, content)
+        logger.info(f"Staged: {filename}")
     except Exception as e:
         logger.error(f"Failed to save {filename}: {e}")
         raise
 
 
-def cleanup_old_files(docs_dir: Path, current_files: Set[str], manifest: dict) -> None:
+def store_fetch_result(writer: StagedWriter, manifest: dict, result: FetchResult) -> dict:
+    """
+    Stage a fetched document if it changed and return its manifest fields
+    (hash and last_updated; the HTTP validators go to the checkpoint). Every
+    body is hashed once: spooled pages while they streamed in, the changelog here.
+    """
+    filename = result.filename
+    old_entry = manifest.get("files", {}).get(filename, {})
+    old_hash = old_entry.get("hash", "")
+    
+    if result.not_modified:
+        # 304: the local copy is current, nothing to download or hash
+        content_hash = old_hash
+    elif result.spool_path is not None:
+        content_hash = result.content_hash
+        if content_hash != old_hash:
+            writer.stage_file(filename, result.spool_path)
+            logger.info(f"Staged: {filename}")
+        else:
+            result.spool_path.unlink(missing_ok=True)
+    else:
+        data = result.content.encode('utf-8')
+        content_hash = hashlib.sha256(data).hexdigest()
+        if content_hash != old_hash:
+            save_markdown_file(writer, filename, data)
+    
+    if content_hash != old_hash:
+        logger.info(f"Updated: {filename}")
+        # Only update timestamp when content actually changes
+        last_updated = datetime.now().isoformat()
+    else:
+        logger.info(f"Unchanged: {filename}" + (" (not modified)" if result.not_modified else ""))
+        # Keep existing timestamp for unchanged files
+        last_updated = old_entry.get("last_updated", datetime.now().isoformat())
+    
+    return {"hash": content_hash, "last_updated": last_updated}
+
+
+def keep_previous_version(docs_dir: Path, manifest: dict, new_manifest: dict, filename: str) -> bool:
+    """
+    Carry the previous copy of a document that failed to fetch or validate
+    forward, unchanged, instead of deleting it. The failure is recorded in the
+    checkpoint, so the next run fetches it first even if the sitemap lastmod
+    says it is unchanged, and the tracked manifest does not change with it.
+    """
+    entry = manifest.get("files", {}).get(filename)
+    if not entry or not (docs_dir / filename).exists():
+        return False
+    logger.warning(f"Keeping previous version of {filename}")
+    new_manifest["files"][filename] = dict(entry)
+    return True
+
+
+def page_filename(source: Source, page: str) -> str:
+    """Document filename for a checkpoint key (a page path or the key of a declared file)."""
+    source_file = source.file_for(page)
+    return source_file.filename if source_file else url_to_safe_filename(page, source.strip_prefixes)
+
+
+def resumable_pages(docs_dir: Path, manifest: dict, checkpoint: FetchCheckpoint,
+                    source: Source) -> Tuple[Dict[str, dict], Set[str]]:
+    """
+    Completed pages of an interrupted run that can be reused, and which of
+    their files are waiting in the staging directory. An entry is only
+    trusted if its staged copy (or, when nothing was staged, the published
+    copy) still has the recorded hash; anything else is fetched again.
+    """
+    entries = {}
+    staged = set()
+    for page, entry in checkpoint.completed.items():
+        filename = page_filename(source, page)
+        staged_path = docs_dir / STAGING_DIR / filename
+        if staged_path.is_file():
+            if hashlib.sha256(staged_path.read_bytes()).hexdigest() == entry.get("hash"):
+                entries[page] = entry
+                staged.add(filename)
+        elif (entry.get("hash") == manifest["files"].get(filename, {}).get("hash")
+                and (docs_dir / filename).exists()):
+            entries[page] = entry
+    return entries, staged
+
+
+def cleanup_old_files(writer: StagedWriter, current_files: Set[str], manifest: dict) -> None:
     """
     Remove only files that were previously fetched but no longer exist.
-    Preserves manually added files.
+    Preserves manually added files. Removals are applied when the run commits.
     """
     previous_files = set(manifest.get("files", {}).keys())
     files_to_remove = previous_files - current_files
@@ -458,188 +981,642 @@ def cleanup_old_files(docs_dir: Path, current_files: Set[str], manifest: dict) -
         if filename == MANIFEST_FILE:  # Never delete the manifest
             continue
             
-        file_path = docs_dir / filename
-        if file_path.exists():
+        if (writer.target_dir / filename).exists():
             logger.info(f"Removing obsolete file: {filename}")
-            file_path.unlink()
+            writer.remove(filename)
 
 
-def main():
-    """Main function with improved robustness."""
-    start_time = datetime.now()
-    logger.info("Starting Claude Code documentation fetch (improved version)")
-    
-    # Log configuration
-    github_repo = os.environ.get('GITHUB_REPOSITORY', 'ericbuess/claude-code-docs')
-    logger.info(f"GitHub repository: {github_repo}")
-    
-    # Create docs directory at repository root
-    docs_dir = Path(__file__).parent.parent / 'docs'
-    docs_dir.mkdir(exist_ok=True)
-    logger.info(f"Output directory: {docs_dir}")
-    
-    # Load manifest
-    manifest = load_manifest(docs_dir)
-    
-    # Statistics
-    successful = 0
-    failed = 0
-    failed_pages = []
-    fetched_files = set()
-    new_manifest = {"files": {}}
-    
-    # Create a session for connection pooling
-    sitemap_url = None
-    with requests.Session() as session:
-        # Discover sitemap and base URL
-        try:
-            sitemap_url, base_url = discover_sitemap_and_base_url(session)
-        except Exception as e:
-            logger.error(f"Failed to discover sitemap: {e}")
-            logger.info("Using fallback configuration...")
-            base_url = "https://docs.anthropic.com"
-            sitemap_url = None
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Fetch Claude Code documentation into docs/ (and other "
+                                                 "documentation trees declared with --sources)")
+    parser.add_argument(
+        "--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+        help=f"Number of pages fetched in parallel (default: {DEFAULT_CONCURRENCY})"
+    )
+    parser.add_argument(
+        "--rate-limit", type=float, default=DEFAULT_RATE_LIMIT,
+        help=f"Maximum requests per second to each host; the rate adapts below it when a host "
+             f"throttles or slows down. 0 for no ceiling (default: {DEFAULT_RATE_LIMIT:g})"
+    )
+    parser.add_argument(
+        "--ignore-lastmod", action="store_true",
+        help="Fetch every page even if its sitemap <lastmod> predates the previous run"
+    )
+    parser.add_argument(
+        "--sources", type=Path, metavar="FILE",
+        help="JSON file declaring more documentation sources (or replacing the built-in claude-code one); "
+             "see scripts/fetch_sources.py"
+    )
+    parser.add_argument(
+        "--source", action="append", metavar="NAME",
+        help="Only fetch this source, may be repeated (default: every source)"
+    )
+    parser.add_argument(
+        "--docs-dir", type=Path,
+        help="Output directory of a single source (default: its output_dir, docs/ for claude-code)"
+    )
+    parser.add_argument(
+        "--sitemap-url", action="append",
+        help="Sitemap to discover pages from, may be repeated (default: each source's sitemaps)"
+    )
+    parser.add_argument(
+        "--changelog-url",
+        help="Raw URL of the Claude Code changelog (default: the claude-code repository's)"
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help=f"Resume an interrupted run however old its checkpoint is "
+             f"(by default only runs from the last {RESUME_MAX_AGE.total_seconds() / 3600:g} hours are resumed)"
+    )
+    parser.add_argument(
+        "--only-failed", action="store_true",
+        help="Only fetch pages that failed in previous runs; other pages keep their current copy"
+    )
+    parser.add_argument(
+        "--allow-shrink", action="store_true",
+        help=f"Accept pages that shrank to under {MAX_SHRINK_RATIO:.0%} of their previous size. Without it such a "
+             f"page keeps its previous copy until the same smaller version is served on {SHRINK_CONFIRM_RUNS} "
+             f"runs in a row"
+    )
+    parser.add_argument(
+        "--schedule", choices=("all", "adaptive"), default="all",
+        help="all: request every page whose sitemap lastmod does not rule it out; adaptive: only pages "
+             "that are due given how often they change (default: all)"
+    )
+    parser.add_argument(
+        "--freshness-sla", type=float, default=FRESHNESS_SLA_HOURS, metavar="HOURS",
+        help=f"With --schedule adaptive, the longest a page goes unchecked (default: {FRESHNESS_SLA_HOURS:g})"
+    )
+    parser.add_argument(
+        "--full-sweep", type=float, default=FULL_SWEEP_DAYS, metavar="DAYS",
+        help=f"With --schedule adaptive, request every page (ignoring lastmod) this often (default: {FULL_SWEEP_DAYS:g})"
+    )
+    parser.add_argument(
+        "--metrics-file", type=Path,
+        help="Write one JSON line per HTTP request (timings, bytes, status, retries) to this file"
+    )
+    parser.add_argument(
+        "--watch", action="store_true",
+        help="Keep running and fetch again every --interval seconds, keeping the manifest, "
+             "connections and host rates in memory between cycles"
+    )
+    parser.add_argument(
+        "--interval", type=float, default=WATCH_INTERVAL, metavar="SECONDS",
+        help=f"With --watch, the average time between the start of two cycles; "
+             f"each wait is jittered (default: {WATCH_INTERVAL:g})"
+    )
+    parser.add_argument(
+        "--status-port", type=int, metavar="PORT",
+        help="With --watch, serve the loop's status as JSON on 127.0.0.1:PORT (/status, /healthz)"
+    )
+    parser.add_argument(
+        "--print-paths", choices=("output", "state"),
+        help="Print the selected sources' output directories, or the local state they keep between runs "
+             "(checkpoint, staging area, metadata and history), one per line, and exit without fetching"
+    )
+    args = parser.parse_args(argv)
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.interval <= 0:
+        parser.error("--interval must be positive")
+    return args
+
+
+class SourceRun:
+    """
+    The part of a fetch run that belongs to one source: its checkpoint,
+    staged writes, schedule, manifest and counters. run_fetch() drives one per
+    source through a worker pool shared by all of them.
+    """
+
+    def __init__(self, args: argparse.Namespace, source: Source, docs_dir: Path, manifest: dict):
+        self.args = args
+        self.source = source
+        self.docs_dir = docs_dir
+        self.manifest = manifest
+        self.start_time = datetime.now()
+        self.checkpoint = FetchCheckpoint.load(docs_dir)
+        self.writer = StagedWriter(docs_dir)
+        self.futures: Dict[str, Future] = {}
         
-        # Discover documentation pages dynamically
-        if sitemap_url:
-            documentation_pages = discover_claude_code_pages(session, sitemap_url)
+        # Statistics
+        self.successful = 0
+        self.failed = 0
+        self.not_modified = 0
+        self.carried_counts = {"sitemap lastmod": 0, "not due": 0, "resumed": 0, "not retried": 0}
+        self.failed_pages: List[str] = []
+        self.fetched_files: Set[str] = set()
+        self.new_manifest: dict = {"files": {}}
+    
+    def begin(self, discovery: Optional[Tuple[str, str, Dict[str, Optional[str]]]]) -> None:
+        """
+        Start (or resume) the source's run with its discovered pages (None if
+        its sitemaps could not be read) and decide which pages need a request.
+        Raises RuntimeError if a source that lists pages has none.
+        """
+        args, source, docs_dir, manifest, checkpoint = self.args, self.source, self.docs_dir, self.manifest, self.checkpoint
+        if discovery is not None:
+            self.sitemap_url, self.base_url, self.page_lastmods = discovery
         else:
+            if source.include:
+                logger.info(f"Using fallback configuration for {source.name}...")
+            self.sitemap_url, self.base_url = None, source.base_url
             # Use fallback pages if sitemap discovery failed
-            documentation_pages = [
-                "/en/docs/claude-code/overview",
-                "/en/docs/claude-code/setup",
-                "/en/docs/claude-code/quickstart",
-                "/en/docs/claude-code/memory",
-                "/en/docs/claude-code/common-workflows",
-                "/en/docs/claude-code/ide-integrations",
-                "/en/docs/claude-code/mcp",
-                "/en/docs/claude-code/github-actions",
-                "/en/docs/claude-code/sdk",
-                "/en/docs/claude-code/troubleshooting",
-                "/en/docs/claude-code/security",
-                "/en/docs/claude-code/settings",
-                "/en/docs/claude-code/hooks",
-                "/en/docs/claude-code/costs",
-                "/en/docs/claude-code/monitoring-usage",
-            ]
+            self.page_lastmods = {page_path: None for page_path in source.fallback_pages}
+        self.documentation_pages = list(self.page_lastmods)
         
-        if not documentation_pages:
-            logger.error("No documentation pages discovered!")
-            sys.exit(1)
+        # Never publish a source without its pages: that would delete them all
+        if source.include and not self.documentation_pages:
+            raise RuntimeError(f"No documentation pages discovered for {source.name}!")
         
-        # Fetch each discovered page
-        for i, page_path in enumerate(documentation_pages, 1):
-            logger.info(f"Processing {i}/{len(documentation_pages)}: {page_path}")
+        # A run that was interrupted before publishing is resumed from its
+        # checkpoint: completed pages (already staged) are not fetched again
+        self.resumed, staged = {}, set()
+        if checkpoint.interrupted() and (args.resume or checkpoint.age() <= RESUME_MAX_AGE):
+            self.resumed, staged = resumable_pages(docs_dir, manifest, checkpoint, source)
+            checkpoint.completed = dict(self.resumed)
+            logger.info(f"Resuming run started {checkpoint.started}: {len(self.resumed)} page(s) already done")
+        elif checkpoint.interrupted():
+            logger.info(f"Not resuming run started {checkpoint.started} (older than {RESUME_MAX_AGE}); use --resume to reuse it")
+        
+        # All writes of this run are staged and published together at the end
+        self.writer.begin(keep=staged)
+        if self.resumed:
+            # The lastmod shortcut of the next run must compare against when this
+            # run's first pages were actually fetched
+            self.run_started = datetime.fromisoformat(checkpoint.started)
+            self.full_sweep = checkpoint.full_sweep
+            checkpoint.save(force=True)
+        else:
+            self.run_started = self.start_time
+            last_sweep = as_datetime(checkpoint.last_full_sweep)
+            self.full_sweep = args.schedule == "adaptive" and (
+                last_sweep is None or datetime.now().astimezone() - last_sweep >= timedelta(days=args.full_sweep)
+            )
+            checkpoint.start(self.start_time, self.full_sweep)
+        
+        # Adaptive schedule: pages are polled according to their observed change rate
+        self.schedule = None
+        if self.full_sweep:
+            logger.info(f"Full sweep of {source.name}: requesting every page")
+        elif args.schedule == "adaptive":
+            self.schedule = PollSchedule(load_history(docs_dir), manifest["files"], checkpoint.checked,
+                                         timedelta(hours=args.freshness_sla))
+            logger.info(f"Adaptive schedule, most frequently changing: {', '.join(self.schedule.hottest())}")
+        
+        # Pages that failed before (in any earlier run) are fetched first, whatever
+        # their lastmod or schedule; with --only-failed they are the only ones fetched
+        metadata = load_fetch_metadata(docs_dir)
+        self.retry_pages = set(checkpoint.failed) | set(metadata.get("failed_pages", []))
+        
+        # Pages whose sitemap <lastmod> predates the previous run are carried over
+        # from the manifest without a request
+        # (the manifest is only rewritten when content changes, so the previous
+        # run's start time from the local metadata file is preferred when present)
+        self.previous_run = None if args.ignore_lastmod or self.full_sweep else as_datetime(
+            metadata.get("last_fetch_started") or manifest.get("last_updated")
+        )
+        
+        self.work = self.documentation_pages + [source_file.key for source_file in source.files]
+        self.carried = {page: self.carried_over(page) for page in self.work}
+        checkpoint.set_pages({**self.page_lastmods, **{source_file.key: None for source_file in source.files}})
+    
+    def unchanged_since_last_run(self, page_path: str) -> bool:
+        lastmod = as_datetime(self.page_lastmods.get(page_path))
+        filename = page_filename(self.source, page_path)
+        entry = self.manifest["files"].get(filename, {})
+        return (self.previous_run is not None and lastmod is not None and lastmod <= self.previous_run
+                and "hash" in entry and page_path not in self.retry_pages
+                and (self.docs_dir / filename).exists())
+    
+    def carried_over(self, page: str) -> Optional[Tuple[str, Optional[dict]]]:
+        """
+        Why a page (or declared file) needs no request this run, with the
+        manifest entry it keeps (None: leave it out). None if it must be fetched.
+        """
+        files = self.manifest["files"]
+        filename = page_filename(self.source, page)
+        declared = self.source.file_for(page) is not None
+        if page in self.resumed:
+            return "resumed", self.resumed[page]
+        if self.args.only_failed and page not in self.retry_pages:
+            entry = files.get(filename)
+            return "not retried", dict(entry) if entry and (self.docs_dir / filename).exists() else None
+        if not declared and self.unchanged_since_last_run(page):
+            return "sitemap lastmod", dict(files[filename])
+        # Declared files (the changelog) are always due: they change with every release and are one request each
+        if self.schedule and not declared and page not in self.retry_pages and not self.schedule.is_due(
+                page, filename, as_datetime(self.page_lastmods.get(page))):
+            entry = files.get(filename)
+            if entry and "hash" in entry and (self.docs_dir / filename).exists():
+                return "not due", dict(entry)
+        return None
+    
+    def due_pages(self) -> List[str]:
+        """Discovered pages that need a request, in discovery order."""
+        return [page for page in self.documentation_pages if self.carried[page] is None]
+    
+    def submit_page(self, executor: ThreadPoolExecutor, page_path: str,
+                    session: requests.Session, scheduler: RequestScheduler) -> None:
+        filename = page_filename(self.source, page_path)
+        self.futures[page_path] = executor.submit(
+            fetch_markdown_content, self.source, page_path, session, self.base_url, scheduler,
+            self.writer.staging_dir, get_validators(self.docs_dir, self.checkpoint, self.manifest, page_path, filename),
+            *self.shrink_check(page_path, filename)
+        )
+    
+    def submit_files(self, executor: ThreadPoolExecutor, session: requests.Session,
+                     scheduler: RequestScheduler) -> None:
+        for source_file in self.source.files:
+            if self.carried[source_file.key] is None:
+                self.futures[source_file.key] = executor.submit(
+                    fetch_file, self.source, source_file, session, scheduler,
+                    get_validators(self.docs_dir, self.checkpoint, self.manifest, source_file.key,
+                                   source_file.filename),
+                    *self.shrink_check(source_file.key, source_file.filename)
+                )
+    
+    def shrink_check(self, page: str, filename: str) -> Tuple[Optional[int], Optional[str]]:
+        """
+        previous_size and confirmed_shrink for fetching a page: no size with
+        --allow-shrink, and the hash of a smaller body rejected on the previous
+        SHRINK_CONFIRM_RUNS - 1 runs, which is accepted if it is served again.
+        """
+        if self.args.allow_shrink:
+            return None, None
+        return local_size(self.docs_dir, filename), self.checkpoint.repeated_shrink(page, SHRINK_CONFIRM_RUNS - 1)
+    
+    def collect(self) -> None:
+        """
+        Record every page's result in the new manifest and the checkpoint.
+        Results are consumed in discovery order so the manifest and files
+        match a serial run.
+        """
+        manifest, new_manifest, checkpoint = self.manifest, self.new_manifest, self.checkpoint
+        for i, page in enumerate(self.work, 1):
+            logger.info(f"Processing {i}/{len(self.work)}: {page}")
+            filename = page_filename(self.source, page)
+            
+            if self.carried[page] is not None:
+                reason, entry = self.carried[page]
+                if entry is None:
+                    logger.info(f"Skipped: {filename} (not a previously failed page)")
+                    continue
+                logger.info(f"No request for {filename} ({reason})")
+                if reason == "sitemap lastmod":
+                    checkpoint.mark_checked(page)
+                new_manifest["files"][filename] = entry
+                self.fetched_files.add(filename)
+                self.successful += 1
+                self.carried_counts[reason] += 1
+                continue
             
             try:
-                filename, content = fetch_markdown_content(page_path, session, base_url)
-                
-                # Check if content has changed
-                old_hash = manifest.get("files", {}).get(filename, {}).get("hash", "")
-                old_entry = manifest.get("files", {}).get(filename, {})
-                
-                if content_has_changed(content, old_hash):
-                    content_hash = save_markdown_file(docs_dir, filename, content)
-                    logger.info(f"Updated: {filename}")
-                    # Only update timestamp when content actually changes
-                    last_updated = datetime.now().isoformat()
+                result = self.futures[page].result()
+                source_file = self.source.file_for(page)
+                if source_file is not None:
+                    entry = {
+                        "original_url": source_file.original_url,
+                        "original_raw_url": source_file.url,
+                        **store_fetch_result(self.writer, manifest, result),
+                    }
+                    if source_file.origin:
+                        entry["source"] = source_file.origin
                 else:
-                    content_hash = old_hash
-                    logger.info(f"Unchanged: {filename}")
-                    # Keep existing timestamp for unchanged files
-                    last_updated = old_entry.get("last_updated", datetime.now().isoformat())
+                    entry = {
+                        "original_url": f"{self.base_url}{page}",
+                        "original_md_url": f"{self.base_url}{page}.md",
+                        **store_fetch_result(self.writer, manifest, result)
+                    }
+                new_manifest["files"][filename] = entry
+                checkpoint.set_validators(page, result.etag, result.last_modified)
+                checkpoint.mark_completed(page, entry)
                 
-                new_manifest["files"][filename] = {
-                    "original_url": f"{base_url}{page_path}",
-                    "original_md_url": f"{base_url}{page_path}.md",
-                    "hash": content_hash,
-                    "last_updated": last_updated
-                }
+                self.fetched_files.add(filename)
+                self.successful += 1
+                if result.not_modified:
+                    self.not_modified += 1
                 
-                fetched_files.add(filename)
-                successful += 1
-                
-                # Rate limiting
-                if i < len(documentation_pages):
-                    time.sleep(RATE_LIMIT_DELAY)
-                    
             except Exception as e:
-                logger.error(f"Failed to process {page_path}: {e}")
-                failed += 1
-                failed_pages.append(page_path)
+                logger.error(f"Failed to process {page}: {e}")
+                self.failed += 1
+                self.failed_pages.append(page)
+                checkpoint.mark_failed(page, str(e), getattr(e, "content_hash", None))
+                if keep_previous_version(self.docs_dir, manifest, new_manifest, filename):
+                    self.fetched_files.add(filename)
     
-    # Fetch Claude Code changelog
-    logger.info("Fetching Claude Code changelog...")
-    try:
-        filename, content = fetch_changelog(session)
+    def publish(self, refresh_outputs: bool = True) -> dict:
+        """
+        Publish the source's changes, refresh its derived files (with
+        refresh_outputs=False only if the manifest changed) and return the
+        run's fetch metadata.
+        """
+        docs_dir, manifest, new_manifest = self.docs_dir, self.manifest, self.new_manifest
+        counts = self.carried_counts
         
-        # Check if content has changed
-        old_hash = manifest.get("files", {}).get(filename, {}).get("hash", "")
-        old_entry = manifest.get("files", {}).get(filename, {})
+        # Clean up old files (only those we previously fetched)
+        cleanup_old_files(self.writer, self.fetched_files, manifest)
         
-        if content_has_changed(content, old_hash):
-            content_hash = save_markdown_file(docs_dir, filename, content)
-            logger.info(f"Updated: {filename}")
-            last_updated = datetime.now().isoformat()
+        # Save new manifest and publish the run: changed files are fsynced and
+        # renamed into place, then the manifest, then obsolete files are removed
+        manifest_changed = save_manifest(self.writer, new_manifest, manifest, self.source.output_dir,
+                                         self.run_started)
+        new_manifest.setdefault("last_updated", manifest.get("last_updated"))
+        written = self.writer.commit(last=(MANIFEST_FILE,))
+        self.checkpoint.finish(self.failed_pages)
+        if manifest_changed:
+            logger.info(f"Published {written} changed file(s) in {docs_dir}")
         else:
-            content_hash = old_hash
-            logger.info(f"Unchanged: {filename}")
-            last_updated = old_entry.get("last_updated", datetime.now().isoformat())
+            logger.info(f"No documentation changes in {docs_dir}; manifest left untouched")
         
-        new_manifest["files"][filename] = {
-            "original_url": "https://github.com/anthropics/claude-code/blob/main/CHANGELOG.md",
-            "original_raw_url": "https://raw.githubusercontent.com/anthropics/claude-code/main/CHANGELOG.md",
-            "hash": content_hash,
-            "last_updated": last_updated,
-            "source": "claude-code-repository"
+        # Record run telemetry outside the tracked tree
+        run_metadata = {
+            "source": self.source.name,
+            "last_fetch_started": self.run_started.isoformat(),
+            "last_fetch_completed": datetime.now().isoformat(),
+            "manifest_changed": manifest_changed,
+            "fetch_duration_seconds": (datetime.now() - self.start_time).total_seconds(),
+            "total_pages_discovered": len(self.documentation_pages),
+            "pages_fetched_successfully": self.successful,
+            "pages_failed": self.failed,
+            "pages_not_modified": self.not_modified,
+            "pages_skipped_by_lastmod": counts["sitemap lastmod"],
+            "pages_not_due": counts["not due"],
+            "pages_resumed": counts["resumed"],
+            "full_sweep": self.full_sweep,
+            "pages_not_retried": counts["not retried"],
+            "failed_pages": self.failed_pages,
+            "sitemap_url": self.sitemap_url,
+            "base_url": self.base_url,
+            "total_files": len(self.fetched_files),
+            "request_metrics": metrics.totals(self.source.name),
+            "fetch_tool_version": "3.0"
         }
+        save_fetch_metadata(docs_dir, run_metadata)
         
-        fetched_files.add(filename)
-        successful += 1
+        # Refresh the indexes and history (in watch mode only
+        # after the first cycle and cycles that changed something)
+        if manifest_changed or refresh_outputs:
+            refresh_derived_files(docs_dir, manifest, new_manifest, manifest_changed)
         
-    except Exception as e:
-        logger.error(f"Failed to fetch changelog: {e}")
-        failed += 1
-        failed_pages.append("changelog")
-    
-    # Clean up old files (only those we previously fetched)
-    cleanup_old_files(docs_dir, fetched_files, manifest)
-    
-    # Add metadata to manifest
-    new_manifest["fetch_metadata"] = {
-        "last_fetch_completed": datetime.now().isoformat(),
-        "fetch_duration_seconds": (datetime.now() - start_time).total_seconds(),
-        "total_pages_discovered": len(documentation_pages),
-        "pages_fetched_successfully": successful,
-        "pages_failed": failed,
-        "failed_pages": failed_pages,
-        "sitemap_url": sitemap_url,
-        "base_url": base_url,
-        "total_files": len(fetched_files),
-        "fetch_tool_version": "3.0"
-    }
+        # Summary
+        total = len(self.work)
+        logger.info("\n" + "="*50)
+        logger.info(f"Source {self.source.name} completed in {datetime.now() - self.start_time}")
+        logger.info(f"Discovered pages: {len(self.documentation_pages)}")
+        logger.info(f"Successful: {self.successful}/{total}")
+        logger.info(f"Not modified: {self.not_modified}")
+        logger.info(f"Skipped by sitemap lastmod: {counts['sitemap lastmod']}")
+        if self.schedule:
+            logger.info(f"Not due (adaptive schedule): {counts['not due']}")
+        if self.resumed:
+            logger.info(f"Resumed from checkpoint: {counts['resumed']}")
+        if self.args.only_failed:
+            logger.info(f"Not retried (--only-failed): {counts['not retried']}")
+        logger.info(f"Failed: {self.failed}")
+        if self.failed_pages:
+            logger.warning("\nFailed pages (will retry next run):")
+            for page in self.failed_pages:
+                logger.warning(f"  - {page}")
+            if self.successful == 0:
+                logger.error("No pages were fetched successfully!")
+        else:
+            logger.info("\nAll pages fetched successfully!")
+        return run_metadata
+
+
+def run_fetch(args: argparse.Namespace, sources: List[Tuple[Source, Path]], session: requests.Session,
+              scheduler: RequestScheduler, manifests: Dict[str, dict], refresh_outputs: bool = True) -> Dict[str, dict]:
+    """
+    One fetch run over every (source, output directory) pair: discover pages,
+    fetch the ones that are due through one shared worker pool, publish what
+    changed and refresh the indexes. manifests maps source names to their
+    published manifests (read from disk, or kept from the previous cycle in
+    watch mode) and is updated as each source is published. Returns the run
+    metadata of each source.
+    A source is published as soon as its pages are in while the pool keeps
+    fetching the next sources' pages, so the run's wall time follows the
+    requests that are due, not the number of sources.
+    With refresh_outputs=False the indexes and history are only
+    rebuilt when the manifest changed.
+    Raises RuntimeError if a source discovered no pages (after publishing the others).
+    """
+    concurrency = args.concurrency
+    start_time = datetime.now()
+    metrics.reset()
     
-    # Save new manifest
-    save_manifest(docs_dir, new_manifest)
+    # Discover the sitemaps, base URLs and pages of every source in streaming passes
+    discoveries = discover_sources(session, [source for source, _ in sources], concurrency)
     
-    # Summary
-    duration = datetime.now() - start_time
+    runs = []
+    errors = []
+    for source, docs_dir in sources:
+        run = SourceRun(args, source, docs_dir, manifests[source.name])
+        try:
+            run.begin(discoveries.get(source.name))
+        except RuntimeError as e:
+            logger.error(str(e))
+            errors.append(str(e))
+            continue
+        runs.append(run)
+    
+    results = {}
+    # Declared files come from other hosts, so they get their own (few) workers
+    # and are not held up while the docs site is backing off (and vice versa)
+    with ThreadPoolExecutor(max_workers=FILE_WORKERS) as file_executor, \
+            ThreadPoolExecutor(max_workers=concurrency) as executor:
+        try:
+            for run in runs:
+                run.submit_files(file_executor, session, scheduler)
+            # Previously failed pages (of any source) go to the front of the queue,
+            # then the sources' pages in order
+            queue = sorted(((run, page) for run in runs for page in run.due_pages()),
+                           key=lambda item: item[1] not in item[0].retry_pages)
+            logger.info(f"Fetching {len(queue)} pages of {len(runs)} source(s) with concurrency {concurrency}")
+            for run, page in queue:
+                run.submit_page(executor, page, session, scheduler)
+            
+            for run in runs:
+                run.collect()
+                run.checkpoint.save(force=True)
+                results[run.source.name] = run.publish(refresh_outputs)
+                manifests[run.source.name] = run.new_manifest
+        except BaseException:
+            # Interrupted: drop queued requests so the pools can shut down;
+            # the checkpoints keep every page processed so far
+            executor.shutdown(wait=False, cancel_futures=True)
+            file_executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        finally:
+            for run in runs:
+                if run.source.name not in results:
+                    run.checkpoint.save(force=True)
+    
+    # Summary of the requests of all sources
     logger.info("\n" + "="*50)
-    logger.info(f"Fetch completed in {duration}")
-    logger.info(f"Discovered pages: {len(documentation_pages)}")
-    logger.info(f"Successful: {successful}/{len(documentation_pages)}")
-    logger.info(f"Failed: {failed}")
-    
-    if failed_pages:
-        logger.warning("\nFailed pages (will retry next run):")
-        for page in failed_pages:
-            logger.warning(f"  - {page}")
-        # Don't exit with error - partial success is OK
-        if successful == 0:
-            logger.error("No pages were fetched successfully!")
+    logger.info(f"Fetch completed in {datetime.now() - start_time}")
+    logger.info("\nRequest metrics:\n" + metrics.summary())
+    for host, state in scheduler.summary().items():
+        logger.info(f"{host}: final rate {state['rate'] if state['rate'] is not None else 'unlimited'} req/s, "
+                    f"{state['throttled']} throttled, {state['errors']} errors, "
+                    f"{state['rate_decreases']} rate decreases")
+    if args.metrics_file:
+        try:
+            metrics.write_jsonl(args.metrics_file)
+        except OSError as e:
+            logger.warning(f"Failed to write metrics file: {e}")
+    
+    if errors:
+        raise RuntimeError("; ".join(errors))
+    return results
+
+
+def combine_runs(runs: Dict[str, dict]) -> dict:
+    """
+    One summary of several sources' run metadata (for the watch status and
+    the exit status); failed pages are prefixed with their source's name
+    when there is more than one.
+    """
+    combined = {
+        "manifest_changed": any(run["manifest_changed"] for run in runs.values()),
+        "fetch_duration_seconds": max((run["fetch_duration_seconds"] for run in runs.values()), default=0),
+        "failed_pages": [
+            f"{name}:{page}" if len(runs) > 1 else page
+            for name, run in runs.items() for page in run["failed_pages"]
+        ],
+    }
+    for key in ("total_pages_discovered", "pages_fetched_successfully", "pages_not_modified",
+                "pages_not_due", "pages_failed"):
+        combined[key] = sum(run[key] for run in runs.values())
+    return combined
+
+
+def refresh_derived_files(docs_dir: Path, manifest: dict, new_manifest: dict, manifest_changed: bool) -> None:
+    """Rebuild the files derived from the published documents; failures only cost freshness."""
+    # Section table, link graph, search index and changelog version index
+    # (only documents whose hash changed are re-read)
+    try:
+        sections = update_section_index(docs_dir, new_manifest["files"])
+        update_link_graph(docs_dir, new_manifest["files"], sections)
+        update_search_index(docs_dir, new_manifest["files"])
+        update_changelog_index(docs_dir, new_manifest["files"])
+    except Exception as e:
+        logger.warning(f"Failed to update documentation indexes: {e}")
+    
+    # Record new document versions and their line deltas, then summarize
+    # this run's changes for the helper's "what's new"
+    try:
+        history = update_history(docs_dir, new_manifest["files"])
+        if manifest_changed:
+            update_whats_new(docs_dir, manifest["files"], new_manifest["files"], history)
+    except Exception as e:
+        logger.warning(f"Failed to update document history: {e}")
+
+
+def watch(args: argparse.Namespace, sources: List[Tuple[Source, Path]], session: requests.Session,
+          scheduler: RequestScheduler) -> None:
+    """
+    Run fetch cycles until interrupted. The manifests (and with them every
+    page's validators), the session's connections and the per-host rates stay
+    in memory between cycles; see fetch_watch.
+    """
+    status = WatchStatus(args.interval)
+    server = start_status_server(status, args.status_port) if args.status_port is not None else None
+    manifests = {source.name: load_manifest(docs_dir) for source, docs_dir in sources}
+    logger.info(f"Watching for documentation changes every ~{args.interval:g} seconds")
+    try:
+        while True:
+            status.cycle_started()
+            cycle_started = time.monotonic()
+            try:
+                run = combine_runs(run_fetch(args, sources, session, scheduler, manifests,
+                                             refresh_outputs=status.cycles == 0))
+                status.cycle_finished(run, None if run["pages_fetched_successfully"] else "No pages were fetched successfully")
+            except Exception as e:
+                # The checkpoint lets the next cycle pick up where this one stopped
+                logger.error(f"Fetch cycle failed: {e}")
+                status.cycle_finished({}, str(e))
+            delay = next_delay(args.interval, time.monotonic() - cycle_started)
+            status.sleeping(delay)
+            logger.info(f"Next cycle in {delay:.0f} seconds")
+            time.sleep(delay)
+    finally:
+        if server:
+            server.shutdown()
+            server.server_close()
+
+
+def configure_sources(args: argparse.Namespace) -> List[Source]:
+    """The sources selected on the command line, with --sitemap-url and --changelog-url applied."""
+    sources = select_sources(load_sources(args.sources), args.source)
+    if args.sitemap_url:
+        sources = [source._replace(sitemap_urls=tuple(args.sitemap_url)) for source in sources]
+    if args.changelog_url:
+        sources = [source._replace(files=tuple(
+            source_file._replace(url=args.changelog_url) if source_file.key == "changelog" else source_file
+            for source_file in source.files
+        )) for source in sources]
+    if args.docs_dir and len(sources) > 1:
+        raise ValueError("--docs-dir needs a single source (select one with --source)")
+    return sources
+
+
+def main(argv: Optional[List[str]] = None):
+    """Main function with improved robustness."""
+    args = parse_args(argv)
+    try:
+        sources = configure_sources(args)
+    except (OSError, ValueError) as e:
+        logger.error(f"Invalid sources: {e}")
+        sys.exit(2)
+    
+    if args.print_paths:
+        for source in sources:
+            output_dir = str(args.docs_dir or source.output_dir)
+            if args.print_paths == "output":
+                print(output_dir)
+            else:
+                for name in LOCAL_STATE:
+                    print(f"{output_dir}/{name}")
+        return
+    
+    logger.info("Starting Claude Code documentation fetch (improved version)")
+    
+    # Log configuration
+    github_repo = os.environ.get('GITHUB_REPOSITORY', 'ericbuess/claude-code-docs')
+    logger.info(f"GitHub repository: {github_repo}")
+    
+    # Create each source's output directory (docs/ for Claude Code) at repository root
+    repo_root = Path(__file__).parent.parent
+    outputs = []
+    for source in sources:
+        docs_dir = args.docs_dir or repo_root / source.output_dir
+        docs_dir.mkdir(parents=True, exist_ok=True)
+        logger.info(f"Output directory for {source.name}: {docs_dir}")
+        outputs.append((source, docs_dir))
+    
+    # Interrupts (Ctrl-C, job timeouts) unwind normally so the checkpoint is saved
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+    
+    # Per-host adaptive pacing shared by all fetch workers (burst up to one request per worker)
+    scheduler = RequestScheduler(args.rate_limit, burst=args.concurrency)
+    
+    # One session (and connection pool) for the sitemaps, pages and files of every source
+    with create_session(args.concurrency) as session:
+        if args.watch:
+            watch(args, outputs, session, scheduler)
+            return
+        try:
+            manifests = {source.name: load_manifest(docs_dir) for source, docs_dir in outputs}
+            run = combine_runs(run_fetch(args, outputs, session, scheduler, manifests))
+        except RuntimeError as e:
+            logger.error(str(e))
             sys.exit(1)
-    else:
-        logger.info("\nAll pages fetched successfully!")
+    
+    # Don't exit with error - partial success is OK
+    if run["failed_pages"] and run["pages_fetched_successfully"] == 0:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
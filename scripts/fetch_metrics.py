@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Per-request instrumentation for the documentation fetcher.
+
+Every HTTP attempt (sitemap, page or file such as the changelog) is recorded with its status,
+timings, size, and any time spent waiting on the rate limiter or sleeping
+before a retry. Records can be written as JSON lines for offline analysis,
+and a short summary with latency histograms is logged at the end of a run.
+"""
+
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open
+HISTOGRAM_BUCKETS_MS = [50, 100, 250, 500, 1000, 2500, 5000]
+HISTOGRAM_WIDTH = 30
+
+
+def elapsed_ms(since: float) -> float:
+    """Milliseconds since a time.perf_counter() reading."""
+    return round((time.perf_counter() - since) * 1000, 1)
+
+
+class FetchMetrics:
+    """Thread-safe collector of request records shared by all fetch workers."""
+
+    def __init__(self):
+        self.records: List[dict] = []
+        self.lock = threading.Lock()
+
+    def reset(self) -> None:
+        with self.lock:
+            self.records = []
+
+    def record(self, kind: str, url: str, **fields) -> dict:
+        """
+        Add a record for one request attempt and return it so the caller can
+        fill in fields (download time, validation, sleeps) as they happen.
+
+        Common fields: attempt, status, ttfb_ms, download_ms, bytes (decoded),
+        wire_bytes (as transferred, before decompression), queue_ms (scheduler wait), validation_ms, sleep_ms, sleep_reason
+        ('backoff' or 'rate_limited'), error, source (the registry source the
+        request was made for). For 'rate_limited' sleep_ms is the pause the 429
+        put on the host; it is spent in later requests' queue_ms.
+        """
+        entry = {"kind": kind, "url": url, "ts": round(time.time(), 3), **fields}
+        with self.lock:
+            self.records.append(entry)
+        return entry
+
+    def write_jsonl(self, path: Path) -> None:
+        """Write all records, one JSON object per line."""
+        with self.lock:
+            records = list(self.records)
+        with open(path, 'w', encoding='utf-8') as f:
+            for entry in records:
+                f.write(json.dumps(entry, sort_keys=True) + "\n")
+        logger.info(f"Wrote {len(records)} request records to {path}")
+
+    def totals(self, source: Optional[str] = None) -> Dict[str, dict]:
+        """
+        Aggregate counters per request kind (suitable for fetch metadata).
+        With a source name, only that source's requests and the ones it shares
+        with other sources (sitemaps, recorded without a source) are counted.
+        """
+        with self.lock:
+            records = list(self.records)
+        totals: Dict[str, dict] = {}
+        for entry in records:
+            if source is not None and entry.get("source", source) != source:
+                continue
+            kind = totals.setdefault(entry["kind"], {
+                "requests": 0, "retries": 0, "errors": 0, "bytes": 0, "wire_bytes": 0, "statuses": {},
+                "ttfb_ms": 0.0, "download_ms": 0.0, "queue_ms": 0.0,
+                "validation_ms": 0.0, "backoff_ms": 0.0, "rate_limited_ms": 0.0,
+            })
+            kind["requests"] += 1
+            if entry.get("attempt", 1) > 1:
+                kind["retries"] += 1
+            if entry.get("error"):
+                kind["errors"] += 1
+            status = str(entry.get("status", "error"))
+            kind["statuses"][status] = kind["statuses"].get(status, 0) + 1
+            kind["bytes"] += entry.get("bytes", 0)
+            kind["wire_bytes"] += entry.get("wire_bytes", 0)
+            for field in ("ttfb_ms", "download_ms", "queue_ms", "validation_ms"):
+                kind[field] += entry.get(field, 0.0)
+            if entry.get("sleep_reason") == "backoff":
+                kind["backoff_ms"] += entry.get("sleep_ms", 0.0)
+            elif entry.get("sleep_reason") == "rate_limited":
+                kind["rate_limited_ms"] += entry.get("sleep_ms", 0.0)
+        for kind in totals.values():
+            for field in ("ttfb_ms", "download_ms", "queue_ms", "validation_ms", "backoff_ms", "rate_limited_ms"):
+                kind[field] = round(kind[field], 1)
+        return totals
+
+    def summary(self) -> str:
+        """Human-readable summary: totals and a latency histogram per request kind."""
+        with self.lock:
+            records = list(self.records)
+        if not records:
+            return "No requests recorded"
+
+        lines = []
+        for name, kind in sorted(self.totals().items()):
+            lines.append(
+                f"{name}: {kind['requests']} requests ({kind['retries']} retries, {kind['errors']} errors), "
+                f"{kind['bytes'] / 1024:.1f} KiB ({kind['wire_bytes'] / 1024:.1f} KiB transferred), "
+                f"statuses {kind['statuses']}"
+            )
+            lines.append(
+                f"  time: ttfb {kind['ttfb_ms'] / 1000:.2f}s, download {kind['download_ms'] / 1000:.2f}s, "
+                f"rate limiter {kind['queue_ms'] / 1000:.2f}s, validation {kind['validation_ms'] / 1000:.2f}s, "
+                f"backoff {kind['backoff_ms'] / 1000:.2f}s, 429 waits {kind['rate_limited_ms'] / 1000:.2f}s"
+            )
+            latencies = sorted(
+                entry.get("ttfb_ms", 0.0) + entry.get("download_ms", 0.0)
+                for entry in records if entry["kind"] == name and "status" in entry
+            )
+            if latencies:
+                lines.append(
+                    f"  latency p50 {percentile(latencies, 50):.0f}ms, p90 {percentile(latencies, 90):.0f}ms, "
+                    f"max {latencies[-1]:.0f}ms"
+                )
+                lines.extend(f"  {row}" for row in histogram(latencies))
+        return "\n".join(lines)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def histogram(values: List[float], buckets: Optional[List[float]] = None) -> List[str]:
+    """Render values (ms) as text bars over fixed latency buckets."""
+    buckets = buckets or HISTOGRAM_BUCKETS_MS
+    counts = [0] * (len(buckets) + 1)
+    for value in values:
+        for i, bound in enumerate(buckets):
+            if value < bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+
+    labels = [f"<{bound}ms" for bound in buckets] + [f">={buckets[-1]}ms"]
+    # Only show the range of buckets that actually has values
+    used = [i for i, count in enumerate(counts) if count] or [0]
+    peak = max(counts) or 1
+    return [
+        f"{labels[i]:>9} {'#' * round(counts[i] * HISTOGRAM_WIDTH / peak):<{HISTOGRAM_WIDTH}} {counts[i]}"
+        for i in range(used[0], used[-1] + 1)
+    ]
+
+
+# Shared by all fetch functions, like the module loggers
+metrics = FetchMetrics()
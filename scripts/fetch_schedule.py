@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Change-frequency driven polling for the documentation fetcher.
+
+With --schedule adaptive, a page is only requested when it is due. Each
+page's change rate is estimated from its versions in docs/docs_history.json
+(falling back to the manifest's last_updated), and the page is polled about
+as often as it is expected to have changed by EXPECTED_CHANGES_PER_POLL:
+pages that change daily are fetched on every run, pages that have not
+changed in months only once per freshness SLA. A sitemap <lastmod> newer
+than the last check, or an earlier failure, always makes a page due, and a
+periodic full sweep requests every page regardless.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+FRESHNESS_SLA_HOURS = 24.0     # no page goes unchecked for longer than this
+FULL_SWEEP_DAYS = 7.0          # every page is requested at least this often
+EXPECTED_CHANGES_PER_POLL = 0.1  # a page changing daily is polled every ~2.4 hours
+# Prior for the rate estimate: a page with no history is assumed to change
+# about once a week until observed otherwise
+PRIOR_CHANGES = 1.0
+PRIOR_DAYS = 7.0
+
+
+def as_datetime(value: Optional[str]) -> Optional[datetime]:
+    """
+    Parse an ISO 8601 / W3C datetime (sitemap lastmods, manifest and checkpoint
+    times); naive values are local time, like datetime.now().isoformat().
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.astimezone()
+
+
+def change_rate(dates: List[datetime], now: datetime) -> float:
+    """
+    Estimated changes per day from a document's version dates (oldest first).
+    The first version is when tracking started, every later one a change.
+    """
+    if not dates:
+        return PRIOR_CHANGES / PRIOR_DAYS
+    observed_days = max((now - dates[0]).total_seconds() / 86400, 0.0)
+    return (len(dates) - 1 + PRIOR_CHANGES) / (observed_days + PRIOR_DAYS)
+
+
+class PollSchedule:
+    """Decides, per page, whether this run should request it."""
+
+    def __init__(self, history: dict, manifest_files: Dict[str, dict], checked: Dict[str, str],
+                 sla: timedelta, now: Optional[datetime] = None):
+        self.now = now or datetime.now().astimezone()
+        self.sla = sla
+        self.checked = {page: as_datetime(value) for page, value in checked.items()}
+        self.rates: Dict[str, float] = {}
+        logs = history.get("files", {})
+        for filename, entry in manifest_files.items():
+            dates = [as_datetime(version.get("date")) for version in logs.get(filename, [])
+                     if version.get("hash")]
+            dates = [date for date in dates if date is not None]
+            if not dates and as_datetime(entry.get("last_updated")):
+                dates = [as_datetime(entry["last_updated"])]
+            self.rates[filename] = change_rate(dates, self.now)
+
+    def interval(self, filename: str) -> timedelta:
+        """How long a page may go unchecked: until EXPECTED_CHANGES_PER_POLL changes are expected, at most the SLA."""
+        rate = self.rates.get(filename, PRIOR_CHANGES / PRIOR_DAYS)
+        return min(timedelta(days=EXPECTED_CHANGES_PER_POLL / rate), self.sla)
+
+    def is_due(self, page: str, filename: str, lastmod: Optional[datetime] = None) -> bool:
+        last_checked = self.checked.get(page)
+        if last_checked is None:
+            return True
+        if lastmod is not None and lastmod > last_checked:
+            return True  # the sitemap says it changed since
+        return self.now - last_checked >= self.interval(filename)
+
+    def hottest(self, count: int = 5) -> List[str]:
+        """Filenames with the highest estimated change rate, for the run log."""
+        ranked = sorted(self.rates.items(), key=lambda item: -item[1])[:count]
+        return [f"{filename} ({rate:.2f}/day)" for filename, rate in ranked]
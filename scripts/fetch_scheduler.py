@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Shared, server-aware request pacing for the documentation fetcher.
+
+Every host gets its own token bucket whose rate adapts AIMD-style: it grows
+by a fixed step after each healthy response and is cut in half on a 429,
+a 5xx or a marked latency increase (at most once per cooldown, so a burst of
+errors from requests already in flight counts once). A Retry-After from a
+host pauses only that host, so requests to other hosts (e.g. the GitHub
+changelog while the docs site is throttling) keep going.
+"""
+
+import email.utils
+import logging
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+MIN_RATE = 0.2              # requests/second a host is never slowed below
+ADDITIVE_STEP = 0.25        # requests/second added after a healthy response
+DECREASE_FACTOR = 0.5       # multiplier applied on congestion
+DECREASE_COOLDOWN = 1.0     # seconds between two rate decreases of one host
+THROTTLED_RATE = 2.0        # starting rate for an unlimited host that gets a 429
+LATENCY_EWMA_WEIGHT = 0.2   # weight of the newest latency sample
+LATENCY_SLOWDOWN = 3.0      # latency this many times the best average counts as congestion
+MAX_RETRY_AFTER = 120.0     # longest pause honoured from a Retry-After header
+DEFAULT_RETRY_AFTER = 5.0   # pause when a 429 carries no usable Retry-After
+
+
+def parse_retry_after(value: Optional[str], default: float = DEFAULT_RETRY_AFTER) -> float:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), capped."""
+    if not value:
+        return default
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            when = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return default
+        if when is None:
+            return default
+        seconds = when.timestamp() - time.time()
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+class HostState:
+    """Adaptive token bucket and backoff state for one host."""
+
+    def __init__(self, max_rate: Optional[float], burst: int):
+        self.max_rate = max_rate          # None: unlimited until the host pushes back
+        self.rate = max_rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+        self.latency: Optional[float] = None
+        self.best_latency: Optional[float] = None
+        self.throttled = 0
+        self.errors = 0
+        self.decreases = 0
+
+    def next_slot(self, now: float) -> float:
+        """Seconds until a request may start; consumes a token when it returns 0."""
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.rate is None:
+            return 0.0
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def decrease(self, now: float) -> None:
+        if now - self.last_decrease < DECREASE_COOLDOWN:
+            return
+        self.last_decrease = now
+        self.decreases += 1
+        if self.rate is None:
+            self.rate = THROTTLED_RATE
+            self.tokens = min(self.tokens, 1.0)
+        else:
+            self.rate = max(MIN_RATE, self.rate * DECREASE_FACTOR)
+
+    def increase(self) -> None:
+        if self.rate is None:
+            return
+        ceiling = self.max_rate if self.max_rate is not None else float("inf")
+        self.rate = min(ceiling, self.rate + ADDITIVE_STEP)
+
+
+class RequestScheduler:
+    """
+    Thread-safe pacing of requests across hosts.
+
+    Workers call acquire(url) before each attempt and report the outcome with
+    record(url, status, latency, retry_after). max_rate is the per-host ceiling
+    in requests/second (None or <= 0 for no ceiling); burst is how many
+    requests may start back to back.
+    """
+
+    def __init__(self, max_rate: Optional[float] = None, burst: int = 1):
+        self.max_rate = max_rate if max_rate and max_rate > 0 else None
+        self.burst = burst
+        self.hosts: Dict[str, HostState] = {}
+        self.lock = threading.Lock()
+
+    def _host(self, url: str) -> HostState:
+        host = urlparse(url).netloc
+        if host not in self.hosts:
+            self.hosts[host] = HostState(self.max_rate, self.burst)
+        return self.hosts[host]
+
+    def acquire(self, url: str) -> float:
+        """Block until this URL's host may take another request. Returns seconds waited."""
+        started = time.monotonic()
+        while True:
+            with self.lock:
+                wait = self._host(url).next_slot(time.monotonic())
+            if wait <= 0:
+                return time.monotonic() - started
+            time.sleep(min(wait, 1.0))  # re-check: a pause may be lifted or extended
+
+    def record(self, url: str, status: Optional[int], latency: Optional[float] = None,
+               retry_after: Optional[float] = None) -> None:
+        """
+        Feed back one response. status None means a connection error;
+        latency is the time to first byte in seconds.
+        """
+        now = time.monotonic()
+        with self.lock:
+            state = self._host(url)
+            if status == 429:
+                state.throttled += 1
+                state.decrease(now)
+                pause = retry_after if retry_after is not None else DEFAULT_RETRY_AFTER
+                state.paused_until = max(state.paused_until, now + pause)
+                return
+            if status is None or status >= 500:
+                state.errors += 1
+                state.decrease(now)
+                return
+
+            if latency is not None:
+                state.latency = latency if state.latency is None else (
+                    LATENCY_EWMA_WEIGHT * latency + (1 - LATENCY_EWMA_WEIGHT) * state.latency
+                )
+                if state.best_latency is None or state.latency < state.best_latency:
+                    state.best_latency = state.latency
+                # Only paced hosts slow down on latency; errors are what cap an unlimited one
+                if (state.rate is not None and state.best_latency > 0
+                        and state.latency > LATENCY_SLOWDOWN * state.best_latency):
+                    state.decrease(now)
+                    return
+            state.increase()
+
+    def summary(self) -> Dict[str, dict]:
+        """Final rate and counters per host (suitable for fetch metadata)."""
+        with self.lock:
+            return {
+                host: {
+                    "rate": round(state.rate, 2) if state.rate is not None else None,
+                    "throttled": state.throttled,
+                    "errors": state.errors,
+                    "rate_decreases": state.decreases,
+                    "latency_ms": round(state.latency * 1000, 1) if state.latency is not None else None,
+                }
+                for host, state in sorted(self.hosts.items())
+            }
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Source registry for the documentation fetcher.
+
+A source is one documentation tree mirrored into its own output directory,
+with its own manifest, checkpoint, indexes and history. Its entry declares
+where its pages are listed (sitemaps), which listed URLs belong to it
+(include / exclude path fragments), how a URL path becomes a file name
+(strip_prefixes), how bodies are validated and which extra request headers
+are sent. Files that are not in a sitemap, like the Claude Code changelog,
+are declared as `files` of the source they are published with.
+
+SOURCES holds the built-in claude-code source (docs/). More sources are
+declared in a JSON file passed with --sources, for example another locale:
+
+    [{"name": "claude-code-ja", "output_dir": "mirrors/claude-code-ja",
+      "include": ["/ja/docs/claude-code/"], "headers": {"Accept-Language": "ja"}}]
+
+Omitted fields take the defaults below (the docs.anthropic.com sitemaps,
+SKIP_PATTERNS, markdown validation); strip_prefixes defaults to include and
+output_dir to mirrors/<name>. An entry named like a built-in source
+replaces it. All sources of a run share one session, rate limiter and
+worker pool, and sources listing the same sitemaps read them once.
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+# Sitemap URLs to try (in order of preference)
+SITEMAP_URLS = (
+    "https://docs.anthropic.com/sitemap.xml",
+    "https://docs.anthropic.com/sitemap_index.xml",
+    "https://anthropic.com/sitemap.xml",
+)
+DEFAULT_BASE_URL = "https://docs.anthropic.com"  # used when no sitemap can be read
+
+# Only accept English documentation patterns
+ENGLISH_PATTERNS = (
+    '/en/docs/claude-code/',
+)
+
+# Skip certain types of pages
+SKIP_PATTERNS = (
+    '/tool-use/',  # Tool-specific pages
+    '/examples/',  # Example pages
+    '/legacy/',    # Legacy documentation
+    '/api/',       # API reference pages
+    '/reference/', # Reference pages that aren't core docs
+)
+
+# URL path prefixes removed to form file names ("/en/docs/claude-code/sdk" -> "sdk.md")
+FILENAME_PREFIXES = ('/en/docs/claude-code/', '/docs/claude-code/', '/claude-code/')
+
+# Essential pages used when the sitemap cannot be read
+FALLBACK_PAGES = (
+    "/en/docs/claude-code/overview",
+    "/en/docs/claude-code/setup",
+    "/en/docs/claude-code/quickstart",
+    "/en/docs/claude-code/memory",
+    "/en/docs/claude-code/common-workflows",
+    "/en/docs/claude-code/ide-integrations",
+    "/en/docs/claude-code/mcp",
+    "/en/docs/claude-code/github-actions",
+    "/en/docs/claude-code/sdk",
+    "/en/docs/claude-code/troubleshooting",
+    "/en/docs/claude-code/security",
+    "/en/docs/claude-code/settings",
+    "/en/docs/claude-code/hooks",
+    "/en/docs/claude-code/costs",
+    "/en/docs/claude-code/monitoring-usage",
+)
+
+# Claude Code release notes, fetched alongside the docs
+CHANGELOG_URL = "https://raw.githubusercontent.com/anthropics/claude-code/main/CHANGELOG.md"
+CHANGELOG_HEADER = (
+    "# Claude Code Changelog\n"
+    "\n"
+    "> **Source**: https://github.com/anthropics/claude-code/blob/main/CHANGELOG.md\n"
+    "> \n"
+    "> This is the official Claude Code release changelog, automatically fetched from the Claude Code "
+    "repository. For documentation, see other topics via `/docs`.\n"
+    "\n"
+    "---\n"
+    "\n"
+)
+
+# markdown: HTML, markdown structure, truncation and shrink checks;
+# text: only the length and shrink checks
+VALIDATORS = ("markdown", "text")
+
+
+class SourceFile(NamedTuple):
+    """A file fetched from a fixed URL rather than discovered in a sitemap."""
+    key: str                  # name in the checkpoint and fetch metadata's failed_pages
+    filename: str
+    url: str
+    original_url: str         # recorded in the manifest
+    origin: str = ""          # the manifest entry's "source"
+    header: str = ""          # prepended to the body
+    validator: str = "text"
+
+
+class Source(NamedTuple):
+    """A documentation tree and the rules for mirroring it (see the module docstring)."""
+    name: str
+    output_dir: str           # relative to the repository root
+    sitemap_urls: Tuple[str, ...] = SITEMAP_URLS
+    include: Tuple[str, ...] = ENGLISH_PATTERNS
+    exclude: Tuple[str, ...] = SKIP_PATTERNS
+    strip_prefixes: Tuple[str, ...] = FILENAME_PREFIXES
+    fallback_pages: Tuple[str, ...] = ()
+    base_url: str = DEFAULT_BASE_URL
+    validator: str = "markdown"
+    headers: Tuple[Tuple[str, str], ...] = ()
+    files: Tuple[SourceFile, ...] = ()
+
+    def file_for(self, key: str) -> Optional[SourceFile]:
+        """The declared file with this checkpoint key, if any."""
+        for source_file in self.files:
+            if source_file.key == key:
+                return source_file
+        return None
+
+
+SOURCES = (
+    Source(
+        name="claude-code",
+        output_dir="docs",
+        fallback_pages=FALLBACK_PAGES,
+        files=(SourceFile(
+            key="changelog",
+            filename="changelog.md",
+            url=CHANGELOG_URL,
+            original_url="https://github.com/anthropics/claude-code/blob/main/CHANGELOG.md",
+            origin="claude-code-repository",
+            header=CHANGELOG_HEADER,
+        ),),
+    ),
+)
+
+
+def source_from_json(entry: dict) -> Source:
+    """Build a Source from a registry file entry. Raises ValueError for invalid entries."""
+    if not isinstance(entry, dict) or not entry.get("name"):
+        raise ValueError(f"Source entries need a name: {entry!r}")
+    entry = dict(entry)
+    name = entry["name"]
+    unknown = set(entry) - set(Source._fields)
+    if unknown:
+        raise ValueError(f"Unknown field(s) in source {name}: {', '.join(sorted(unknown))}")
+
+    for field in ("sitemap_urls", "include", "exclude", "strip_prefixes", "fallback_pages"):
+        if field in entry:
+            entry[field] = tuple(entry[field])
+    entry.setdefault("output_dir", f"mirrors/{name}")
+    entry.setdefault("strip_prefixes", entry.get("include", FILENAME_PREFIXES))
+    entry["headers"] = tuple(sorted(entry.get("headers", {}).items()))
+    files = []
+    for file_entry in entry.get("files", []):
+        unknown = set(file_entry) - set(SourceFile._fields)
+        if unknown:
+            raise ValueError(f"Unknown field(s) in a file of source {name}: {', '.join(sorted(unknown))}")
+        try:
+            files.append(SourceFile(**{"original_url": file_entry.get("url", ""), **file_entry}))
+        except TypeError:
+            raise ValueError(f"Files of source {name} need a key, filename and url: {file_entry!r}")
+    entry["files"] = tuple(files)
+
+    source = Source(**entry)
+    for validator in [source.validator] + [source_file.validator for source_file in source.files]:
+        if validator not in VALIDATORS:
+            raise ValueError(f"Unknown validator {validator!r} in source {name} (expected one of {', '.join(VALIDATORS)})")
+    if Path(source.output_dir).is_absolute() or ".." in Path(source.output_dir).parts:
+        raise ValueError(f"output_dir of source {name} must stay inside the repository: {source.output_dir}")
+    return source
+
+
+def load_sources(path: Optional[Path] = None) -> List[Source]:
+    """The built-in sources, plus (or replaced by) those declared in a JSON registry file."""
+    sources = {source.name: source for source in SOURCES}
+    if path is not None:
+        entries = json.loads(path.read_text())
+        if not isinstance(entries, list):
+            raise ValueError(f"{path} must contain a list of sources")
+        for entry in entries:
+            source = source_from_json(entry)
+            sources[source.name] = source
+    return list(sources.values())
+
+
+def select_sources(sources: Sequence[Source], names: Optional[Sequence[str]] = None) -> List[Source]:
+    """The named sources (all when names is empty), checking that their output directories differ."""
+    by_name = {source.name: source for source in sources}
+    if names:
+        missing = [name for name in names if name not in by_name]
+        if missing:
+            raise ValueError(f"Unknown source(s): {', '.join(missing)} (known: {', '.join(by_name)})")
+        sources = [by_name[name] for name in dict.fromkeys(names)]
+    output_dirs: Dict[str, str] = {}
+    for source in sources:
+        key = str(Path(source.output_dir))
+        if key in output_dirs:
+            raise ValueError(f"Sources {output_dirs[key]} and {source.name} share the output directory {key}")
+        output_dirs[key] = source.name
+    return list(sources)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Long-running watch mode for the documentation fetcher.
+
+With --watch the fetcher stays up and runs one fetch cycle after another,
+keeping the manifest (and with it every page's ETag / Last-Modified), the
+HTTP session with its warm connections and the per-host request rates in
+memory between cycles. Cycles are spaced by a jittered interval so several
+mirrors do not poll in lockstep, and files are only written when a cycle
+finds a change.
+
+WatchStatus collects what the loop is doing; with --status-port it is
+served as JSON on 127.0.0.1:
+
+    curl -s http://127.0.0.1:8780/status    # cycles, last result, next poll
+    curl -s http://127.0.0.1:8780/healthz   # 200 while cycles keep succeeding, else 503
+"""
+
+import http.server
+import json
+import logging
+import random
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+WATCH_INTERVAL = 60.0     # default seconds between the start of one cycle and the next
+WATCH_JITTER = 0.2        # each wait is the interval +/- this fraction
+STATUS_HOST = "127.0.0.1"  # the status endpoint is never exposed beyond this machine
+HEALTHY_CYCLES = 3        # /healthz fails after this many intervals without a successful cycle
+
+
+def next_delay(interval: float, elapsed: float, jitter: float = WATCH_JITTER) -> float:
+    """Seconds to sleep before the next cycle, given how long the last one took."""
+    return max(interval * random.uniform(1 - jitter, 1 + jitter) - elapsed, 0.0)
+
+
+class WatchStatus:
+    """State of the watch loop, updated by the loop and read by the status endpoint."""
+
+    def __init__(self, interval: float):
+        self.lock = threading.Lock()
+        self.interval = interval
+        self.started = datetime.now()
+        self.state = "starting"
+        self.cycles = 0
+        self.changed_cycles = 0
+        self.consecutive_failures = 0
+        self.last_success: Optional[datetime] = None
+        self.last_cycle: Optional[dict] = None
+        self.next_cycle: Optional[datetime] = None
+
+    def cycle_started(self) -> None:
+        with self.lock:
+            self.state = "fetching"
+            self.next_cycle = None
+
+    def cycle_finished(self, summary: dict, error: Optional[str] = None) -> None:
+        """Record a finished cycle: summary is the run's fetch metadata (empty if it raised)."""
+        with self.lock:
+            self.cycles += 1
+            if error is None:
+                self.consecutive_failures = 0
+                self.last_success = datetime.now()
+                if summary.get("manifest_changed"):
+                    self.changed_cycles += 1
+            else:
+                self.consecutive_failures += 1
+            self.last_cycle = {
+                "finished": datetime.now().isoformat(),
+                "error": error,
+                **{key: summary[key] for key in (
+                    "fetch_duration_seconds", "manifest_changed", "total_pages_discovered",
+                    "pages_fetched_successfully", "pages_not_modified", "pages_not_due",
+                    "pages_failed", "failed_pages",
+                ) if key in summary},
+            }
+
+    def sleeping(self, delay: float) -> None:
+        with self.lock:
+            self.state = "idle"
+            self.next_cycle = datetime.now() + timedelta(seconds=delay)
+
+    def healthy(self) -> bool:
+        """A cycle succeeded recently enough (or the first one is still running)."""
+        with self.lock:
+            if self.cycles == 0:
+                return True  # a cold first cycle may take longer than several intervals
+            since = self.last_success or self.started
+        return datetime.now() - since <= timedelta(seconds=self.interval * HEALTHY_CYCLES)
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                "state": self.state,
+                "started": self.started.isoformat(),
+                "interval_seconds": self.interval,
+                "cycles": self.cycles,
+                "changed_cycles": self.changed_cycles,
+                "consecutive_failures": self.consecutive_failures,
+                "last_success": self.last_success.isoformat() if self.last_success else None,
+                "next_cycle": self.next_cycle.isoformat() if self.next_cycle else None,
+                "last_cycle": self.last_cycle,
+            }
+
+
+class StatusHandler(http.server.BaseHTTPRequestHandler):
+    status: WatchStatus = None  # set by start_status_server()
+
+    def log_message(self, format, *args):
+        pass
+
+    def respond(self, code: int, payload: dict) -> None:
+        body = (json.dumps(payload, indent=2) + "\n").encode('utf-8')
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path in ("/", "/status"):
+            return self.respond(200, self.status.snapshot())
+        if path == "/healthz":
+            healthy = self.status.healthy()
+            return self.respond(200 if healthy else 503, {"healthy": healthy})
+        self.respond(404, {"error": "not found"})
+
+
+def start_status_server(status: WatchStatus, port: int) -> http.server.ThreadingHTTPServer:
+    """Serve status on STATUS_HOST:port from a daemon thread; port 0 picks a free port."""
+    handler = type("BoundStatusHandler", (StatusHandler,), {"status": status})
+    server = http.server.ThreadingHTTPServer((STATUS_HOST, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"Status endpoint: http://{STATUS_HOST}:{server.server_port}/status")
+    return server
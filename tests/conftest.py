@@ -0,0 +1,40 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# The scripts are run from scripts/ and import each other as top-level modules
+SCRIPTS = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+sys.path.insert(0, str(SCRIPTS / "benchmark"))
+
+
+@pytest.fixture
+def mock_site():
+    """A local docs site (benchmark/mock_docs_server.py); .state holds its pages and request counters."""
+    from mock_docs_server import MockConfig, start_in_thread
+    server = start_in_thread(MockConfig(pages=6, page_size=4096, seed=1, compress=False))
+    server.base_url = f"http://127.0.0.1:{server.server_port}"
+    server.state = server.RequestHandlerClass.state
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fetch(mock_site, tmp_path):
+    """Run the fetcher against mock_site into tmp_path/docs; returns the run's fetch metadata."""
+    import fetch_claude_docs
+
+    def fetch(*args: str) -> dict:
+        docs_dir = tmp_path / "docs"
+        fetch_claude_docs.main([
+            "--docs-dir", str(docs_dir), "--rate-limit", "0",
+            "--sitemap-url", f"{mock_site.base_url}/sitemap.xml",
+            "--changelog-url", f"{mock_site.base_url}/CHANGELOG.md",
+            *args,
+        ])
+        return json.loads((docs_dir / fetch_claude_docs.METADATA_FILE).read_text())
+
+    return fetch
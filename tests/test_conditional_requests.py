@@ -0,0 +1,112 @@
+import hashlib
+import json
+
+import pytest
+
+from fetch_checkpoint import CHECKPOINT_FILE, FetchCheckpoint
+from fetch_claude_docs import (
+    MANIFEST_FILE, FetchResult, conditional_headers, create_session, fetch_markdown_content, get_validators,
+    store_fetch_result,
+)
+
+PAGES = 6
+
+
+def test_second_run_revalidates_and_gets_304s(fetch, mock_site, tmp_path):
+    fetch()
+    manifest_path = tmp_path / "docs" / MANIFEST_FILE
+    manifest = manifest_path.read_bytes()
+    assert "etag" not in manifest.decode()
+    validators = json.loads((tmp_path / "docs" / CHECKPOINT_FILE).read_text())["validators"]
+    assert len(validators) == PAGES + 1  # and the changelog
+
+    # Without lastmod the pages are requested again, each with its ETag
+    mock_site.state.reset_counters()
+    metadata = fetch("--ignore-lastmod")
+    counters = mock_site.state.snapshot()
+    assert counters["304"] == PAGES + 1
+    assert counters["200"] == 1  # the sitemap
+    assert metadata["pages_not_modified"] == PAGES + 1
+    assert not metadata["manifest_changed"]
+    assert manifest_path.read_bytes() == manifest
+
+
+def test_changed_page_is_downloaded_again(fetch, mock_site, tmp_path):
+    fetch()
+    mock_site.state.change_pages(0.2)
+    mock_site.state.reset_counters()
+    metadata = fetch("--ignore-lastmod")
+    assert mock_site.state.snapshot()["304"] == PAGES
+    assert metadata["manifest_changed"]
+
+
+def test_validators_of_an_older_manifest_are_still_used(fetch, mock_site, tmp_path):
+    fetch()
+    docs_dir = tmp_path / "docs"
+    checkpoint = json.loads((docs_dir / CHECKPOINT_FILE).read_text())
+    manifest = json.loads((docs_dir / MANIFEST_FILE).read_text())
+    for page, validators in checkpoint.pop("validators").items():
+        filename = "changelog.md" if page == "changelog" else page.rsplit("/", 1)[-1] + ".md"
+        manifest["files"][filename].update(validators)
+    (docs_dir / CHECKPOINT_FILE).write_text(json.dumps(checkpoint))
+    (docs_dir / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+
+    mock_site.state.reset_counters()
+    metadata = fetch("--ignore-lastmod")
+    assert mock_site.state.snapshot()["304"] == PAGES + 1
+    # Dropping the validators from the manifest alone is not a change
+    assert not metadata["manifest_changed"]
+
+
+@pytest.fixture
+def page_fetch(mock_site, tmp_path):
+    """fetch_markdown_content for page-1 of mock_site with the given validators."""
+    from fetch_scheduler import RequestScheduler
+    from fetch_sources import SOURCES
+
+    session = create_session(1)
+
+    def page_fetch(validators: dict):
+        return fetch_markdown_content(SOURCES[0], "/en/docs/claude-code/page-1", session, mock_site.base_url,
+                                      RequestScheduler(), tmp_path, validators)
+
+    yield page_fetch
+    session.close()
+
+
+def test_conditional_headers_carry_the_validators():
+    headers = conditional_headers({"etag": '"abc"', "last_modified": "Wed, 01 Jan 2025 00:00:00 GMT"},
+                                  (("Accept-Language", "ja"),))
+    assert headers["If-None-Match"] == '"abc"'
+    assert headers["If-Modified-Since"] == "Wed, 01 Jan 2025 00:00:00 GMT"
+    assert headers["Accept-Language"] == "ja"
+    assert "If-None-Match" not in conditional_headers({})
+
+
+def test_304_is_not_downloaded_or_validated(page_fetch, mock_site, tmp_path):
+    etag = '"' + hashlib.sha1(mock_site.state.page_body(1)).hexdigest() + '"'
+    result = page_fetch({"etag": etag, "last_modified": "Wed, 01 Jan 2025 00:00:00 GMT"})
+    assert result.not_modified
+    assert (result.etag, result.last_modified) == (etag, "Wed, 01 Jan 2025 00:00:00 GMT")
+    assert list(tmp_path.iterdir()) == []
+    assert mock_site.state.snapshot()["bytes"] == 0
+
+    # A validator the server does not recognize gets the page
+    result = page_fetch({"etag": '"stale"'})
+    assert not result.not_modified and result.etag == etag
+    assert result.spool_path.read_bytes() == mock_site.state.page_body(1)
+
+
+def test_304_keeps_the_manifest_entry():
+    manifest = {"files": {"page-1.md": {"hash": "h", "last_updated": "2025-01-01T00:00:00"}}}
+    entry = store_fetch_result(None, manifest, FetchResult("page-1.md", None, '"abc"'))
+    assert entry == {"hash": "h", "last_updated": "2025-01-01T00:00:00"}
+
+
+def test_missing_file_is_not_revalidated(tmp_path):
+    # A 304 for a file that is gone locally would lose it
+    checkpoint = FetchCheckpoint(tmp_path / CHECKPOINT_FILE)
+    checkpoint.set_validators("/en/docs/claude-code/page-1", '"abc"', None)
+    assert get_validators(tmp_path, checkpoint, {}, "/en/docs/claude-code/page-1", "page-1.md") == {}
+    (tmp_path / "page-1.md").write_text("# Page 1\n")
+    assert get_validators(tmp_path, checkpoint, {}, "/en/docs/claude-code/page-1", "page-1.md") == {"etag": '"abc"'}
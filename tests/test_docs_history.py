@@ -0,0 +1,75 @@
+import json
+import subprocess
+
+import pytest
+
+from docs_history import main, update_history
+
+V1 = "# Hooks\n\nRun commands before tools.\n"
+V2 = "# Hooks\n\nRun commands before and after tools.\n\n## Matchers\n"
+
+
+def record(docs_dir, content: str, content_hash: str, date: str) -> None:
+    (docs_dir / "hooks.md").write_text(content)
+    update_history(docs_dir, {"hooks.md": {"hash": content_hash, "last_updated": date}})
+
+
+@pytest.fixture
+def clone(tmp_path, monkeypatch):
+    """A git clone whose docs/hooks.md has two commits; returns its docs directory."""
+    for variable in ("GIT_AUTHOR_NAME", "GIT_COMMITTER_NAME"):
+        monkeypatch.setenv(variable, "test")
+    for variable in ("GIT_AUTHOR_EMAIL", "GIT_COMMITTER_EMAIL"):
+        monkeypatch.setenv(variable, "test@example.com")
+    docs_dir = tmp_path / "docs"
+    docs_dir.mkdir()
+    subprocess.run(["git", "init", "-q", str(tmp_path)], check=True)
+    for message, content in (("Add hooks", V1), ("Update hooks", V2)):
+        (docs_dir / "hooks.md").write_text(content)
+        subprocess.run(["git", "-C", str(tmp_path), "add", "docs/hooks.md"], check=True)
+        subprocess.run(["git", "-C", str(tmp_path), "commit", "-q", "-m", message], check=True)
+    return docs_dir
+
+
+def test_log_and_changes_from_the_local_history(tmp_path, capsys):
+    record(tmp_path, V1, "a" * 64, "2020-01-01T00:00:00")
+    record(tmp_path, V2, "b" * 64, "2020-01-02T00:00:00")
+
+    assert main(["--docs-dir", str(tmp_path), "log", "hooks"]) == 0
+    assert capsys.readouterr().out.splitlines() == [
+        "2020-01-02 00:00  bbbbbbbbbbbb  +3 -1",
+        "2020-01-01 00:00  aaaaaaaaaaaa  3 lines, first recorded",
+    ]
+
+    assert main(["--docs-dir", str(tmp_path), "changes", "hooks", "--since", "2020-01-01T12:00"]) == 0
+    out = capsys.readouterr().out.splitlines()
+    assert out[0] == "=== 2020-01-02 00:00 (bbbbbbbbbbbb): +3 -1"
+    assert "+Run commands before and after tools." in out
+    assert "-Run commands before tools." in out
+
+
+def test_without_local_history_git_is_read(clone, capsys):
+    assert not (clone / "docs_history.json").exists()
+    assert main(["--docs-dir", str(clone), "log", "hooks"]) == 0
+    log = capsys.readouterr().out.splitlines()
+    assert len(log) == 2
+    assert log[0].endswith("+3 -1") and log[1].endswith("+3 -0")
+
+    assert main(["--docs-dir", str(clone), "changes", "hooks", "--since", "1d"]) == 0
+    out = capsys.readouterr().out
+    assert out.count("=== ") == 2
+    assert "+## Matchers" in out and "-Run commands before tools." in out
+
+
+def test_history_that_starts_after_since_falls_back_to_git(clone, capsys):
+    # A history started over (evicted cache) that only knows the latest version
+    record(clone, V2, "b" * 64, "2099-01-01T00:00:00")
+    assert json.loads((clone / "docs_history.json").read_text())["files"]["hooks.md"]
+
+    assert main(["--docs-dir", str(clone), "changes", "hooks", "--since", "1d"]) == 0
+    assert capsys.readouterr().out.count("=== ") == 2
+
+
+def test_unknown_document(clone, capsys):
+    assert main(["--docs-dir", str(clone), "changes", "missing"]) == 1
+    assert "No history recorded for missing.md" in capsys.readouterr().err
@@ -0,0 +1,137 @@
+import hashlib
+import json
+
+import pytest
+
+import docs_index
+from docs_index import (
+    INDEX_FILE, SECTIONS_FILE, extract_sections, format_result, read_snippet, search, slugify,
+    update_search_index, update_section_index,
+)
+
+
+def write_docs(docs_dir, documents: dict) -> dict:
+    """Write documents ({name: text}) and return manifest file entries hashed by their text."""
+    files = {}
+    for name, text in documents.items():
+        (docs_dir / name).write_text(text)
+        files[name] = {"hash": hashlib.sha256(text.encode()).hexdigest()}
+    return files
+
+
+@pytest.fixture
+def docs(tmp_path):
+    return write_docs(tmp_path, {
+        "hooks.md": "# Hooks\n\nHooks run shell commands. A hook matcher selects tools; hooks hooks hooks.\n",
+        "settings.md": "# Settings\n\nPermissions and hooks are configured in settings files.\n"
+                       "## Permissions\n\nPermission rules allow or deny tools.\n",
+        "memory.md": "# Memory\n\nThe CLAUDE.md memory file is loaded at startup.\n",
+    })
+
+
+def ranked(index, query, **kwargs):
+    return [result["file"] for result in search(index, query, **kwargs)]
+
+
+def test_bm25_ranks_by_term_weight(tmp_path, docs):
+    index = update_search_index(tmp_path, docs)
+    assert ranked(index, "hooks") == ["hooks.md", "settings.md"]
+    assert ranked(index, "permission rules") == ["settings.md"]
+    # Stopwords and unknown words score nothing
+    assert ranked(index, "the and of") == []
+    assert ranked(index, "kubernetes") == []
+    # Postings are stored best match first
+    assert [posting[0] for posting in index["terms"]["hooks"]] == [
+        index["doc_names"].index("hooks.md"), index["doc_names"].index("settings.md")]
+
+
+def test_unknown_terms_fall_back_to_prefixes(tmp_path, docs):
+    index = update_search_index(tmp_path, docs)
+    assert ranked(index, "permis") == ["settings.md"]
+    assert ranked(index, "memor") == ["memory.md"]
+
+
+def test_only_changed_documents_are_reindexed(tmp_path, docs, monkeypatch):
+    first = update_search_index(tmp_path, docs)
+    analyzed = []
+    analyze = docs_index.analyze_document
+    monkeypatch.setattr(docs_index, "analyze_document", lambda content: analyzed.append(content) or analyze(content))
+
+    assert update_search_index(tmp_path, docs) == first
+    assert analyzed == []
+
+    docs.update(write_docs(tmp_path, {"memory.md": "# Memory\n\nHooks can also load memory.\n"}))
+    updated = update_search_index(tmp_path, docs)
+    assert len(analyzed) == 1
+    # The same index as a build from scratch
+    (tmp_path / INDEX_FILE).unlink()
+    assert update_search_index(tmp_path, docs) == updated
+    assert json.loads((tmp_path / INDEX_FILE).read_text()) == updated
+
+
+def test_results_carry_a_snippet(tmp_path, docs):
+    index = update_search_index(tmp_path, docs)
+    result = search(index, "matcher")[0]
+    snippet = read_snippet(tmp_path, result["file"], result["offset"])
+    assert "hook matcher selects tools" in snippet
+    assert format_result(result, snippet).startswith("  • hooks\n      ")
+
+
+PAGE = b"""# Hooks reference
+
+## Configuration
+
+### Structure
+
+```yaml
+# Not a heading
+```
+
+## Hook Events
+
+### PreToolUse
+
+## Configuration
+"""
+
+
+def test_sections_run_to_the_next_heading_of_their_level():
+    sections = extract_sections(PAGE)
+    assert [section[:3] for section in sections] == [
+        [1, "hooks-reference", "Hooks reference"],
+        [2, "configuration", "Configuration"],
+        [3, "structure", "Structure"],
+        [2, "hook-events", "Hook Events"],
+        [3, "pretooluse", "PreToolUse"],
+        # Repeated headings are numbered like the rendered site
+        [2, "configuration-1", "Configuration"],
+    ]
+    ranges = {anchor: PAGE[start:end] for _level, anchor, _title, start, end in sections}
+    assert ranges["hooks-reference"] == PAGE
+    assert ranges["configuration"].startswith(b"## Configuration") and ranges["configuration"].endswith(b"```\n\n")
+    assert ranges["hook-events"] == b"## Hook Events\n\n### PreToolUse\n\n"
+
+
+@pytest.mark.parametrize("title, anchor", [
+    ("Hook Events", "hook-events"),
+    ("`PreToolUse` input", "pretooluse-input"),
+    ("Settings & permissions (beta)", "settings-permissions-beta"),
+])
+def test_slugify(title, anchor):
+    assert slugify(title) == anchor
+
+
+def test_section_index_keeps_unchanged_tables(tmp_path, docs, monkeypatch):
+    first = update_section_index(tmp_path, docs)
+    assert [section[1] for section in first["files"]["settings.md"]["sections"]] == ["settings", "permissions"]
+    written = (tmp_path / SECTIONS_FILE).stat().st_mtime_ns
+
+    monkeypatch.setattr(docs_index, "extract_sections", lambda content: pytest.fail("re-read"))
+    assert update_section_index(tmp_path, docs) == first
+    assert (tmp_path / SECTIONS_FILE).stat().st_mtime_ns == written
+
+
+def test_search_hits_are_labelled_with_their_section(tmp_path, docs):
+    sections = update_section_index(tmp_path, docs)
+    index = update_search_index(tmp_path, docs)
+    assert search(index, "deny", sections=sections)[0]["anchor"] == "permissions"
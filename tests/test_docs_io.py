@@ -0,0 +1,91 @@
+import os
+
+import pytest
+
+import docs_io
+from docs_io import STAGING_DIR, StagedWriter, atomic_write
+
+
+@pytest.fixture
+def replaced(monkeypatch):
+    """Names of the files os.replace() moves into place, in order."""
+    names = []
+    real_replace = os.replace
+
+    def recording_replace(src, dst):
+        names.append(os.path.basename(dst))
+        real_replace(src, dst)
+
+    monkeypatch.setattr(docs_io.os, "replace", recording_replace)
+    return names
+
+
+def test_commit_moves_the_manifest_last_and_removes_after(tmp_path, monkeypatch):
+    (tmp_path / "old.md").write_text("old")
+    (tmp_path / "docs_manifest.json").write_text("{}")
+    writer = StagedWriter(tmp_path)
+    writer.begin()
+    writer.write("docs_manifest.json", '{"files": {"a.md": {}, "b.md": {}}}')
+    writer.write("a.md", "a")
+    writer.write("b.md", "b")
+    writer.remove("old.md")
+
+    replaced = []
+    real_replace = os.replace
+
+    def recording_replace(src, dst):
+        if os.path.basename(dst) == "docs_manifest.json":
+            # Everything the new manifest references is already in place,
+            # and what it dropped has not been deleted yet
+            assert (tmp_path / "a.md").read_text() == "a"
+            assert (tmp_path / "b.md").read_text() == "b"
+            assert (tmp_path / "old.md").exists()
+        replaced.append(os.path.basename(dst))
+        real_replace(src, dst)
+
+    monkeypatch.setattr(docs_io.os, "replace", recording_replace)
+    assert writer.commit(last=("docs_manifest.json",)) == 3
+
+    assert replaced == ["a.md", "b.md", "docs_manifest.json"]
+    assert not (tmp_path / "old.md").exists()
+    assert not (tmp_path / STAGING_DIR).exists()
+
+
+def test_commit_keeps_staging_order_without_last(tmp_path, replaced):
+    writer = StagedWriter(tmp_path)
+    writer.begin()
+    for name in ("c.md", "a.md", "b.md"):
+        writer.write(name, name)
+
+    writer.commit()
+    assert replaced == ["c.md", "a.md", "b.md"]
+
+
+def test_interrupted_run_leaves_the_published_tree_untouched(tmp_path):
+    (tmp_path / "a.md").write_text("published")
+    writer = StagedWriter(tmp_path)
+    writer.begin()
+    writer.write("a.md", "staged")
+    assert (tmp_path / "a.md").read_text() == "published"
+
+
+def test_begin_keeps_only_the_named_leftovers(tmp_path):
+    staging = tmp_path / STAGING_DIR
+    (staging / "spool").mkdir(parents=True)
+    (staging / "a.md").write_text("resumed")
+    (staging / "b.md").write_text("stale")
+
+    writer = StagedWriter(tmp_path)
+    writer.begin(keep=["a.md"])
+    assert sorted(path.name for path in staging.iterdir()) == ["a.md"]
+    assert writer.commit() == 1
+    assert (tmp_path / "a.md").read_text() == "resumed"
+    assert not (tmp_path / "b.md").exists()
+
+
+def test_atomic_write_leaves_no_temporary_file(tmp_path):
+    target = tmp_path / "docs_manifest.json"
+    atomic_write(target, "{}")
+    atomic_write(target, b'{"files": {}}')
+    assert target.read_bytes() == b'{"files": {}}'
+    assert [path.name for path in tmp_path.iterdir()] == ["docs_manifest.json"]
@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+import docs_query
+from docs_index import update_section_index
+from docs_links import LINKS_FILE, localize, update_link_graph
+
+BASE = "https://docs.anthropic.com/en/docs/claude-code/"
+HOOKS = b"""# Hooks
+
+See [settings](/en/docs/claude-code/settings), [matchers](#matchers) and [gone](/en/docs/claude-code/gone).
+
+## Matchers
+
+Use [permission rules](/en/docs/claude-code/settings#permissions) or [settings](settings).
+
+```markdown
+[not a link](/en/docs/claude-code/missing)
+```
+"""
+SETTINGS = b"""# Settings
+
+## Permissions
+
+Run [hooks](https://docs.anthropic.com/en/docs/claude-code/hooks) first, not [these](hooks#no-such-heading).
+"""
+
+
+@pytest.fixture
+def graph(tmp_path):
+    files = {}
+    for name, content in (("hooks", HOOKS), ("settings", SETTINGS)):
+        (tmp_path / f"{name}.md").write_bytes(content)
+        files[f"{name}.md"] = {"hash": name, "original_url": BASE + name, "original_md_url": f"{BASE}{name}.md"}
+    update_link_graph(tmp_path, files, update_section_index(tmp_path, files))
+    return json.loads((tmp_path / LINKS_FILE).read_text())
+
+
+def test_links_are_resolved_to_mirrored_files(graph):
+    targets = [(target, anchor) for target, anchor, *_ in graph["files"]["hooks.md"]["links"]]
+    assert targets == [("settings.md", ""), ("hooks.md", "matchers"), ("settings.md", "permissions"),
+                       ("settings.md", "")]
+    assert graph["backlinks"] == {"hooks.md": ["settings.md"], "settings.md": ["hooks.md"]}
+    assert [(source, url, reason) for source, _offset, url, reason in graph["broken"]] == [
+        ("hooks.md", "/en/docs/claude-code/gone", "no such page"),
+        ("settings.md", "hooks#no-such-heading", "no such section"),
+    ]
+
+
+def test_related_topics_are_stored_per_page_and_section(graph):
+    hooks = graph["files"]["hooks.md"]
+    # The page lists other topics once; a section keeps its links' anchors
+    assert hooks["related"] == ["settings"]
+    assert hooks["sections"]["matchers"] == ["settings#permissions", "settings"]
+    assert graph["files"]["settings.md"]["sections"]["permissions"] == ["hooks"]
+
+
+def test_localized_links_point_at_the_files(graph, tmp_path):
+    local = localize(HOOKS, graph["files"]["hooks.md"]["links"])
+    assert b"[permission rules](settings.md#permissions)" in local
+    assert b"[matchers](hooks.md#matchers)" in local
+
+
+def test_query_prints_the_stored_lists(graph, tmp_path, monkeypatch, capsysbinary):
+    monkeypatch.setattr(docs_query, "LINKS", str(tmp_path / LINKS_FILE))
+    monkeypatch.setattr(docs_query, "OUTPUT", [])
+    docs_query.print_links("hooks", "matchers")
+    docs_query.print_links("settings")
+    docs_query.flush()
+    assert capsysbinary.readouterr().out.decode().splitlines() == [
+        "🔗 Related topics: settings#permissions, settings",
+        "↩️  Referenced by: settings",
+        "🔗 Related topics: hooks",
+        "↩️  Referenced by: hooks",
+    ]
@@ -0,0 +1,63 @@
+import json
+import os
+
+import pytest
+
+from docs_pack import MANIFEST_FILE, PACK_FILE, DocsPack, main, pack_is_current, write_pack
+
+
+@pytest.fixture
+def docs_dir(tmp_path):
+    (tmp_path / "hooks.md").write_text("# Hooks\n\nRun commands before tools.\n")
+    (tmp_path / "settings.md").write_text("# Settings\n")
+    manifest = {"files": {"hooks.md": {}, "settings.md": {}, "missing.md": {}}}
+    (tmp_path / MANIFEST_FILE).write_text(json.dumps(manifest))
+    return tmp_path
+
+
+def make_stale(docs_dir):
+    """Date the pack before the manifest, as an update that rewrote the manifest does."""
+    older = (docs_dir / MANIFEST_FILE).stat().st_mtime - 60
+    os.utime(docs_dir / PACK_FILE, (older, older))
+
+
+def test_pack_round_trip(docs_dir):
+    assert write_pack(docs_dir, json.loads((docs_dir / MANIFEST_FILE).read_text())["files"])
+    pack = DocsPack(docs_dir / PACK_FILE)
+    assert pack.documents() == ["hooks.md", "settings.md"]
+    assert pack.read("hooks.md") == (docs_dir / "hooks.md").read_bytes()
+    assert pack.read_json(MANIFEST_FILE)["files"]["hooks.md"] == {}
+    assert pack.read("missing.md") is None
+
+
+def test_unchanged_pack_is_not_rewritten(docs_dir):
+    files = {"hooks.md": {}, "settings.md": {}}
+    assert write_pack(docs_dir, files)
+    first = (docs_dir / PACK_FILE).read_bytes()
+    assert not write_pack(docs_dir, files)
+    assert (docs_dir / PACK_FILE).read_bytes() == first
+
+
+def test_pack_is_current_follows_the_manifest(docs_dir):
+    assert not pack_is_current(docs_dir)
+    write_pack(docs_dir, {"hooks.md": {}})
+    assert pack_is_current(docs_dir)
+    make_stale(docs_dir)
+    assert not pack_is_current(docs_dir)
+
+
+def test_reading_builds_a_missing_or_stale_pack(docs_dir, capsysbinary):
+    assert main(["--docs-dir", str(docs_dir), "cat", "hooks"]) == 0
+    assert capsysbinary.readouterr().out == (docs_dir / "hooks.md").read_bytes()
+    assert pack_is_current(docs_dir)
+
+    # An update that leaves the documents alone still makes the pack current again
+    make_stale(docs_dir)
+    assert main(["--docs-dir", str(docs_dir), "list"]) == 0
+    assert capsysbinary.readouterr().out == b"hooks\nsettings\n"
+    assert pack_is_current(docs_dir)
+
+
+def test_missing_manifest_is_reported(tmp_path, capsys):
+    assert main(["--docs-dir", str(tmp_path), "list"]) == 2
+    assert "could not be built" in capsys.readouterr().err
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+import docs_query
+from docs_query import FALLBACK_STATUS, parse_json
+
+
+@pytest.fixture(autouse=True)
+def fresh_output(monkeypatch):
+    monkeypatch.setattr(docs_query, "OUTPUT", [])
+    monkeypatch.setattr(docs_query, "output_written", False)
+
+
+@pytest.mark.parametrize("text", [
+    '{"files": {"hooks.md": {"sections": [[2, "configuration", "Configuration", 120, 4096]]}}}',
+    '  [1, -2.5e3, "caf\\u00e9 \\ud83d\\udcda", true, false, null, {}]\n',
+    '"é"',
+])
+def test_parse_json_matches_json_loads(text):
+    assert parse_json(text.encode("utf-8")) == json.loads(text)
+
+
+@pytest.mark.parametrize("data", [b"", b"{", b"{} []", b"nope", b"\xff{}"])
+def test_parse_json_rejects_invalid_input(data):
+    with pytest.raises(ValueError):
+        parse_json(data)
+
+
+def test_unexpected_error_hands_the_request_back(monkeypatch, capsysbinary):
+    def failing_query(argv):
+        docs_query.emit("partial")
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(docs_query, "query", failing_query)
+    assert docs_query.main(["hooks"]) == FALLBACK_STATUS
+    assert capsysbinary.readouterr().out == b""
+
+
+def test_no_fallback_once_output_was_written(monkeypatch, capsysbinary):
+    def failing_query(argv):
+        docs_query.emit("freshness")
+        docs_query.flush()
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(docs_query, "query", failing_query)
+    assert docs_query.main(["-t", "hooks"]) == 1
+    assert capsysbinary.readouterr().out == b"freshness\n"
+
+
+def test_check_flag_hands_back_only_the_rest(monkeypatch, capsysbinary):
+    calls = []
+
+    def fake_helper(*args):
+        docs_query.flush()
+        calls.append(args)
+        return 0
+
+    def failing_read_doc(topic):
+        docs_query.emit("partial")
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(docs_query, "run_helper", fake_helper)
+    monkeypatch.setattr(docs_query, "read_doc", failing_read_doc)
+    assert docs_query.main(["-t", "hooks"]) == 0
+    assert calls == [("freshness",), ("hooks",)]
+    assert b"partial" not in capsysbinary.readouterr().out
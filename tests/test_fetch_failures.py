@@ -0,0 +1,68 @@
+import json
+
+from fetch_checkpoint import CHECKPOINT_FILE
+from fetch_claude_docs import MANIFEST_FILE, SHRINK_CONFIRM_RUNS
+
+PAGE = "/en/docs/claude-code/page-1"
+SHORTER = b"# Page 1\n\n> Moved.\n\n- See [settings](/en/docs/claude-code/page-0) instead\n- Or the overview\n"
+
+
+def serve(mock_site, monkeypatch, body: bytes) -> None:
+    """Answer page-1 with body instead of its generated markdown."""
+    generated = type(mock_site.state).page_body
+    monkeypatch.setattr(mock_site.state, "page_body",
+                        lambda page: body if page == 1 else generated(mock_site.state, page))
+
+
+def test_failed_page_keeps_the_manifest_and_is_retried(fetch, mock_site, monkeypatch, tmp_path):
+    docs_dir = tmp_path / "docs"
+    fetch()
+    manifest = (docs_dir / MANIFEST_FILE).read_bytes()
+    page = (docs_dir / "page-1.md").read_bytes()
+
+    serve(mock_site, monkeypatch, b"<html><body>Service unavailable</body></html>")
+    metadata = fetch("--ignore-lastmod")
+    assert metadata["failed_pages"] == [PAGE]
+    # The previous copy is kept and nothing tracked changes for a transient failure
+    assert (docs_dir / MANIFEST_FILE).read_bytes() == manifest
+    assert (docs_dir / "page-1.md").read_bytes() == page
+    assert PAGE in json.loads((docs_dir / CHECKPOINT_FILE).read_text())["failed"]
+
+    # The next run fetches the failed page even though its lastmod is unchanged
+    monkeypatch.undo()
+    mock_site.state.reset_counters()
+    metadata = fetch()
+    assert mock_site.state.snapshot()["requests"] == 3  # sitemap, page-1 and the changelog
+    assert metadata["failed_pages"] == []
+    assert (docs_dir / MANIFEST_FILE).read_bytes() == manifest
+    assert json.loads((docs_dir / CHECKPOINT_FILE).read_text())["failed"] == {}
+
+
+def test_shrunk_page_is_accepted_once_it_keeps_coming_back(fetch, mock_site, monkeypatch, tmp_path):
+    docs_dir = tmp_path / "docs"
+    fetch()
+    page = (docs_dir / "page-1.md").read_bytes()
+
+    serve(mock_site, monkeypatch, SHORTER)
+    for _ in range(SHRINK_CONFIRM_RUNS - 1):
+        assert fetch("--ignore-lastmod")["failed_pages"] == [PAGE]
+        assert (docs_dir / "page-1.md").read_bytes() == page
+
+    # The same smaller version once more: the page really did shrink
+    assert fetch("--ignore-lastmod")["failed_pages"] == []
+    assert (docs_dir / "page-1.md").read_bytes() == SHORTER
+
+
+def test_a_different_shrunk_body_starts_the_count_again(fetch, mock_site, monkeypatch, tmp_path):
+    fetch()
+    for run in range(SHRINK_CONFIRM_RUNS):
+        serve(mock_site, monkeypatch, SHORTER + b"- Revision %d\n" % run)
+        assert fetch("--ignore-lastmod")["failed_pages"] == [PAGE]
+
+
+def test_allow_shrink_accepts_a_smaller_page(fetch, mock_site, monkeypatch, tmp_path):
+    fetch()
+    serve(mock_site, monkeypatch, SHORTER)
+    assert fetch("--ignore-lastmod")["failed_pages"] == [PAGE]
+    assert fetch("--allow-shrink")["failed_pages"] == []
+    assert (tmp_path / "docs" / "page-1.md").read_bytes() == SHORTER
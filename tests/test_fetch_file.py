@@ -0,0 +1,64 @@
+import pytest
+
+import fetch_claude_docs
+from fetch_claude_docs import MIN_SHRINK_CHECK_SIZE, fetch_file
+from fetch_scheduler import RequestScheduler
+from fetch_sources import SOURCES
+
+SOURCE = SOURCES[0]
+CHANGELOG = SOURCE.file_for("changelog")
+HEADER_SIZE = len(CHANGELOG.header.encode("utf-8"))
+BODY = "## 1.0.84\n\n" + "- Fixed a bug in the hooks runner\n" * 200
+
+
+class FakeResponse:
+    status_code = 200
+    headers = {"ETag": '"v2"'}
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def raise_for_status(self) -> None:
+        pass
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    """Make fetch_file receive this body."""
+    def serve(text: str) -> None:
+        monkeypatch.setattr(fetch_claude_docs, "get_with_retries",
+                            lambda *args, **kwargs: (FakeResponse(text), {}, None))
+    return serve
+
+
+def fetch(previous_size=None):
+    return fetch_file(SOURCE, CHANGELOG, None, RequestScheduler(), previous_size=previous_size)
+
+
+def test_header_is_prepended_after_validation(serve):
+    serve(BODY)
+    result = fetch()
+    assert result.content == CHANGELOG.header + BODY
+    assert result.etag == '"v2"'
+
+
+@pytest.mark.parametrize("body", ["", "   \n", "# Changelog\n\n- one fix\n"])
+def test_short_body_is_rejected_despite_the_header(serve, body):
+    serve(body)
+    with pytest.raises(ValueError, match="too short"):
+        fetch()
+
+
+def test_unchanged_body_passes_the_shrink_check(serve):
+    serve(BODY)
+    fetch(previous_size=HEADER_SIZE + len(BODY))
+
+
+def test_shrink_check_compares_bodies(serve):
+    # Under half the previous body, but over half of body plus header
+    previous_body = "x" * max(MIN_SHRINK_CHECK_SIZE, 2 * HEADER_SIZE)
+    body = "## 1.0.84\n\n" + "y" * (len(previous_body) // 2 - 20)
+    assert HEADER_SIZE + len(body) >= (HEADER_SIZE + len(previous_body)) / 2
+    serve(body)
+    with pytest.raises(ValueError, match="shrank"):
+        fetch(previous_size=HEADER_SIZE + len(previous_body))
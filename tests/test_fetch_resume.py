@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+import fetch_checkpoint
+import fetch_claude_docs
+from fetch_checkpoint import CHECKPOINT_FILE
+from fetch_claude_docs import MANIFEST_FILE
+
+PAGES = 6
+
+
+def interrupt_after(monkeypatch, stored: int) -> None:
+    """Stop the run (as a killed job would) once `stored` documents were stored."""
+    store = fetch_claude_docs.store_fetch_result
+    calls = []
+
+    def store_then_stop(*args):
+        if len(calls) == stored:
+            raise KeyboardInterrupt
+        calls.append(args)
+        return store(*args)
+
+    monkeypatch.setattr(fetch_claude_docs, "store_fetch_result", store_then_stop)
+
+
+def test_interrupted_run_is_resumed(fetch, mock_site, monkeypatch, tmp_path):
+    docs_dir = tmp_path / "docs"
+    monkeypatch.setattr(fetch_checkpoint, "CHECKPOINT_INTERVAL", 0)
+    interrupt_after(monkeypatch, 3)
+    with pytest.raises(KeyboardInterrupt):
+        fetch()
+    checkpoint = json.loads((docs_dir / CHECKPOINT_FILE).read_text())
+    assert checkpoint["status"] == "running"
+    assert len(checkpoint["completed"]) == 3
+    # Nothing is published before the run finishes
+    assert not (docs_dir / MANIFEST_FILE).exists()
+
+    monkeypatch.undo()
+    mock_site.state.reset_counters()
+    metadata = fetch()
+    # The sitemap, the three pages that were not done yet and the changelog
+    assert mock_site.state.snapshot()["requests"] == 1 + PAGES - 3 + 1
+    assert metadata["pages_fetched_successfully"] == PAGES + 1
+    manifest = json.loads((docs_dir / MANIFEST_FILE).read_text())
+    assert sorted(manifest["files"]) == sorted([f"page-{n}.md" for n in range(PAGES)] + ["changelog.md"])
+    assert all((docs_dir / name).exists() for name in manifest["files"])
+    assert json.loads((docs_dir / CHECKPOINT_FILE).read_text())["status"] == "complete"
+
+
+@pytest.mark.parametrize("args, requests", [((), 1 + PAGES + 1), (("--resume",), 1 + PAGES - 3 + 1)])
+def test_old_interrupted_run_starts_over_unless_resume_is_given(fetch, mock_site, monkeypatch, tmp_path,
+                                                                 args, requests):
+    docs_dir = tmp_path / "docs"
+    monkeypatch.setattr(fetch_checkpoint, "CHECKPOINT_INTERVAL", 0)
+    interrupt_after(monkeypatch, 3)
+    with pytest.raises(KeyboardInterrupt):
+        fetch()
+    monkeypatch.undo()
+    checkpoint = json.loads((docs_dir / CHECKPOINT_FILE).read_text())
+    checkpoint["started"] = "2020-01-01T00:00:00"
+    (docs_dir / CHECKPOINT_FILE).write_text(json.dumps(checkpoint))
+
+    mock_site.state.reset_counters()
+    fetch(*args)
+    assert mock_site.state.snapshot()["requests"] == requests
+
+
+def test_only_failed_fetches_just_the_failed_pages(fetch, mock_site, monkeypatch, tmp_path):
+    fetch()
+    generated = type(mock_site.state).page_body
+    monkeypatch.setattr(mock_site.state, "page_body",
+                        lambda page: b"<html>Bad gateway</html>" if page == 2 else generated(mock_site.state, page))
+    assert fetch("--ignore-lastmod")["failed_pages"] == ["/en/docs/claude-code/page-2"]
+
+    monkeypatch.undo()
+    mock_site.state.change_pages(1.0)  # every page changed, but only page-2 is asked for
+    mock_site.state.reset_counters()
+    metadata = fetch("--only-failed")
+    assert mock_site.state.snapshot()["requests"] == 2  # the sitemap and page-2
+    assert metadata["failed_pages"] == []
+    assert b"revision 1" in (tmp_path / "docs" / "page-2.md").read_bytes()
+    assert b"revision 0" in (tmp_path / "docs" / "page-3.md").read_bytes()
@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+import fetch_scheduler
+from fetch_scheduler import (
+    ADDITIVE_STEP, DECREASE_COOLDOWN, DEFAULT_RETRY_AFTER, MAX_RETRY_AFTER, MIN_RATE, THROTTLED_RATE,
+    HostState, RequestScheduler, parse_retry_after,
+)
+
+DOCS = "https://docs.anthropic.com/en/docs/claude-code/hooks.md"
+GITHUB = "https://raw.githubusercontent.com/anthropics/claude-code/main/CHANGELOG.md"
+
+
+class Clock:
+    """A time.monotonic() stand-in that only moves when told to."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(fetch_scheduler.time, "monotonic", clock)
+    return clock
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, DEFAULT_RETRY_AFTER),
+    ("", DEFAULT_RETRY_AFTER),
+    ("7", 7.0),
+    (" 1.5 ", 1.5),
+    ("-3", 0.0),
+    ("86400", MAX_RETRY_AFTER),
+    ("soon", DEFAULT_RETRY_AFTER),
+])
+def test_parse_retry_after_seconds(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    when = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert 25 <= parse_retry_after(format_datetime(when, usegmt=True)) <= 30
+    past = datetime.now(timezone.utc) - timedelta(hours=1)
+    assert parse_retry_after(format_datetime(past, usegmt=True)) == 0.0
+
+
+def test_rate_grows_additively_up_to_the_ceiling(clock):
+    scheduler = RequestScheduler(max_rate=4, burst=1)
+    state = scheduler._host(DOCS)
+    state.rate = 3.0
+    scheduler.record(DOCS, 200, latency=0.1)
+    assert state.rate == 3.0 + ADDITIVE_STEP
+    for _ in range(10):
+        scheduler.record(DOCS, 200, latency=0.1)
+    assert state.rate == 4
+
+
+@pytest.mark.parametrize("status", [429, 500, 503, None])
+def test_congestion_halves_the_rate_once_per_cooldown(clock, status):
+    scheduler = RequestScheduler(max_rate=4, burst=1)
+    state = scheduler._host(DOCS)
+    scheduler.record(DOCS, status, retry_after=0)
+    assert state.rate == 2.0
+    # Errors from requests that were already in flight count once
+    scheduler.record(DOCS, status, retry_after=0)
+    assert state.rate == 2.0
+    clock.now += DECREASE_COOLDOWN
+    scheduler.record(DOCS, status, retry_after=0)
+    assert state.rate == 1.0
+    assert state.decreases == 2
+
+
+def test_rate_never_drops_below_the_minimum(clock):
+    scheduler = RequestScheduler(max_rate=1, burst=1)
+    for _ in range(20):
+        scheduler.record(DOCS, 503)
+        clock.now += DECREASE_COOLDOWN
+    assert scheduler._host(DOCS).rate == MIN_RATE
+
+
+def test_latency_increase_slows_paced_hosts_only(clock):
+    paced = RequestScheduler(max_rate=4, burst=1)
+    unlimited = RequestScheduler(max_rate=0, burst=1)
+    for scheduler in (paced, unlimited):
+        scheduler.record(DOCS, 200, latency=0.05)
+        for _ in range(10):
+            scheduler.record(DOCS, 200, latency=2.0)
+    assert paced._host(DOCS).rate < 4
+    assert unlimited._host(DOCS).rate is None
+
+
+def test_unlimited_host_gets_a_rate_when_throttled(clock):
+    scheduler = RequestScheduler(max_rate=None, burst=4)
+    scheduler.record(DOCS, 429, retry_after=0)
+    state = scheduler._host(DOCS)
+    assert state.rate == THROTTLED_RATE
+    assert state.tokens <= 1.0
+    # Healthy responses raise it again without a ceiling
+    scheduler.record(DOCS, 200, latency=0.1)
+    assert state.rate == THROTTLED_RATE + ADDITIVE_STEP
+
+
+def test_retry_after_pauses_only_that_host(clock):
+    scheduler = RequestScheduler(max_rate=None, burst=1)
+    scheduler.record(DOCS, 429, retry_after=10)
+    assert scheduler._host(DOCS).next_slot(clock.now) == 10
+    assert scheduler._host(GITHUB).next_slot(clock.now) == 0
+    assert scheduler._host(DOCS).next_slot(clock.now + 10) == 0
+
+
+def test_retry_after_never_shortens_a_pause(clock):
+    scheduler = RequestScheduler(max_rate=None, burst=1)
+    scheduler.record(DOCS, 429, retry_after=30)
+    scheduler.record(DOCS, 429, retry_after=5)
+    assert scheduler._host(DOCS).next_slot(clock.now) == 30
+
+
+def test_429_without_retry_after_pauses_for_the_default(clock):
+    scheduler = RequestScheduler(max_rate=None, burst=1)
+    scheduler.record(DOCS, 429)
+    assert scheduler._host(DOCS).next_slot(clock.now) == DEFAULT_RETRY_AFTER
+
+
+def test_token_bucket_allows_a_burst_then_paces():
+    state = HostState(max_rate=2, burst=2)
+    now = state.updated
+    assert state.next_slot(now) == 0
+    assert state.next_slot(now) == 0
+    assert state.next_slot(now) == pytest.approx(0.5)
+    assert state.next_slot(now + 0.5) == 0
+
+
+def test_summary_reports_each_host(clock):
+    scheduler = RequestScheduler(max_rate=4, burst=1)
+    scheduler.record(DOCS, 429, retry_after=0)
+    scheduler.record(GITHUB, 200, latency=0.25)
+    summary = scheduler.summary()
+    assert list(summary) == ["docs.anthropic.com", "raw.githubusercontent.com"]
+    assert summary["docs.anthropic.com"]["throttled"] == 1
+    assert summary["docs.anthropic.com"]["rate"] == 2.0
+    assert summary["raw.githubusercontent.com"]["latency_ms"] == 250.0
@@ -0,0 +1,115 @@
+import json
+import re
+
+import pytest
+
+from fetch_sources import (
+    FILENAME_PREFIXES, SITEMAP_URLS, SKIP_PATTERNS, SOURCES, Source, load_sources, select_sources,
+    source_from_json,
+)
+
+
+def test_source_from_json_fills_in_defaults():
+    source = source_from_json({
+        "name": "claude-code-ja",
+        "include": ["/ja/docs/claude-code/"],
+        "headers": {"Accept-Language": "ja"},
+        "files": [{"key": "notes", "filename": "notes.md", "url": "https://example.com/notes.md"}],
+    })
+    assert source.output_dir == "mirrors/claude-code-ja"
+    assert source.include == ("/ja/docs/claude-code/",)
+    assert source.strip_prefixes == ("/ja/docs/claude-code/",)
+    assert source.sitemap_urls == SITEMAP_URLS
+    assert source.exclude == SKIP_PATTERNS
+    assert source.headers == (("Accept-Language", "ja"),)
+    assert source.files[0].original_url == "https://example.com/notes.md"
+    assert source.file_for("notes") is source.files[0]
+    assert source.file_for("changelog") is None
+
+
+def test_source_from_json_keeps_the_default_prefixes_without_include():
+    assert source_from_json({"name": "copy"}).strip_prefixes == FILENAME_PREFIXES
+
+
+@pytest.mark.parametrize("entry, message", [
+    ("claude-code", "need a name"),
+    ({}, "need a name"),
+    ({"name": ""}, "need a name"),
+    ({"name": "x", "sitemap": "https://example.com/sitemap.xml"}, "Unknown field(s) in source x: sitemap"),
+    ({"name": "x", "files": [{"key": "a", "filename": "a.md", "url": "u", "size": 1}]},
+     "Unknown field(s) in a file of source x: size"),
+    ({"name": "x", "files": [{"key": "a", "url": "u"}]}, "need a key, filename and url"),
+    ({"name": "x", "validator": "html"}, "Unknown validator 'html' in source x"),
+    ({"name": "x", "files": [{"key": "a", "filename": "a.md", "url": "u", "validator": "json"}]},
+     "Unknown validator 'json' in source x"),
+    ({"name": "x", "output_dir": "/tmp/x"}, "must stay inside the repository"),
+    ({"name": "x", "output_dir": "mirrors/../../x"}, "must stay inside the repository"),
+])
+def test_source_from_json_rejects_bad_entries(entry, message):
+    with pytest.raises(ValueError, match=re.escape(message)):
+        source_from_json(entry)
+
+
+def test_load_sources_adds_and_replaces_by_name(tmp_path):
+    registry = tmp_path / "sources.json"
+    registry.write_text(json.dumps([
+        {"name": "claude-code", "output_dir": "docs", "include": ["/en/docs/claude-code/"]},
+        {"name": "claude-code-ja", "include": ["/ja/docs/claude-code/"]},
+    ]))
+    sources = load_sources(registry)
+    assert [source.name for source in sources] == ["claude-code", "claude-code-ja"]
+    # The replacement has no changelog unless it declares one
+    assert sources[0].files == ()
+    assert load_sources() == list(SOURCES)
+
+
+def test_load_sources_needs_a_list(tmp_path):
+    registry = tmp_path / "sources.json"
+    registry.write_text(json.dumps({"name": "claude-code-ja"}))
+    with pytest.raises(ValueError, match="must contain a list"):
+        load_sources(registry)
+
+
+def test_select_sources_by_name():
+    sources = [Source("a", "mirrors/a"), Source("b", "mirrors/b"), Source("c", "mirrors/c")]
+    assert select_sources(sources) == sources
+    assert [source.name for source in select_sources(sources, ["c", "a", "c"])] == ["c", "a"]
+    with pytest.raises(ValueError, match="Unknown source"):
+        select_sources(sources, ["a", "d"])
+
+
+def test_select_sources_rejects_a_shared_output_dir():
+    sources = [Source("a", "mirrors/a"), Source("b", "mirrors/a/")]
+    with pytest.raises(ValueError, match="share the output directory"):
+        select_sources(sources)
+    assert select_sources(sources, ["b"]) == [sources[1]]
+
+
+def test_discovery_reads_every_sitemap_on_one_executor(monkeypatch):
+    import threading
+    import time
+
+    import fetch_claude_docs
+
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def sitemap_entries(session, url):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        if url.endswith("/index.xml"):
+            for child in range(4):
+                yield "sitemap", url.replace("index.xml", f"child-{child}.xml"), None
+        else:
+            yield "url", url.replace(".xml", "").replace("/sitemaps/", "/en/docs/claude-code/"), None
+
+    monkeypatch.setattr(fetch_claude_docs, "iter_sitemap_entries", sitemap_entries)
+    sources = [Source(name=f"site-{n}", output_dir=f"mirrors/{n}",
+                      sitemap_urls=(f"https://site-{n}.example.com/sitemaps/index.xml",)) for n in range(3)]
+    discoveries = fetch_claude_docs.discover_sources(None, sources, concurrency=2)
+    assert sorted(len(pages) for _, _, pages in discoveries.values()) == [4, 4, 4]
+    # Three sources with four child sitemaps each, never more requests than workers
+    assert peak[0] == 2
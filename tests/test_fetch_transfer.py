@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+import fetch_claude_docs
+from fetch_claude_docs import FILE_WORKERS, HEADERS, METADATA_FILE, create_session
+
+
+@pytest.fixture
+def compressing_site():
+    from mock_docs_server import MockConfig, start_in_thread
+    server = start_in_thread(MockConfig(pages=4, page_size=16384, seed=1, compress=True))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_session_pool_and_headers():
+    session = create_session(4)
+    adapter = session.get_adapter("https://docs.anthropic.com/")
+    assert adapter._pool_maxsize == 4 + FILE_WORKERS
+    assert adapter.max_retries.total == 0
+    assert "gzip" in session.headers["Accept-Encoding"]
+    assert session.headers["Accept-Encoding"] == HEADERS["Accept-Encoding"]
+    session.close()
+
+
+def test_pages_are_transferred_compressed(compressing_site, tmp_path):
+    base_url = f"http://127.0.0.1:{compressing_site.server_port}"
+    state = compressing_site.RequestHandlerClass.state
+    metrics_file = tmp_path / "metrics.jsonl"
+    fetch_claude_docs.main([
+        "--docs-dir", str(tmp_path / "docs"), "--rate-limit", "0", "--metrics-file", str(metrics_file),
+        "--sitemap-url", f"{base_url}/sitemap.xml", "--changelog-url", f"{base_url}/CHANGELOG.md",
+    ])
+    # Stored as served, decompressed
+    assert (tmp_path / "docs" / "page-2.md").read_bytes() == state.page_body(2)
+    pages = [record for record in map(json.loads, metrics_file.read_text().splitlines())
+             if record["kind"] == "page"]
+    assert len(pages) == 4
+    assert all(0 < record["wire_bytes"] < record["bytes"] / 4 for record in pages)
+    totals = json.loads((tmp_path / "docs" / METADATA_FILE).read_text())["request_metrics"]["page"]
+    assert totals["wire_bytes"] < totals["bytes"]
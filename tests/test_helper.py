@@ -0,0 +1,9 @@
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+
+
+def test_installed_helper_is_the_template():
+    # The template is the only source; the installer and updates copy it over
+    assert (REPO / "claude-docs-helper.sh").read_bytes() == \
+        (REPO / "scripts" / "claude-docs-helper.sh.template").read_bytes()
@@ -0,0 +1,93 @@
+import http.server
+import threading
+
+import pytest
+
+import fetch_claude_docs
+from fetch_claude_docs import create_session, discover_pages, iter_sitemap_entries
+
+NS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+
+@pytest.fixture
+def site():
+    """A local server answering the paths in site.pages (bytes) and 404 for anything else."""
+    pages = {}
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            body = pages.get(self.path)
+            self.send_response(200 if body is not None else 404)
+            self.send_header("Content-Length", str(len(body or b"")))
+            self.end_headers()
+            self.wfile.write(body or b"")
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    server.pages = pages
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    server.session = create_session(2)
+    yield server
+    server.session.close()
+    server.shutdown()
+    server.server_close()
+
+
+def urlset(*entries: str, namespace: str = NS) -> bytes:
+    return f'<?xml version="1.0" encoding="UTF-8"?><urlset {namespace}>{"".join(entries)}</urlset>'.encode()
+
+
+def test_entries_are_read_across_chunks(site, monkeypatch):
+    # Chunks far smaller than a tag: the parser has to carry state between them
+    monkeypatch.setattr(fetch_claude_docs, "SITEMAP_CHUNK_SIZE", 7)
+    site.pages["/sitemap.xml"] = urlset(
+        "<url><loc> https://docs.example.com/en/docs/claude-code/hooks </loc><lastmod>2025-01-02</lastmod></url>",
+        "<url><loc>https://docs.example.com/en/docs/claude-code/settings</loc></url>",
+        "<url><lastmod>2025-01-03</lastmod></url>",
+    )
+    assert list(iter_sitemap_entries(site.session, site.url + "/sitemap.xml")) == [
+        ("url", "https://docs.example.com/en/docs/claude-code/hooks", "2025-01-02"),
+        ("url", "https://docs.example.com/en/docs/claude-code/settings", None),
+    ]
+
+
+def test_entries_without_the_namespace(site):
+    site.pages["/sitemap.xml"] = urlset("<url><loc>https://docs.example.com/a</loc></url>", namespace="")
+    assert list(iter_sitemap_entries(site.session, site.url + "/sitemap.xml")) == [
+        ("url", "https://docs.example.com/a", None),
+    ]
+
+
+def test_sitemap_with_a_dtd_is_refused(site):
+    site.pages["/sitemap.xml"] = (b'<?xml version="1.0"?><!DOCTYPE urlset [<!ENTITY x "y">]>'
+                                  b'<urlset><url><loc>&x;</loc></url></urlset>')
+    with pytest.raises(ValueError, match="DTD"):
+        list(iter_sitemap_entries(site.session, site.url + "/sitemap.xml"))
+
+
+def test_discovery_follows_indexes_and_tries_the_next_candidate(site):
+    page = "https://docs.example.com/en/docs/claude-code/"
+    site.pages["/index.xml"] = (
+        f'<sitemapindex {NS}><sitemap><loc>{site.url}/a.xml</loc></sitemap>'
+        f'<sitemap><loc>{site.url}/b.xml</loc></sitemap></sitemapindex>'
+    ).encode()
+    site.pages["/a.xml"] = urlset(f"<url><loc>{page}hooks</loc><lastmod>2025-01-01</lastmod></url>",
+                                  "<url><loc>https://docs.example.com/en/api/overview</loc></url>")
+    site.pages["/b.xml"] = urlset(f"<url><loc>{page}hooks</loc><lastmod>2025-02-01</lastmod></url>",
+                                  f"<url><loc>{page}settings</loc></url>")
+
+    def page_filter(url):
+        return url[len("https://docs.example.com"):] if url.startswith(page) else None
+
+    sitemap_url, base_url, pages = discover_pages(
+        site.session, 2, [site.url + "/missing.xml", site.url + "/index.xml"], page_filter)
+    assert sitemap_url == site.url + "/index.xml"
+    assert base_url == "https://docs.example.com"
+    # A page listed twice keeps its newest lastmod; other trees are left out
+    assert pages == {"/en/docs/claude-code/hooks": "2025-02-01", "/en/docs/claude-code/settings": None}
+
+    with pytest.raises(Exception, match="Could not find a valid sitemap"):
+        discover_pages(site.session, 2, [site.url + "/missing.xml"], page_filter)